@@ -0,0 +1,122 @@
+"""Reproducible synthetic .docx documents for the benchmarks.
+
+Every document is described by a `CorpusProfile`, and the same profile always produces the same
+text, so timings taken on different days and machines measure the same work.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from io import BytesIO
+from docx import Document
+
+WORDS = (
+    "the parties agree that supplier shall deliver goods described herein in accordance with "
+    "terms and conditions of this agreement including any schedules annexes amendments notices "
+    "payment invoice clause section buyer seller warranty liability termination"
+).split()
+
+# How dates are written in the documents, covering every pattern in `date_patterns`
+DATE_FORMATS = [
+    lambda day: day.strftime('%Y-%m-%d'),
+    lambda day: day.strftime('%d/%m/%Y'),
+    lambda day: day.strftime('%m-%d-%Y'),
+    lambda day: day.strftime('%d-%b-%Y'),
+    lambda day: f"{day.day}th of {day.strftime('%B')}, {day.year}",
+    lambda day: f"{day.strftime('%B')} {day.day}, {day.year}",
+    lambda day: f"{day.strftime('%b')} the {day.day} {day.year}",
+]
+
+@dataclass(frozen=True)
+class CorpusProfile:
+    """The shape of a generated document."""
+    name: str
+    paragraphs: int = 100
+    runs_per_paragraph: int = 3
+    words_per_run: int = 8
+    tables: int = 0
+    table_rows: int = 0
+    table_cols: int = 0
+    sections: int = 1
+    # lines of text in each header and footer
+    header_footer_lines: int = 0
+    # the chance that any one run, cell or header line contains a date
+    date_density: float = 0.1
+    seed: int = 1
+
+PROFILES = {
+    profile.name: profile for profile in [
+        CorpusProfile('paragraphs', paragraphs=2000, runs_per_paragraph=3),
+        CorpusProfile('fragmented-runs', paragraphs=300, runs_per_paragraph=25, words_per_run=2),
+        CorpusProfile('wide-tables', paragraphs=20, tables=4, table_rows=60, table_cols=12, words_per_run=4),
+        CorpusProfile('sections', paragraphs=400, sections=40, header_footer_lines=3),
+        CorpusProfile('date-dense', paragraphs=1000, runs_per_paragraph=2, date_density=1.0),
+        CorpusProfile('no-dates', paragraphs=2000, runs_per_paragraph=3, date_density=0.0),
+    ]
+}
+
+# A document large enough to be worth splitting into chunks, for measuring how scanning one
+# document across several worker processes scales
+SCALING_PROFILE = CorpusProfile(
+    'large', paragraphs=12000, runs_per_paragraph=3, tables=4, table_rows=100, table_cols=6, sections=4, header_footer_lines=3
+)
+
+class _TextGenerator:
+    def __init__(self, profile: CorpusProfile):
+        self.profile = profile
+        self.random = random.Random(profile.seed)
+
+    def text(self, words: int) -> str:
+        text = ' '.join(self.random.choice(WORDS) for _ in range(words))
+        if self.random.random() < self.profile.date_density:
+            day = date(1990, 1, 1) + timedelta(days=self.random.randrange(365 * 40))
+            text += f" on {self.random.choice(DATE_FORMATS)(day)} and"
+        return text + ' '
+
+def generate_document(profile: CorpusProfile):
+    """Return a python-docx document with the given profile."""
+    generator = _TextGenerator(profile)
+    document = Document()
+
+    paragraphs_per_section = max(1, profile.paragraphs // profile.sections)
+    tables_after = {
+        (table_index + 1) * profile.paragraphs // (profile.tables + 1) for table_index in range(profile.tables)
+    }
+    for paragraph_index in range(profile.paragraphs):
+        if paragraph_index and paragraph_index % paragraphs_per_section == 0 and len(document.sections) < profile.sections:
+            document.add_section()
+        paragraph = document.add_paragraph()
+        for run_index in range(profile.runs_per_paragraph):
+            paragraph.add_run(generator.text(profile.words_per_run)).bold = run_index % 2 == 1
+        if paragraph_index + 1 in tables_after:
+            table = document.add_table(rows=profile.table_rows, cols=profile.table_cols)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = generator.text(profile.words_per_run)
+
+    # every other section has headers and footers of its own, the rest are linked to the previous
+    for section_index, section in enumerate(document.sections):
+        if profile.header_footer_lines == 0 or section_index % 2 == 1: continue
+        for header_footer in [section.header, section.footer]:
+            header_footer.is_linked_to_previous = False
+            header_footer.paragraphs[0].text = generator.text(profile.words_per_run)
+            for _ in range(profile.header_footer_lines - 1):
+                header_footer.add_paragraph(generator.text(profile.words_per_run))
+
+    return document
+
+def generate_docx(profile: CorpusProfile) -> bytes:
+    """Return the contents of a .docx file with the given profile."""
+    file = BytesIO()
+    generate_document(profile).save(file)
+    return file.getvalue()
+
+def generate_texts(profile: CorpusProfile) -> list[str]:
+    """Return as many texts as a document with the given profile has runs, cells and header and
+    footer lines, without building the document."""
+    generator = _TextGenerator(profile)
+    text_count = (
+        profile.paragraphs * profile.runs_per_paragraph
+        + profile.tables * profile.table_rows * profile.table_cols
+        + (profile.sections + 1) // 2 * 2 * profile.header_footer_lines
+    )
+    return [ generator.text(profile.words_per_run) for _ in range(text_count) ]
@@ -0,0 +1,346 @@
+"""Time the date extraction on the synthetic corpus and compare the results with a saved baseline.
+
+    python -m bench.run                     # print the timings
+    python -m bench.run --save-baseline     # store them in bench/baseline.json
+    python -m bench.run --check             # exit with an error on a regression past the threshold
+    python -m bench.run --workers 1 2 4     # scan one large document in chunks across 1, 2 and 4 processes,
+                                            # and time small documents scanned alongside it
+
+Timings are the fastest of several repeats, and benchmarks that regress are measured again
+before they're reported. Peak memory is measured with tracemalloc, so it counts
+Python allocations only, not the XML trees lxml keeps in C memory.
+"""
+import os, sys, json, math, time, argparse, statistics, threading, tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from io import BytesIO
+from concurrent.futures import Executor
+from typing import Callable, Optional
+from unittest import mock
+from docx import Document
+
+from server import main as server_main, workers
+from server.parse_docx import ScanOptions, _search_date_patterns, century, find_dates_in_docx, month_names, normalize_date
+from server.parse_ooxml import CHUNK_CHARS, find_dates_in_ooxml
+
+from .corpus import PROFILES, SCALING_PROFILE, CorpusProfile, generate_docx, generate_texts
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'baseline.json')
+CALIBRATION = 'calibration'
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], object]
+    # how much work one run does, for reporting throughput
+    size: int
+    unit: str
+
+@dataclass
+class Result:
+    seconds: float
+    peak_bytes: int
+    throughput: float
+
+def _measure(benchmark: Benchmark, repeat: int, min_sample_seconds: float = 0.2) -> Result:
+    # warm up, and find how many runs make a sample long enough to time reliably
+    started = time.perf_counter()
+    benchmark.run()
+    loops = max(1, math.ceil(min_sample_seconds / max(time.perf_counter() - started, 1e-6)))
+
+    seconds = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            benchmark.run()
+        seconds = min(seconds, (time.perf_counter() - started) / loops)
+
+    tracemalloc.start()
+    benchmark.run()
+    _current, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Result(seconds, peak_bytes, benchmark.size / seconds)
+
+def _calibration_benchmark() -> Benchmark:
+    """A fixed amount of plain Python work, to tell a slower machine apart from slower code."""
+    def run():
+        total = 0
+        for number in range(200_000):
+            total += len(str(number * 7))
+        return total
+    return Benchmark(CALIBRATION, run, 200_000, 'loops')
+
+def _scan_benchmarks(profile_names: list[str]) -> list[Benchmark]:
+    benchmarks = []
+    for name in profile_names:
+        texts = generate_texts(PROFILES[name])
+        benchmarks.append(Benchmark(
+            f'search_date_patterns[{name}]',
+            lambda texts=texts: [ _search_date_patterns(text) for text in texts ],
+            sum(len(text) for text in texts), 'chars'
+        ))
+    return benchmarks
+
+def _normalize_with_datetime(match) -> str:
+    """How matches were normalized before `normalize_date`, to compare it against."""
+    match_groups = match.groupdict()
+    try:
+        return datetime(
+            year = int(match_groups['year']) if len(match_groups['year']) == 4 else int(match_groups['year']) + century,
+            month = int(match_groups['month']) if match_groups.get('month') is not None else month_names[match_groups['month_name'].capitalize()],
+            day=int(match_groups['day']),
+            hour=0, minute=0, second=0, microsecond=0
+        ).isoformat() + "Z"
+    except ValueError:
+        return None
+
+def _normalize_benchmarks(profile_names: list[str]) -> list[Benchmark]:
+    benchmarks = []
+    for name in profile_names:
+        matches = [ match for text in generate_texts(PROFILES[name]) for match in _search_date_patterns(text) ]
+        if not matches: continue
+        benchmarks.append(Benchmark(
+            f'normalize_date[{name}]', lambda matches=matches: [ normalize_date(match) for match in matches ], len(matches), 'dates'
+        ))
+        benchmarks.append(Benchmark(
+            f'normalize_date_with_datetime[{name}]', lambda matches=matches: [ _normalize_with_datetime(match) for match in matches ], len(matches), 'dates'
+        ))
+    return benchmarks
+
+def _document_benchmarks(profile_names: list[str]) -> list[Benchmark]:
+    benchmarks = []
+    for name in profile_names:
+        data = generate_docx(PROFILES[name])
+        benchmarks.append(Benchmark(
+            f'find_dates_in_docx[{name}]',
+            lambda data=data: find_dates_in_docx(Document(BytesIO(data))),
+            len(data), 'bytes'
+        ))
+        benchmarks.append(Benchmark(
+            f'find_dates_in_ooxml[{name}]',
+            lambda data=data: find_dates_in_ooxml(BytesIO(data)),
+            len(data), 'bytes'
+        ))
+        # scanning each paragraph once instead of run by run
+        benchmarks.append(Benchmark(
+            f'find_dates_in_docx_join_runs[{name}]',
+            lambda data=data: find_dates_in_docx(Document(BytesIO(data)), options=ScanOptions(join_runs=True)),
+            len(data), 'bytes'
+        ))
+        benchmarks.append(Benchmark(
+            f'find_dates_in_ooxml_join_runs[{name}]',
+            lambda data=data: find_dates_in_ooxml(BytesIO(data), options=ScanOptions(join_runs=True)),
+            len(data), 'bytes'
+        ))
+    return benchmarks
+
+def _scaling_benchmarks(worker_counts: list[int], pools: dict[int, Executor]) -> list[Benchmark]:
+    """Scan one large document in one go, and in chunks across pools of each number of worker
+    processes, which are started on first use and added to `pools`."""
+    data = generate_docx(SCALING_PROFILE)
+
+    def scan_in_chunks(worker_count: int):
+        if worker_count not in pools: pools[worker_count] = workers.create_executor('process', worker_count)
+        return workers.parse_docx_bytes_in_chunks(data, pools[worker_count], ScanOptions(), CHUNK_CHARS, worker_count)
+
+    benchmarks = [Benchmark(
+        f'find_dates_in_ooxml[{SCALING_PROFILE.name}]', lambda: find_dates_in_ooxml(BytesIO(data)), len(data), 'bytes'
+    )]
+    for worker_count in worker_counts:
+        benchmarks.append(Benchmark(
+            f'find_dates_in_ooxml_chunks[{SCALING_PROFILE.name},workers={worker_count}]',
+            lambda worker_count=worker_count: scan_in_chunks(worker_count), len(data), 'bytes'
+        ))
+    return benchmarks
+
+def _print_scaling(results: dict[str, dict]):
+    """Print how much faster scanning in chunks is than scanning in one go, for each pool size."""
+    sequential = results.get(f'find_dates_in_ooxml[{SCALING_PROFILE.name}]')
+    if sequential is None: return
+    for name, result in results.items():
+        if name.startswith('find_dates_in_ooxml_chunks['):
+            print(f"{name:45} {sequential['seconds'] / result['seconds']:9.2f}x the speed of scanning in one go")
+
+def _small_scan_latencies(pool: Executor, data: bytes, count: int, interval: float = 0.0) -> list[float]:
+    """Return how long each of `count` small documents took to scan on the `pool`, one after
+    another, `interval` seconds apart."""
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        pool.submit(workers.parse_docx_bytes_with_stats, data, 'ooxml').result()
+        latencies.append(time.perf_counter() - started)
+        time.sleep(interval)
+    return latencies
+
+def _print_latency_under_load(worker_count: int, count: int = 100, interval: float = 0.02):
+    """Print how long small documents take to scan while nothing else runs, and while a large
+    document is scanned in chunks on the same pool, with the chunks in flight capped at the pool's
+    size as the server does, and with every chunk sent at once. The small documents are spread
+    `interval` seconds apart, so they arrive at every stage of the large scan."""
+    large = generate_docx(SCALING_PROFILE)
+    small = generate_docx(CorpusProfile('small', paragraphs=10))
+    pool = workers.create_executor('process', worker_count)
+    try:
+        # the pool starts workers as they're needed, so start them all before timing anything
+        list(pool.map(workers.parse_docx_bytes_with_stats, [small] * worker_count, ['ooxml'] * worker_count))
+        cases = [('idle', None), (f'max_in_flight={worker_count}', worker_count), ('uncapped', sys.maxsize)]
+        for case, max_in_flight in cases:
+            if max_in_flight is None:
+                latencies = _small_scan_latencies(pool, small, count, interval)
+            else:
+                done = threading.Event()
+                def scan_large():
+                    # small chunks make for a long queue when nothing caps it
+                    while not done.is_set():
+                        workers.parse_docx_bytes_in_chunks(large, pool, ScanOptions(), 16 * 1024, max_in_flight)
+                scanner = threading.Thread(target=scan_large)
+                scanner.start()
+                time.sleep(0.5)
+                try:
+                    latencies = _small_scan_latencies(pool, small, count, interval)
+                finally:
+                    done.set()
+                    scanner.join()
+            print(
+                f"{f'small_scan_latency[workers={worker_count},{case}]':45} "
+                f"{statistics.median(latencies) * 1000:9.1f}ms median "
+                f"{statistics.quantiles(latencies, n=10)[-1] * 1000:9.1f}ms p90 {max(latencies) * 1000:9.1f}ms max",
+                flush=True
+            )
+    finally:
+        pool.shutdown()
+
+def _round_trip_benchmarks(profile_names: list[str]) -> list[Benchmark]:
+    from fastapi.testclient import TestClient
+    client = TestClient(server_main.app)
+
+    def upload(data: bytes):
+        response = client.post('/api/v1/docx', files=[('files', ('document.docx', data, DOCX_CONTENT_TYPE))])
+        response.raise_for_status()
+        return response.content
+
+    benchmarks = []
+    for name in profile_names:
+        data = generate_docx(PROFILES[name])
+        benchmarks.append(Benchmark(
+            f'api_round_trip[{name}]', lambda data=data: upload(data), len(data), 'bytes'
+        ))
+    return benchmarks
+
+def _record(results: dict[str, dict], benchmark: Benchmark, result: Result):
+    results[benchmark.name] = result.__dict__
+    print(
+        f"{benchmark.name:45} {result.seconds * 1000:9.1f}ms "
+        f"{result.throughput / 1000:10.1f} k{benchmark.unit}/s {result.peak_bytes / 1024 / 1024:8.2f}MB peak",
+        flush=True
+    )
+
+def run_benchmarks(
+    profile_names: list[str], repeat: int, only: Optional[str] = None, names: Optional[set[str]] = None,
+    worker_counts: list[int] = []
+) -> dict[str, dict]:
+    """Return the results of every benchmark, or of those matching `only` or in `names`, by name.
+    With `worker_counts`, a large document is also scanned in chunks across that many processes."""
+    pools: dict[int, Executor] = {}
+    benchmarks = [_calibration_benchmark()] + _scan_benchmarks(profile_names) + _normalize_benchmarks(profile_names) + _document_benchmarks(profile_names) + _round_trip_benchmarks(profile_names)
+    if worker_counts: benchmarks += _scaling_benchmarks(worker_counts, pools)
+    results = {}
+    # the round trip should measure parsing, not the result cache
+    with mock.patch.object(server_main, 'result_cache', None):
+        workers.configure_executor('process', 1)
+        try:
+            for benchmark in benchmarks:
+                if benchmark.name != CALIBRATION:
+                    if only and only not in benchmark.name: continue
+                    if names is not None and benchmark.name not in names: continue
+                _record(results, benchmark, _measure(benchmark, repeat))
+            # the machine's speed drifts over a run, and like the other benchmarks the calibration
+            # counts its fastest measurement, taken again at the end
+            calibration = benchmarks[0]
+            result = _measure(calibration, repeat)
+            if result.throughput > results[CALIBRATION]['throughput']: _record(results, calibration, result)
+        finally:
+            workers.shutdown_executor()
+            for pool in pools.values(): pool.shutdown()
+    return results
+
+def find_regressions(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Return a description of every benchmark that got slower or used more memory than the
+    baseline by more than `threshold` (0.25 being 25%).
+
+    Throughput is compared relative to the calibration benchmark, so running on a machine that is
+    slower or busier than the one the baseline was saved on isn't mistaken for a regression.
+    """
+    regressions = []
+    speed = 1.0
+    if CALIBRATION in results and CALIBRATION in baseline:
+        speed = results[CALIBRATION]['throughput'] / baseline[CALIBRATION]['throughput']
+    for name, result in results.items():
+        if name not in baseline or name == CALIBRATION: continue
+        expected = baseline[name]
+        if result['throughput'] < expected['throughput'] * speed / (1 + threshold):
+            regressions.append(
+                f"{name}: throughput {result['throughput']:.0f}/s is below the baseline {expected['throughput']:.0f}/s"
+            )
+        if result['peak_bytes'] > expected['peak_bytes'] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak memory {result['peak_bytes']} bytes is above the baseline {expected['peak_bytes']} bytes"
+            )
+    return regressions
+
+def _default_worker_counts() -> list[int]:
+    """Return 1, 2, 4 and so on up to the number of cores, and the number of cores itself."""
+    cores = os.cpu_count() or 1
+    counts = [ 2 ** power for power in range(cores.bit_length()) ]
+    return counts if counts[-1] == cores else counts + [cores]
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the date extraction on a synthetic corpus.")
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=sorted(PROFILES), help="corpus profiles to benchmark")
+    parser.add_argument('--only', help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs of each benchmark, the fastest one counts")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file to save to or check against")
+    parser.add_argument('--save-baseline', action='store_true', help="save the results as the new baseline")
+    parser.add_argument('--check', action='store_true', help="fail if any result regressed past the threshold")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed regression, 0.25 being 25%%")
+    parser.add_argument(
+        '--workers', type=int, nargs='*', default=_default_worker_counts(),
+        help="worker process counts to scan a large document in chunks with, none to skip it"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.profiles, args.repeat, args.only, worker_counts=args.workers)
+    _print_scaling(results)
+    if args.workers and not args.only: _print_latency_under_load(max(args.workers))
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump({ **baseline, **results }, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            # timings are noisy on shared machines, so a regression only counts if it happens twice
+            regressed = {
+                name for name in results
+                if find_regressions({ CALIBRATION: results[CALIBRATION], name: results[name] }, baseline, args.threshold)
+            }
+            print(f"Measuring {len(regressed)} regressed benchmarks again")
+            results = run_benchmarks(args.profiles, args.repeat, names=regressed, worker_counts=args.workers)
+            regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions: sys.exit(1)
+        print(f"No regressions past {args.threshold:.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -65,6 +65,7 @@ function App() {
     <div className="flex justify-center items-center mb-4">
       <FileUploadMultiple
         onUploadStart={(files) => console.log('Upload started', files)}
+        onUploadProgress={handleUploadDone}
         onUploadDone={handleUploadDone}
         onError={(error) => console.error('Upload error:', error)}
       />
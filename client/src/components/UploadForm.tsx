@@ -4,17 +4,43 @@ import { Button } from './ui/button';
 import type { FileWithPreview } from '@/hooks/use-file-upload';
 import type { FoundDate, FileWithDates } from '@types/found-dates.js';
 
-type ApiResponse = {
-  message: string;
-  data: Record<string, FoundDate[]>;
+// One line of the streamed response, sent as soon as that file has been parsed
+type ApiFileResult = {
+  filename: string;
+  data?: FoundDate[];
+  error?: string;
+  status_code?: number;
 };
 type Props = {
   onUploadStart?: (files: File[]) => void;
+  // Called each time another file's dates arrive, with every file; files still being parsed have no dates yet
+  onUploadProgress?: (files: FileWithDates[]) => void;
   onUploadDone?: (files: FileWithDates[]) => void;
   onError?: (error: Error) => void;
 };
 
-export default function FileUploadMultiple({ onUploadStart, onUploadDone, onError }: Props) {
+// SuperDoc doesn't seem to handle headers and footers, so skip dates found there
+const isInBody = (date: FoundDate) =>
+  !(date.location.includes('header') || date.location.includes('footer'));
+
+// Call `onResult` for each line of a newline-delimited JSON response as it arrives
+async function readJsonLines<T>(response: Response, onResult: (result: T) => void) {
+  if (!response.ok || !response.body) {
+    throw new Error(`Upload failed with status ${response.status}`);
+  }
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += value ?? '';
+    const lines = buffer.split('\n');
+    buffer = done ? '' : lines.pop() ?? '';
+    lines.filter(line => line.trim()).forEach(line => onResult(JSON.parse(line) as T));
+    if (done) return;
+  }
+}
+
+export default function FileUploadMultiple({ onUploadStart, onUploadProgress, onUploadDone, onError }: Props) {
   const [fileList, setFileList] = useState<File[]>([]);
 
   const handleFileChange = (files: FileWithPreview[]) => {
@@ -35,19 +61,25 @@ export default function FileUploadMultiple({ onUploadStart, onUploadDone, onErro
 
     onUploadStart?.(fileList);
 
-    fetch('/api/v1/docx', { method: 'POST', body: data })
-      .then((res) => res.json())
-      .then((data: ApiResponse) => onUploadDone?.(
-        fileList.map(file => ({
-          file,
-          dates: (data.data[file.name] || []).filter(date =>
-            // SuperDoc doesn't seem to handle headers and footers, so skip dates found there
-            (date.location.includes('header') || date.location.includes('footer')) ?
-                false
-              : true
-          )
-        } as FileWithDates))
-      ))
+    // Keep the files in the order they were selected, filling in their dates as they arrive
+    const filesWithDates: FileWithDates[] = fileList.map(file => ({ file, dates: [] }));
+
+    // Anchors let the dates be highlighted in the document without searching its text
+    fetch('/api/v1/docx/stream?anchors=true', { method: 'POST', body: data })
+      .then((res) => readJsonLines<ApiFileResult>(res, (result) => {
+        if (result.error !== undefined) {
+          onError?.(new Error(`${result.filename}: ${result.error}`));
+          return;
+        }
+        const fileIndex = filesWithDates.findIndex(({ file }) => file.name === result.filename);
+        if (fileIndex === -1) return;
+        filesWithDates[fileIndex] = {
+          file: filesWithDates[fileIndex].file,
+          dates: (result.data || []).filter(isInBody),
+        };
+        onUploadProgress?.([ ...filesWithDates ]);
+      }))
+      .then(() => onUploadDone?.(filesWithDates))
       .catch((err) => onError?.(err instanceof Error ? err : new Error('Unknown error')));
   };
 
@@ -5,6 +5,93 @@ import type { HTMLAttributes } from 'react';
 
 const { Attribute } = Extensions;
 
+// The parts of a ProseMirror node that highlighting needs
+type DocumentNode = {
+  type: { name: string };
+  attrs: Record<string, unknown>;
+  isText: boolean;
+  isLeaf: boolean;
+  text?: string | null;
+  forEach: (callback: (child: DocumentNode, offset: number, index: number) => void) => void;
+  descendants: (callback: (node: DocumentNode, pos: number) => boolean | void) => void;
+};
+
+type Highlight = { date: FoundDate; dateIndex: number };
+type AddHighlight = (from: number, to: number, highlight: Highlight) => void;
+
+// Return the index of the occurrence of `search` in `text` closest to `around`, or -1
+function nearestIndexOf(text: string, search: string, around: number) {
+  let nearest = -1;
+  for (let index = text.indexOf(search); index >= 0; index = text.indexOf(search, index + 1)) {
+    if (nearest < 0 || Math.abs(index - around) < Math.abs(nearest - around)) nearest = index;
+  }
+  return nearest;
+}
+
+// Highlight dates in the paragraph at `paragraphPos` by the character offsets of their anchors,
+// walking the paragraph once. Tabs and breaks are leaf nodes in the editor and single characters
+// in the server's text; if other leaf nodes throw the offsets off, the nearest copy of the date's
+// text in the paragraph is highlighted instead.
+function highlightParagraph(paragraph: DocumentNode, paragraphPos: number, highlights: Highlight[], addHighlight: AddHighlight) {
+  let text = '';
+  const positions: number[] = [];
+  paragraph.descendants((node, pos) => {
+    if (node.isText && node.text) {
+      text += node.text;
+      for (let index = 0; index < node.text.length; index++) positions.push(paragraphPos + 1 + pos + index);
+    } else if (node.isLeaf) {
+      text += '\ufffc';
+      positions.push(paragraphPos + 1 + pos);
+    }
+  });
+
+  highlights.forEach((highlight) => {
+    const { found_text, anchor } = highlight.date;
+    if (!anchor || !found_text) return;
+    const start = text.slice(anchor.start, anchor.end) === found_text
+      ? anchor.start
+      : nearestIndexOf(text, found_text, anchor.start);
+    if (start < 0) return;
+    addHighlight(positions[start], positions[start + found_text.length - 1] + 1, highlight);
+  });
+}
+
+// Highlight dates in the cells of the table at `tablePos`. Cells are counted by grid column like
+// the server does, so a cell spanning several columns has the index of its first one, and columns
+// covered by a cell from a row above are skipped.
+function highlightTable(table: DocumentNode, tablePos: number, highlights: Highlight[], addHighlight: AddHighlight) {
+  const byParagraph = new Map<string, Highlight[]>();
+  highlights.forEach((highlight) => {
+    const anchor = highlight.date.anchor;
+    const key = `${anchor?.row}:${anchor?.cell}:${anchor?.paragraph}`;
+    const paragraphHighlights = byParagraph.get(key);
+    if (paragraphHighlights) paragraphHighlights.push(highlight);
+    else byParagraph.set(key, [highlight]);
+  });
+
+  // the last row covered by a cell, by grid column
+  const coveredUntil: number[] = [];
+  table.forEach((row, rowOffset, rowIndex) => {
+    const rowPos = tablePos + 1 + rowOffset;
+    let column = 0;
+    row.forEach((cell, cellOffset) => {
+      while ((coveredUntil[column] ?? -1) >= rowIndex) column++;
+      const colspan = Number(cell.attrs.colspan ?? 1);
+      const rowspan = Number(cell.attrs.rowspan ?? 1);
+      for (let index = 0; index < colspan; index++) coveredUntil[column + index] = rowIndex + rowspan - 1;
+
+      const cellPos = rowPos + 1 + cellOffset;
+      let paragraphIndex = 0;
+      cell.forEach((paragraph, paragraphOffset) => {
+        if (paragraph.type.name !== 'paragraph') return;
+        const paragraphHighlights = byParagraph.get(`${rowIndex}:${column}:${paragraphIndex++}`);
+        if (paragraphHighlights) highlightParagraph(paragraph, cellPos + 1 + paragraphOffset, paragraphHighlights, addHighlight);
+      });
+      column += colspan;
+    });
+  });
+}
+
 export const DateMatchesMarkup: Extension = Extensions.Mark.create({
   name: 'dateMatches',
 
@@ -38,24 +125,39 @@ export const DateMatchesMarkup: Extension = Extensions.Mark.create({
 
   addCommands() {
     return {
+      // Highlight the dates in a single pass over the document, going straight to each date's
+      // paragraph by its anchor instead of searching the whole document for every date
       markupText: (textArray: FoundDate[], selectedIndex: number) => ({ state, dispatch }) => {
         const tr = state.tr;
+        const addHighlight: AddHighlight = (from, to, { date, dateIndex }) => {
+          tr.addMark(from, to, this.type.create({
+            'data-location': date.location,
+            'data-is-selected': selectedIndex === dateIndex,
+          }));
+        };
+
+        // Dates by the body paragraph or table they're in; those in headers and footers have no
+        // block, as the editor doesn't show them
+        const byBlock = new Map<number, Highlight[]>();
+        textArray.forEach((date, dateIndex) => {
+          const block = date.anchor?.block;
+          if (block === undefined) return;
+          const highlights = byBlock.get(block);
+          if (highlights) highlights.push({ date, dateIndex });
+          else byBlock.set(block, [{ date, dateIndex }]);
+        });
 
-        textArray.forEach(({ found_text, context, location }, dateIndex) => {
-          state.doc.descendants((node, pos) => {
-            if (node.isText && node.text.includes(found_text)) {
-              const index = node.text.indexOf(found_text);
-              const from = pos + index;
-              const to = from + found_text.length;
-
-              if (state.doc.textBetween(from - 20, to + 20).includes(context.slice(-15))) {
-                tr.addMark(from, to, this.type.create({
-                  'data-location': location,
-                  'data-is-selected': selectedIndex === dateIndex,
-                }));
-              }
-            }
-          });
+        // The document's paragraphs and tables are the body's, in the same order
+        let blockIndex = 0;
+        (state.doc as DocumentNode).forEach((block, blockPos) => {
+          if (block.type.name !== 'paragraph' && block.type.name !== 'table') return;
+          const highlights = byBlock.get(blockIndex++);
+          if (!highlights) return;
+          if (block.type.name === 'table') {
+            highlightTable(block, blockPos, highlights, addHighlight);
+          } else {
+            highlightParagraph(block, blockPos, highlights, addHighlight);
+          }
         });
 
         if (dispatch) dispatch(tr);
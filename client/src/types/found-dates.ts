@@ -1,3 +1,21 @@
+// Where a found date is, as 0-based indexes: `block` counts the body's paragraphs and tables
+// together, `start` and `end` are character offsets in the paragraph's text, and `run_offset` and
+// `run_end_offset` those in the runs the date starts and ends in. Dates in headers and footers
+// only have `paragraph`, `start` and `end`.
+export type DateAnchor = {
+  block?: number;
+  table?: number;
+  row?: number;
+  cell?: number;
+  paragraph: number;
+  run?: number;
+  run_offset?: number;
+  run_end?: number;
+  run_end_offset?: number;
+  start: number;
+  end: number;
+};
+
 export type FoundDate = {
   type: 'header' | 'footer' | 'run';
   found_date: string;
@@ -5,6 +23,7 @@ export type FoundDate = {
   context: string;
   location: string;
   text: string;
+  anchor?: DateAnchor;
 };
 
 export type FileWithDates = {
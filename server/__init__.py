@@ -1,4 +1,14 @@
-from .main import app
+# The app is imported on first use, so the worker processes, which import `server.workers`, don't
+# also import the FastAPI app, its settings and its databases
+def __getattr__(name: str):
+    if name == 'app':
+        from .main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# `fastapi run server` looks for the app among the module's names
+def __dir__() -> list[str]:
+    return sorted({ *globals(), "app" })
 
 # Not strictly necessary, but it's nice and verbose
 __all__ = ["app"]
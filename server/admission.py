@@ -0,0 +1,109 @@
+import asyncio, zipfile
+from contextlib import asynccontextmanager
+from io import BytesIO
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import metrics
+
+def _reject(status_code: int, reason: str, detail: str, headers: Optional[dict] = None) -> HTTPException:
+    metrics.admission_rejections.inc(reason=reason)
+    return HTTPException(status_code=status_code, detail=detail, headers=headers)
+
+class ParseAdmission:
+    """Limits how many files are parsed at once, queueing the rest.
+
+    When `max_queued` files are already waiting, further files are turned away with a 429 instead
+    of adding to the memory held by the queue.
+    """
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # a semaphore belongs to the event loop it's first used in, and the server runs in one
+        # loop, but every test client starts its own
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def check(self):
+        """Raise a 429 if the queue is full, to turn files away before they're read."""
+        if self.waiting >= self.max_queued and self._get_semaphore().locked():
+            raise _reject(429, 'queue_full', "Too many files are being parsed, try again later", { 'Retry-After': '1' })
+
+    @asynccontextmanager
+    async def slot(self, reject_when_full: bool = True) -> AsyncIterator[None]:
+        """Wait for a free parsing slot for the duration of the block. Without `reject_when_full`,
+        waits even when the queue is full, for work that is already bounded elsewhere."""
+        if reject_when_full: self.check()
+        semaphore = self._get_semaphore()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+def check_file_size(size: Optional[int], max_bytes: int):
+    """Raise a 413 if an uploaded file is larger than allowed, 0 allowing any size."""
+    if max_bytes and size is not None and size > max_bytes:
+        raise _reject(413, 'file_too_large', f"The file is larger than the limit of {max_bytes} bytes")
+
+def check_archive(data: bytes, max_uncompressed_bytes: int, max_compression_ratio: float):
+    """Raise a 413 if a .docx file declares more uncompressed data, or a higher compression ratio,
+    than allowed, before any of it is decompressed.
+
+    Python's zipfile never decompresses more than a member's declared size, so checking the
+    declared sizes is enough. Files that aren't zip archives are left for the parser to reject.
+    """
+    try:
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            uncompressed_bytes = sum(member.file_size for member in archive.infolist())
+    except zipfile.BadZipFile:
+        return
+    if max_uncompressed_bytes and uncompressed_bytes > max_uncompressed_bytes:
+        raise _reject(413, 'archive_too_large', f"The file contains more than {max_uncompressed_bytes} bytes of uncompressed data")
+    if max_compression_ratio and uncompressed_bytes > max_compression_ratio * max(len(data), 1):
+        raise _reject(413, 'compression_ratio', f"The file is compressed more than {max_compression_ratio:g} times")
+
+class RequestSizeLimit:
+    """ASGI middleware that turns away request bodies larger than `max_bytes` with a 413, by their
+    Content-Length, or as they're received when it isn't given."""
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not self.max_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            metrics.admission_rejections.inc(reason='request_too_large')
+            response = JSONResponse({ 'detail': f"The request is larger than the limit of {self.max_bytes} bytes" }, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    raise _reject(413, 'request_too_large', f"The request is larger than the limit of {self.max_bytes} bytes")
+            return message
+
+        await self.app(scope, limited_receive, send)
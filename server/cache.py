@@ -0,0 +1,161 @@
+import os, json, time, hashlib, threading
+from collections import OrderedDict
+from typing import Optional
+
+from .parse_docx import FoundDate, pattern_set_version
+
+def cache_key(data: bytes, *options: str) -> str:
+    """Return the cache key for a file's contents and the options it was parsed with.
+
+    The key includes the version of the date patterns, so changing them invalidates old entries.
+    """
+    digest = hashlib.sha256(data)
+    for option in [pattern_set_version, *options]:
+        digest.update(b'\0' + option.encode())
+    return digest.hexdigest()
+
+class ResultCache:
+    """A cache of found dates with a bounded in-memory LRU and an optional on-disk tier.
+
+    Entries are stored as JSON, both to know their size and so cached results can't be changed
+    by whoever receives them. Entries older than `ttl` seconds are treated as missing; a `ttl` of
+    0 keeps them until they're evicted.
+    """
+    def __init__(
+        self, max_entries: int, max_bytes: int, ttl: int = 0,
+        disk_path: Optional[str] = None, disk_max_bytes: int = 0
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+        self._disk_size = 0
+        # lookups and writes run in threads, so writers take turns trimming the disk tier
+        self._disk_lock = threading.Lock()
+        if disk_path:
+            os.makedirs(disk_path, exist_ok=True)
+            self._disk_size = sum(size for _mtime, size, _path in self._disk_entries())
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    def get(self, key: str) -> Optional[list[FoundDate]]:
+        """Return the cached results for a key, or None if they aren't cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0]):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+        if entry is not None: return json.loads(entry[1])
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, *entry)
+        return json.loads(entry[1])
+
+    def set(self, key: str, found_dates: list[FoundDate]):
+        """Cache the results for a key in memory and, if enabled, on disk."""
+        stored_at = time.time()
+        value = json.dumps(found_dates, separators=(',', ':')).encode()
+        with self._lock:
+            self._store(key, stored_at, value)
+        self._write_disk(key, value)
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters, and how full the in-memory tier is."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Remove every entry from the in-memory tier."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _store(self, key: str, stored_at: float, value: bytes):
+        # entries that could never fit aren't kept in memory
+        if len(value) > self.max_bytes: return
+        if key in self._entries: self._remove(key)
+        self._entries[key] = (stored_at, value)
+        self._size += len(value)
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _stored_at, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path or '', f'{key}.json')
+
+    def _read_disk(self, key: str) -> Optional[tuple[float, bytes]]:
+        if not self.disk_path: return None
+        try:
+            path = self._disk_file(key)
+            stored_at = os.path.getmtime(path)
+            if self._is_expired(stored_at):
+                os.remove(path)
+                return None
+            with open(path, 'rb') as file:
+                return stored_at, file.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, value: bytes):
+        if not self.disk_path: return
+        path = self._disk_file(key)
+        # write to a temporary file first, so a crash never leaves a partial entry behind
+        temporary_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temporary_path, 'wb') as file:
+                file.write(value)
+            os.replace(temporary_path, path)
+            with self._disk_lock:
+                self._disk_size += len(value)
+                if self.disk_max_bytes and self._disk_size > self.disk_max_bytes: self._trim_disk()
+        except OSError as e:
+            print(f"Unable to write cache entry to disk: {e}")
+
+    def _disk_entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        with os.scandir(self.disk_path) as directory:
+            for entry in directory:
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _trim_disk(self):
+        """Remove the oldest entries on disk until the tier is within its size limit."""
+        entries = self._disk_entries()
+        size = sum(entry_size for _mtime, entry_size, _path in entries)
+        for _mtime, entry_size, path in sorted(entries):
+            if size <= self.disk_max_bytes: break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= entry_size
+        self._disk_size = size
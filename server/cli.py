@@ -0,0 +1,188 @@
+"""Find dates in .docx files in bulk, without going through the HTTP API.
+
+    python -m server.cli contracts/ archive.zip 'more/**/*.docx' --output dates.jsonl --resume
+
+Writes one JSON line per document, with either its found dates or its error, in the order the
+documents finish.
+"""
+import os, sys, glob, json, time, zipfile, argparse
+from datetime import date
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import IO, Iterator, Optional
+
+from .workers import create_executor, parse_docx_bytes
+from .parse_docx import DEFAULT_OPTIONS, PARTS, ScanOptions
+from .parse_ooxml import find_dates_in_ooxml
+
+# A document to scan: where it's listed in the output, the file it's in, and its name inside a
+# zip archive when it's an archive member
+Source = tuple[str, str, Optional[str]]
+
+def _iter_sources(inputs: list[str]) -> Iterator[Source]:
+    """Generate every .docx document in the given directories, globs, zip archives and files."""
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            for directory, subdirectories, filenames in os.walk(input_path):
+                subdirectories.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith('.docx'):
+                        path = os.path.join(directory, filename)
+                        yield path, path, None
+        elif input_path.endswith('.zip') and os.path.isfile(input_path):
+            with zipfile.ZipFile(input_path) as archive:
+                members = [ member.filename for member in archive.infolist() if member.filename.endswith('.docx') ]
+            for member in members:
+                yield f'{input_path}!{member}', input_path, member
+        elif os.path.isfile(input_path):
+            yield input_path, input_path, None
+        else:
+            for path in sorted(glob.iglob(input_path, recursive=True)):
+                if os.path.isfile(path) and path.endswith('.docx'):
+                    yield path, path, None
+
+def _scan_source(source: Source, backend: str, options: ScanOptions = DEFAULT_OPTIONS) -> tuple[str, int, dict]:
+    """Return a document's output record and size. This runs in the worker processes."""
+    name, path, member = source
+    try:
+        if member is None:
+            size = os.path.getsize(path)
+            if backend == 'ooxml':
+                found_dates = find_dates_in_ooxml(path, options=options)
+            else:
+                with open(path, 'rb') as file:
+                    found_dates = parse_docx_bytes(file.read(), backend, options=options)
+        else:
+            with zipfile.ZipFile(path) as archive:
+                data = archive.read(member)
+            size = len(data)
+            found_dates = parse_docx_bytes(data, backend, options=options)
+        return name, size, { 'path': name, 'dates': found_dates }
+    except Exception as e:
+        return name, 0, { 'path': name, 'error': str(e) }
+
+def _read_finished(output_path: str) -> set[str]:
+    """Return the documents already written to an output file, dropping a partly written last line."""
+    finished = set()
+    complete_size = 0
+    with open(output_path, 'rb') as output:
+        for line in output:
+            if not line.endswith(b'\n'): break
+            try:
+                finished.add(json.loads(line)['path'])
+            except (ValueError, KeyError):
+                break
+            complete_size += len(line)
+    # anything after the last complete line was cut off by the interruption
+    os.truncate(output_path, complete_size)
+    return finished
+
+class _Progress:
+    """Counts finished documents and periodically reports progress and throughput."""
+    def __init__(self, stream: IO[str], interval: float):
+        self.stream = stream
+        self.interval = interval
+        self.started = self.reported = time.monotonic()
+        self.documents = self.errors = self.skipped = self.bytes = self.dates = 0
+
+    def add(self, size: int, record: dict):
+        self.documents += 1
+        self.bytes += size
+        if 'error' in record:
+            self.errors += 1
+        else:
+            self.dates += len(record['dates'])
+        if self.interval and time.monotonic() - self.reported >= self.interval:
+            self.report()
+
+    def report(self, final: bool = False):
+        self.reported = time.monotonic()
+        elapsed = max(self.reported - self.started, 1e-9)
+        print(
+            f"{'Done: ' if final else ''}{self.documents} documents ({self.errors} errors, "
+            f"{self.skipped} already done), {self.dates} dates, "
+            f"{self.documents / elapsed:.1f} documents/s, {self.bytes / elapsed / 1024 / 1024:.2f} MB/s",
+            file=self.stream, flush=True
+        )
+
+def scan(
+    inputs: list[str], output: IO[str], backend: str = 'ooxml', workers: Optional[int] = None,
+    finished: Optional[set[str]] = None, progress: Optional[_Progress] = None, options: ScanOptions = DEFAULT_OPTIONS
+) -> _Progress:
+    """Scan every document in the inputs across a process pool, writing a JSON line for each.
+
+    Only a bounded number of documents are queued at a time, so memory use doesn't depend on the
+    size of the corpus.
+    """
+    finished = finished or set()
+    progress = progress or _Progress(sys.stderr, 0)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+
+    def write_finished(futures: set[Future]):
+        for future in futures:
+            _name, size, record = future.result()
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            progress.add(size, record)
+
+    executor = create_executor('process', workers)
+    try:
+        in_flight: set[Future] = set()
+        for source in _iter_sources(inputs):
+            if source[0] in finished:
+                progress.skipped += 1
+                continue
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                write_finished(done)
+            in_flight.add(executor.submit(_scan_source, source, backend, options))
+        write_finished(wait(in_flight).done)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return progress
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Find dates in .docx files in bulk.")
+    parser.add_argument('inputs', nargs='+', help="directories, globs, zip archives or .docx files to scan")
+    parser.add_argument('-o', '--output', default='-', help="JSON Lines file to write the results to, defaults to stdout")
+    parser.add_argument('-j', '--workers', type=_positive_int, default=None, help="number of worker processes, defaults to the number of cores")
+    parser.add_argument('--backend', choices=['python-docx', 'ooxml'], default='ooxml', help="extraction backend, defaults to the streaming ooxml backend")
+    parser.add_argument('--list-sections', action='store_true', help="list the sections sharing a header or footer instead of repeating its dates for each")
+    parser.add_argument('--parts', nargs='+', choices=PARTS, default=list(PARTS), help="parts of the documents to scan, defaults to all of them")
+    parser.add_argument('--date-from', type=date.fromisoformat, help="only output dates on or after this YYYY-MM-DD date")
+    parser.add_argument('--date-to', type=date.fromisoformat, help="only output dates on or before this YYYY-MM-DD date")
+    parser.add_argument('--limit', type=_positive_int, help="most dates to output per document")
+    parser.add_argument('--join-runs', action='store_true', help="scan each paragraph's runs together, to find dates split across runs")
+    parser.add_argument('--anchors', action='store_true', help="output where each date is in its document's paragraphs, tables and runs")
+    parser.add_argument('--resume', action='store_true', help="skip documents already in the output file and append to it")
+    parser.add_argument('--progress-interval', type=float, default=5, help="seconds between progress reports on stderr, 0 to disable")
+    args = parser.parse_args(argv)
+
+    if args.resume and args.output == '-':
+        parser.error("--resume needs an --output file")
+
+    options = ScanOptions(
+        list_sections=args.list_sections, parts=frozenset(args.parts),
+        date_from=args.date_from, date_to=args.date_to, limit=args.limit, join_runs=args.join_runs,
+        anchors=args.anchors
+    )
+    finished = set()
+    if args.resume and os.path.exists(args.output):
+        finished = _read_finished(args.output)
+
+    progress = _Progress(sys.stderr, args.progress_interval)
+    if args.output == '-':
+        scan(args.inputs, sys.stdout, args.backend, args.workers, finished, progress, options)
+    else:
+        with open(args.output, 'a' if args.resume else 'w', encoding='utf-8') as output:
+            scan(args.inputs, output, args.backend, args.workers, finished, progress, options)
+    progress.report(final=True)
+
+if __name__ == '__main__':
+    main()
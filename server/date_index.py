@@ -0,0 +1,177 @@
+import os, json, time, sqlite3, threading
+from datetime import date
+from typing import Optional
+
+from .parse_docx import FoundDate, pattern_set_version
+
+# Bumped whenever the tables change; the index is rebuilt from scratch by documents being uploaded
+# again, so older tables are dropped instead of migrated
+SCHEMA_VERSION = 2
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    options TEXT NOT NULL,
+    pattern_set_version TEXT NOT NULL,
+    date_count INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    UNIQUE (hash, filename)
+);
+CREATE INDEX IF NOT EXISTS documents_by_indexed_at ON documents (indexed_at);
+CREATE TABLE IF NOT EXISTS dates (
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    location TEXT NOT NULL,
+    PRIMARY KEY (document_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dates_by_day ON dates (day, document_id);
+'''
+
+class DateIndex:
+    """An index of the dates found in every uploaded document, in a local SQLite database.
+
+    Documents are identified by the hash of their contents and their filename, and a document
+    uploaded again replaces its earlier entry. Dates are indexed by day, so the documents
+    mentioning a range of dates are found without reading any of the others. Only the day and
+    location of each date are kept, none of the document's text.
+
+    Documents indexed more than `ttl` seconds ago are removed, as are the oldest documents past
+    `max_documents`; 0 turns either limit off.
+    """
+    def __init__(self, path: str, ttl: int = 0, max_documents: int = 0):
+        self.path = path
+        self.ttl = ttl
+        self.max_documents = max_documents
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        # one connection shared by the event loop and the threads it hands work to
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA foreign_keys=ON')
+            if self._connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                self._connection.executescript(f'''
+                    DROP TABLE IF EXISTS dates;
+                    DROP TABLE IF EXISTS documents;
+                    PRAGMA user_version = {SCHEMA_VERSION};
+                ''')
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def add(self, document_hash: str, filename: str, options: list[str], found_dates: list[FoundDate]) -> bool:
+        """Index the dates found in a document, replacing those it was indexed with before. Returns
+        False without indexing its dates again if it's already indexed with the same options and
+        version of the date patterns, only counting it as indexed now, so documents that keep being
+        uploaded are the last to expire."""
+        options_key = json.dumps(options)
+        with self._lock:
+            self._expire()
+            indexed = self._connection.execute(
+                'SELECT id, options, pattern_set_version FROM documents WHERE hash = ? AND filename = ?', (document_hash, filename)
+            ).fetchone()
+            if indexed is not None and tuple(indexed[1:]) == (options_key, pattern_set_version):
+                self._connection.execute('UPDATE documents SET indexed_at = ? WHERE id = ?', (time.time(), indexed[0]))
+                return False
+
+            self._connection.execute('BEGIN')
+            try:
+                self._connection.execute('DELETE FROM documents WHERE hash = ? AND filename = ?', (document_hash, filename))
+                document_id = self._connection.execute(
+                    '''INSERT INTO documents (hash, filename, options, pattern_set_version, date_count, indexed_at)
+                    VALUES (?, ?, ?, ?, ?, ?) RETURNING id''',
+                    (document_hash, filename, options_key, pattern_set_version, len(found_dates), time.time())
+                ).fetchone()[0]
+                self._connection.executemany(
+                    'INSERT INTO dates (document_id, position, day, location) VALUES (?, ?, ?, ?)',
+                    [
+                        # found dates are ISO dates and times, so their first ten characters are the day
+                        (document_id, position, found_date['found_date'][:10], found_date['location'])
+                        for position, found_date in enumerate(found_dates)
+                    ]
+                )
+                if self.max_documents:
+                    self._connection.execute(
+                        'DELETE FROM documents WHERE id IN (SELECT id FROM documents ORDER BY indexed_at DESC, id DESC LIMIT -1 OFFSET ?)',
+                        (self.max_documents,)
+                    )
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+        return True
+
+    def _expire(self):
+        if self.ttl:
+            self._connection.execute('DELETE FROM documents WHERE indexed_at < ?', (time.time() - self.ttl,))
+
+    def find_documents(
+        self, date_from: Optional[date] = None, date_to: Optional[date] = None, limit: int = 100, offset: int = 0
+    ) -> list[dict]:
+        """Return the documents mentioning dates in the given range, with how many dates in the range
+        each mentions and the first and last of them, ordered by their first date in the range."""
+        with self._lock:
+            self._expire()
+            rows = self._connection.execute(
+                '''SELECT documents.hash, documents.filename, matches.dates, matches.first_date, matches.last_date
+                FROM (
+                    SELECT document_id, COUNT(*) AS dates, MIN(day) AS first_date, MAX(day) AS last_date
+                    FROM dates WHERE day >= ? AND day <= ? GROUP BY document_id
+                ) AS matches
+                JOIN documents ON documents.id = matches.document_id
+                ORDER BY matches.first_date, documents.filename, documents.hash
+                LIMIT ? OFFSET ?''',
+                (
+                    date_from.isoformat() if date_from is not None else '',
+                    date_to.isoformat() if date_to is not None else '9999-12-31',
+                    limit, offset
+                )
+            ).fetchall()
+        return [ dict(row) for row in rows ]
+
+    def get_document(self, document_hash: str, filename: Optional[str] = None) -> list[dict]:
+        """Return every indexed document with the given hash, or only the one with the given filename,
+        along with the day and location of all of its dates in the order they were found."""
+        with self._lock:
+            self._expire()
+            documents = self._connection.execute(
+                '''SELECT id, hash, filename, options, indexed_at FROM documents
+                WHERE hash = ? AND (? IS NULL OR filename = ?) ORDER BY filename''',
+                (document_hash, filename, filename)
+            ).fetchall()
+            results = []
+            for document in documents:
+                dates = self._connection.execute(
+                    'SELECT day, location FROM dates WHERE document_id = ? ORDER BY position', (document['id'],)
+                ).fetchall()
+                results.append({
+                    'hash': document['hash'],
+                    'filename': document['filename'],
+                    'options': json.loads(document['options']),
+                    'indexed_at': document['indexed_at'],
+                    'dates': [ dict(row) for row in dates ],
+                })
+        return results
+
+    def delete(self, document_hash: str, filename: Optional[str] = None) -> int:
+        """Remove every indexed document with the given hash, or only the one with the given filename,
+        returning how many were removed."""
+        with self._lock:
+            return self._connection.execute(
+                'DELETE FROM documents WHERE hash = ? AND (? IS NULL OR filename = ?)', (document_hash, filename, filename)
+            ).rowcount
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of indexed documents and dates."""
+        with self._lock:
+            self._expire()
+            documents, dates = self._connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(date_count), 0) FROM documents'
+            ).fetchone()
+        return { 'documents': documents, 'dates': dates }
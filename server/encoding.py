@@ -0,0 +1,88 @@
+import json
+from typing import Any, Optional
+
+from .parse_docx import FoundDate
+
+# Faster serializers, used when they're installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = 'application/json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+MSGPACK_MEDIA_TYPES = [ MSGPACK_MEDIA_TYPE, 'application/x-msgpack', 'application/vnd.msgpack' ]
+
+def compact_found_dates(found_dates: list[FoundDate]) -> dict:
+    """Return found dates in the compact format.
+
+    Each source text is stored once in `texts`, and the dates are stored as columns of equal
+    length instead of one object per date: `text` holds an index into `texts`, and the context of
+    a date is `texts[text][context_start:context_end]`. A `sections` column is only included when
+    dates list the sections sharing a header or footer, and an `anchor` column when dates have anchors.
+    """
+    texts: list[str] = []
+    text_indexes: dict[str, int] = {}
+    columns: dict[str, list] = {
+        'found_date': [], 'found_text': [], 'type': [], 'location': [],
+        'text': [], 'context_start': [], 'context_end': [],
+    }
+    has_sections = any('sections' in found_date for found_date in found_dates)
+    if has_sections: columns['sections'] = []
+    has_anchors = any('anchor' in found_date for found_date in found_dates)
+    if has_anchors: columns['anchor'] = []
+
+    for found_date in found_dates:
+        text = found_date['text']
+        if text not in text_indexes:
+            text_indexes[text] = len(texts)
+            texts.append(text)
+        context_start = text.find(found_date['context'])
+        columns['found_date'].append(found_date['found_date'])
+        columns['found_text'].append(found_date['found_text'])
+        columns['type'].append(found_date['type'])
+        columns['location'].append(found_date['location'])
+        columns['text'].append(text_indexes[text])
+        columns['context_start'].append(context_start)
+        columns['context_end'].append(context_start + len(found_date['context']))
+        if has_sections: columns['sections'].append(found_date.get('sections'))
+        if has_anchors: columns['anchor'].append(found_date.get('anchor'))
+
+    return { 'texts': texts, 'dates': columns }
+
+def negotiate_media_type(accept: Optional[str]) -> Optional[str]:
+    """Return the media type to send a response as for the given Accept header, or None if none of
+    the accepted types can be sent."""
+    if not accept: return JSON_MEDIA_TYPE
+
+    accepted = []
+    for position, media_range in enumerate(accept.split(',')):
+        media_type, *parameters = [ part.strip() for part in media_range.split(';') ]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0: accepted.append((-quality, position, media_type.lower()))
+
+    for _quality, _position, media_type in sorted(accepted):
+        if media_type in MSGPACK_MEDIA_TYPES and msgpack is not None:
+            return MSGPACK_MEDIA_TYPE
+        if media_type in [ JSON_MEDIA_TYPE, 'application/*', '*/*' ]:
+            return JSON_MEDIA_TYPE
+    return None
+
+def encode(content: Any, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Return the given content encoded as the given media type."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(content)
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode()
@@ -1,4 +1,4 @@
-from environs import Env
+from environs import Env, validate
 
 env = Env()
 env.read_env()
@@ -16,3 +16,74 @@ allowed_headers = env.list(
     subcast=str,
     default=[ "Access-Control-Allow-Origin", "Content-Type" ]
 )
+# Which extraction backend parses uploads: "python-docx" builds the python-docx object model,
+# "ooxml" streams the XML parts of the file directly
+parser_backend = env.str(
+    "SERVER_PARSER_BACKEND",
+    default="python-docx",
+    validate=validate.OneOf([ "python-docx", "ooxml" ])
+)
+# The pool that parses uploads off the event loop: "process" runs parsing in parallel across
+# cores, "thread" avoids the cost of sending uploads to other processes
+worker_pool_type = env.str(
+    "SERVER_WORKER_POOL_TYPE",
+    default="process",
+    validate=validate.OneOf([ "process", "thread" ])
+)
+# How many uploads are parsed at once, defaults to the number of cores
+worker_pool_size = env.int("SERVER_WORKER_POOL_SIZE", default=None)
+# Files at least this many bytes are split into chunks scanned across the worker processes, instead
+# of each being parsed by a single one, 0 turns it off; only with a process pool
+parallel_scan_min_bytes = env.int("SERVER_PARALLEL_SCAN_MIN_BYTES", default=4 * 1024 * 1024, validate=validate.Range(min=0))
+# How many characters of text each of those chunks holds
+parallel_scan_chunk_chars = env.int("SERVER_PARALLEL_SCAN_CHUNK_CHARS", default=256 * 1024, validate=validate.Range(min=1))
+# Cache of found dates by upload contents, so re-uploaded files aren't parsed again
+cache_enabled = env.bool("SERVER_CACHE_ENABLED", default=True)
+cache_max_entries = env.int("SERVER_CACHE_MAX_ENTRIES", default=256)
+cache_max_bytes = env.int("SERVER_CACHE_MAX_BYTES", default=64 * 1024 * 1024)
+# How many seconds a cached result is kept, 0 keeps it until it's evicted
+cache_ttl = env.int("SERVER_CACHE_TTL", default=7 * 24 * 60 * 60)
+# A directory for a cache tier that survives restarts, disabled when not set
+cache_dir = env.str("SERVER_CACHE_DIR", default=None)
+cache_disk_max_bytes = env.int("SERVER_CACHE_DISK_MAX_BYTES", default=1024 * 1024 * 1024)
+# What each document uploaded with a lineage ID left to reuse for its next revision, so a revised
+# document only has its changed parts scanned again
+lineage_enabled = env.bool("SERVER_LINEAGE_ENABLED", default=True)
+lineage_max_entries = env.int("SERVER_LINEAGE_MAX_ENTRIES", default=1024)
+lineage_max_bytes = env.int("SERVER_LINEAGE_MAX_BYTES", default=256 * 1024 * 1024)
+# How many seconds a document's last revision is remembered, 0 keeps it until it's evicted
+lineage_ttl = env.int("SERVER_LINEAGE_TTL", default=30 * 24 * 60 * 60)
+# A directory for remembered revisions that survive restarts, disabled when not set
+lineage_dir = env.str("SERVER_LINEAGE_DIR", default=None)
+lineage_disk_max_bytes = env.int("SERVER_LINEAGE_DISK_MAX_BYTES", default=1024 * 1024 * 1024)
+# The SQLite database of the job queue for asynchronous uploads, disabled when not set; queued
+# jobs survive restarts, so it belongs in a data directory only this server uses
+jobs_db_path = env.str("SERVER_JOBS_DB_PATH", default="")
+# How many jobs are parsed at once, on top of the synchronous uploads
+jobs_concurrency = env.int("SERVER_JOBS_CONCURRENCY", default=2, validate=validate.Range(min=1))
+# How many times a job is tried when it fails for a reason other than the file itself
+jobs_max_attempts = env.int("SERVER_JOBS_MAX_ATTEMPTS", default=3, validate=validate.Range(min=1))
+# Seconds before a failed job is first tried again, doubling with every attempt
+jobs_retry_delay = env.float("SERVER_JOBS_RETRY_DELAY", default=5)
+# How many seconds the results of finished jobs are kept
+jobs_result_ttl = env.int("SERVER_JOBS_RESULT_TTL", default=24 * 60 * 60)
+# The SQLite database indexing the day and location of the dates found in every uploaded document,
+# for querying them without uploading the documents again, disabled when not set
+index_db_path = env.str("SERVER_INDEX_DB_PATH", default="")
+# How many seconds a document stays in the index, and how many documents it keeps at most, dropping
+# the oldest first; 0 for no limit
+index_ttl = env.int("SERVER_INDEX_TTL", default=30 * 24 * 60 * 60, validate=validate.Range(min=0))
+index_max_documents = env.int("SERVER_INDEX_MAX_DOCUMENTS", default=100_000, validate=validate.Range(min=0))
+# Upload limits in bytes, 0 for no limit: the size of each file, and of a whole request
+max_file_bytes = env.int("SERVER_MAX_FILE_BYTES", default=50 * 1024 * 1024)
+max_request_bytes = env.int("SERVER_MAX_REQUEST_BYTES", default=200 * 1024 * 1024)
+# How many files are parsed at once across all requests, defaults to the worker pool size, and how
+# many more can wait for their turn before uploads are turned away with a 429
+max_concurrent_parses = env.int("SERVER_MAX_CONCURRENT_PARSES", default=None, validate=validate.Range(min=1))
+max_queued_parses = env.int("SERVER_MAX_QUEUED_PARSES", default=64, validate=validate.Range(min=0))
+# Limits on what a .docx file declares it decompresses to, 0 for no limit: the total size of its
+# parts, and how many times smaller the file is than that
+max_uncompressed_bytes = env.int("SERVER_MAX_UNCOMPRESSED_BYTES", default=512 * 1024 * 1024)
+max_compression_ratio = env.float("SERVER_MAX_COMPRESSION_RATIO", default=100)
+# Uploads larger than this are spooled to a temporary file on disk instead of kept in memory
+spool_max_bytes = env.int("SERVER_SPOOL_MAX_BYTES", default=1024 * 1024)
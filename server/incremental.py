@@ -0,0 +1,77 @@
+import hashlib
+from typing import Any, Iterable, Optional
+
+from .parse_docx import FoundDate, ScanOptions, pattern_set_version
+
+class IncrementalScan:
+    """What a scan of a revised document can reuse from the scan of its previous revision, and what
+    the next revision will be able to reuse from this one.
+
+    Header and footer parts are reused when their zip CRC hasn't changed, and the whole body when
+    the document part's hasn't. In a changed body, paragraphs whose run texts haven't changed are
+    reused. Everything is stored as JSON-compatible values, so it can be kept between uploads.
+    """
+    def __init__(self, options: ScanOptions, previous: Optional[dict[str, Any]] = None):
+        self.options_key = options.cache_options()
+        # results found with other patterns or options can't be reused
+        if not previous or previous.get('version') != pattern_set_version or previous.get('options') != self.options_key:
+            previous = {}
+        self.previous = previous
+        self.document: Optional[dict[str, Any]] = None
+        self.header_footers: dict[str, list] = {}
+        self.paragraphs: dict[str, list] = {}
+
+    @property
+    def has_previous(self) -> bool:
+        return bool(self.previous)
+
+    def known_document(self, part_name: str, crc: int) -> Optional[dict[str, Any]]:
+        """Return the sections and body dates of the document part, if it hasn't changed."""
+        document = self.previous.get('document')
+        if document is not None and document['part'] == part_name and document['crc'] == crc:
+            return document
+        return None
+
+    def set_document(
+        self, part_name: str, crc: int, sections: list[dict],
+        paragraph_dates: list[FoundDate], table_dates: list[FoundDate]
+    ):
+        self.document = {
+            'part': part_name, 'crc': crc, 'sections': sections,
+            'paragraph_dates': paragraph_dates, 'table_dates': table_dates,
+        }
+
+    def keep_document(self, document: dict[str, Any]):
+        """Carry the previous revision's body over to the next, when it hasn't changed."""
+        self.document = document
+        self.paragraphs = dict(self.previous.get('paragraphs', {}))
+
+    def known_header_footer(self, part_name: str, crc: int, label: str) -> Optional[list]:
+        """Return the dates of a header or footer part by paragraph index, if it hasn't changed."""
+        return self.previous.get('header_footers', {}).get(f'{part_name}|{crc}|{label}')
+
+    def set_header_footer(self, part_name: str, crc: int, label: str, part_dates: Iterable[tuple[int, FoundDate]]):
+        self.header_footers[f'{part_name}|{crc}|{label}'] = [ [paragraph_index, found_date] for paragraph_index, found_date in part_dates ]
+
+    @staticmethod
+    def paragraph_key(run_texts: list[str]) -> str:
+        # XML text can't contain NUL characters, so joining the runs on them is unambiguous
+        return hashlib.blake2b('\0'.join(run_texts).encode(), digest_size=12).hexdigest()
+
+    def known_paragraph(self, key: str) -> Optional[list[FoundDate]]:
+        """Return the dates of a body paragraph with the same run texts, if there was one."""
+        known = self.paragraphs.get(key)
+        return known if known is not None else self.previous.get('paragraphs', {}).get(key)
+
+    def set_paragraph(self, key: str, found_dates: list[FoundDate]):
+        self.paragraphs[key] = found_dates
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return what the next revision of the document can reuse."""
+        return {
+            'version': pattern_set_version,
+            'options': self.options_key,
+            'document': self.document,
+            'header_footers': self.header_footers,
+            'paragraphs': self.paragraphs,
+        }
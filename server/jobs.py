@@ -0,0 +1,230 @@
+import os, json, time, uuid, sqlite3, asyncio, threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Optional
+
+from .parse_docx import FoundDate
+
+# queued -> running -> done, or back to queued after a transient failure, or failed
+JOB_STATUSES = [ 'queued', 'running', 'done', 'failed' ]
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    options TEXT NOT NULL,
+    data BLOB,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, available_at, created_at);
+CREATE INDEX IF NOT EXISTS jobs_expiry ON jobs (expires_at);
+'''
+
+def is_transient(error: BaseException) -> bool:
+    """Return whether a failed job is worth trying again, as opposed to a file that can't be parsed."""
+    return isinstance(error, (BrokenProcessPool, MemoryError, TimeoutError, ConnectionError))
+
+class JobQueue:
+    """A durable queue of parsing jobs in a local SQLite database.
+
+    Uploads are stored with their jobs until the job finishes, and results are kept until they
+    expire. Jobs that were running when the server stopped are queued again when it starts.
+    """
+    def __init__(self, path: str, max_attempts: int = 3, retry_delay: float = 5, result_ttl: float = 24 * 60 * 60):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.result_ttl = result_ttl
+        directory = os.path.dirname(path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        # one connection shared by the event loop and the threads it hands work to
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def submit(self, data: bytes, filename: Optional[str], options: dict) -> str:
+        """Store an upload as a new queued job and return the job's ID."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                'INSERT INTO jobs (id, status, filename, options, data, created_at, available_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, 'queued', filename, json.dumps(options), data, now, now)
+            )
+        return job_id
+
+    def recover(self) -> int:
+        """Queue the jobs that were running when the server last stopped again, returning how many."""
+        with self._lock:
+            return self._connection.execute(
+                "UPDATE jobs SET status = 'queued', available_at = ? WHERE status = 'running'", (time.time(),)
+            ).rowcount
+
+    def claim(self) -> Optional[sqlite3.Row]:
+        """Mark the oldest job that is ready to run as running and return it, or None if there is none."""
+        now = time.time()
+        with self._lock:
+            return self._connection.execute(
+                '''UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ?
+                    ORDER BY available_at, created_at LIMIT 1
+                )
+                RETURNING id, filename, options, data, attempts''',
+                (now, now)
+            ).fetchone()
+
+    def next_available_at(self) -> Optional[float]:
+        """Return when the next queued job is ready to run, if any job is queued."""
+        with self._lock:
+            row = self._connection.execute("SELECT MIN(available_at) FROM jobs WHERE status = 'queued'").fetchone()
+        return row[0]
+
+    def complete(self, job_id: str, found_dates: list[FoundDate]):
+        """Store a job's result and drop its upload."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = 'done', result = ?, data = NULL, error = NULL, finished_at = ?, expires_at = ? WHERE id = ?",
+                (json.dumps(found_dates), now, now + self.result_ttl, job_id)
+            )
+
+    def fail(self, job_id: str, error: str, transient: bool = False) -> str:
+        """Record a job's failure, queueing it to run again later if the failure was transient and it
+        has attempts left. Returns the job's new status."""
+        now = time.time()
+        with self._lock:
+            attempts = self._connection.execute('SELECT attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if attempts is None: return 'failed'
+            if transient and attempts[0] < self.max_attempts:
+                # wait longer after every attempt
+                self._connection.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, available_at = ? WHERE id = ?",
+                    (error, now + self.retry_delay * 2 ** (attempts[0] - 1), job_id)
+                )
+                return 'queued'
+            self._connection.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, data = NULL, finished_at = ?, expires_at = ? WHERE id = ?",
+                (error, now, now + self.result_ttl, job_id)
+            )
+            return 'failed'
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a job's status, or None if there's no such job or it has expired."""
+        with self._lock:
+            row = self._connection.execute(
+                '''SELECT id, status, filename, error, attempts, created_at, started_at, finished_at, expires_at
+                FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)''',
+                (job_id, time.time())
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def result(self, job_id: str) -> Optional[list[FoundDate]]:
+        """Return the found dates of a finished job, or None if it hasn't finished."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = 'done' AND expires_at > ?", (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def delete(self, job_id: str) -> bool:
+        """Remove a job that isn't running, returning whether there was one to remove."""
+        with self._lock:
+            return self._connection.execute(
+                "DELETE FROM jobs WHERE id = ? AND status != 'running'", (job_id,)
+            ).rowcount > 0
+
+    def expire(self) -> int:
+        """Remove the jobs whose results have expired, returning how many were removed."""
+        with self._lock:
+            return self._connection.execute(
+                'DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),)
+            ).rowcount
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of jobs with each status."""
+        counts = { status: 0 for status in JOB_STATUSES }
+        with self._lock:
+            for status, count in self._connection.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status'):
+                counts[status] = count
+        return counts
+
+class JobRunner:
+    """Runs queued jobs in the background, with at most `concurrency` jobs running at a time.
+
+    `process` does the actual work, taking a job's upload, filename and options and returning its
+    found dates.
+    """
+    def __init__(
+        self, queue: JobQueue, process: Callable[[bytes, Optional[str], dict], Awaitable[list[FoundDate]]],
+        concurrency: int = 2, poll_interval: float = 5
+    ):
+        self.queue = queue
+        self.process = process
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._wake_up = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        self.queue.recover()
+        self._tasks = [ asyncio.create_task(self._work()) for _ in range(self.concurrency) ]
+        self._tasks.append(asyncio.create_task(self._expire()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Let the workers know a job was submitted."""
+        self._wake_up.set()
+
+    async def _work(self):
+        while True:
+            # cleared before looking for a job, so a job submitted after that still wakes this worker
+            self._wake_up.clear()
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                await self._wait_for_jobs()
+                continue
+            try:
+                found_dates = await self.process(job['data'], job['filename'], json.loads(job['options']))
+            except asyncio.CancelledError:
+                # stopped while running, the job runs again on the next start
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self.queue.fail, job['id'], str(e) or type(e).__name__, is_transient(e))
+                continue
+            await asyncio.to_thread(self.queue.complete, job['id'], found_dates)
+
+    async def _wait_for_jobs(self):
+        # sleep until a job is submitted, a retried job is due, or the poll interval passes
+        timeout = self.poll_interval
+        next_available_at = await asyncio.to_thread(self.queue.next_available_at)
+        if next_available_at is not None:
+            timeout = min(timeout, max(0.0, next_available_at - time.time()))
+        try:
+            await asyncio.wait_for(self._wake_up.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _expire(self):
+        while True:
+            await asyncio.to_thread(self.queue.expire)
+            await asyncio.sleep(max(self.poll_interval, 60))
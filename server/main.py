@@ -1,15 +1,84 @@
-import os
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import io, os, time, asyncio, hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import date
+from typing import Annotated, Literal, Optional
+from fastapi import Depends, FastAPI, File, UploadFile, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from docx import Document
+from starlette.formparsers import MultiPartParser
 
-from .parse_docx import find_dates_in_docx
+from .workers import (
+    discard_executor, get_executor, parse_docx_bytes_in_chunks, parse_docx_bytes_incremental, parse_docx_bytes_with_stats,
+    shutdown_executor
+)
+from . import metrics
+from .metrics import ParseStats
+from .parse_docx import PARTS, ScanOptions
+from .cache import ResultCache, cache_key
+from . import encoding
+from .jobs import JobQueue, JobRunner
+from .date_index import DateIndex
+from .admission import ParseAdmission, RequestSizeLimit, check_archive, check_file_size
 
 from .env import allowed_origins
 from .env import allowed_headers
+from .env import parser_backend
+from .env import worker_pool_size
+from .env import parallel_scan_min_bytes, parallel_scan_chunk_chars
+from .env import cache_enabled, cache_max_entries, cache_max_bytes, cache_ttl
+from .env import cache_dir, cache_disk_max_bytes
+from .env import lineage_enabled, lineage_max_entries, lineage_max_bytes, lineage_ttl, lineage_dir, lineage_disk_max_bytes
+from .env import jobs_db_path, jobs_concurrency, jobs_max_attempts, jobs_retry_delay, jobs_result_ttl
+from .env import index_db_path, index_ttl, index_max_documents
+from .env import max_file_bytes, max_request_bytes, max_concurrent_parses, max_queued_parses
+from .env import max_uncompressed_bytes, max_compression_ratio, spool_max_bytes
+
+# Uploads are spooled to disk past this size while the request is being received
+MultiPartParser.spool_max_size = spool_max_bytes
+
+job_queue: Optional[JobQueue] = None
+job_runner: Optional[JobRunner] = None
+date_index: Optional[DateIndex] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global job_queue, job_runner, date_index
+    if index_db_path:
+        date_index = DateIndex(index_db_path, index_ttl, index_max_documents)
+    if jobs_db_path:
+        job_queue = JobQueue(jobs_db_path, jobs_max_attempts, jobs_retry_delay, jobs_result_ttl)
+        job_runner = JobRunner(job_queue, _run_job, jobs_concurrency)
+        job_runner.start()
+    yield
+    if job_runner is not None: await job_runner.stop()
+    if job_queue is not None: job_queue.close()
+    if date_index is not None: date_index.close()
+    job_queue = job_runner = date_index = None
+    shutdown_executor()
+
+result_cache = ResultCache(
+    max_entries=cache_max_entries, max_bytes=cache_max_bytes, ttl=cache_ttl,
+    disk_path=cache_dir, disk_max_bytes=cache_disk_max_bytes
+) if cache_enabled else None
 
-app = FastAPI()
+# The last revision of each document uploaded with a lineage ID, by lineage ID and filename
+lineage_store = ResultCache(
+    max_entries=lineage_max_entries, max_bytes=lineage_max_bytes, ttl=lineage_ttl,
+    disk_path=lineage_dir, disk_max_bytes=lineage_disk_max_bytes
+) if lineage_enabled else None
+
+# How many chunks of a large file are sent to the worker pool at a time, one per worker, so the
+# uploads waiting behind it don't also wait for the rest of its chunks
+parallel_scan_max_in_flight = worker_pool_size or os.cpu_count() or 1
+
+parse_admission = ParseAdmission(max_concurrent_parses or worker_pool_size or os.cpu_count() or 1, max_queued_parses)
+
+app = FastAPI(lifespan=lifespan)
+# The middleware added last runs first, so the CORS headers are added to the size limit's 413s too
+app.add_middleware(RequestSizeLimit, max_bytes=max_request_bytes)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -18,36 +87,469 @@ app.add_middleware(
     allow_methods=["*"],
 )
 
+def _validate_file(file: UploadFile):
+    if not file.filename or not file.filename.endswith('.docx'):
+        raise HTTPException(status_code=400, detail="Only .docx files are allowed")
+
+    if file.content_type != 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+        raise HTTPException(status_code=400, detail="Invalid file type. Only .docx files are allowed")
+
+    check_file_size(file.size, max_file_bytes)
+
+def _cached_result(data: bytes, options: ScanOptions) -> tuple[str, Optional[list]]:
+    """Return a file's cache key and its cached results, if any.
+
+    Hashing a large file and reading its results from disk take a while, so this runs in a thread.
+    """
+    key = cache_key(data, *options.cache_options())
+    return key, result_cache.get(key) if result_cache is not None else None
+
+def _index_dates(index: DateIndex, data: bytes, filename: str, options: ScanOptions, found_dates: list):
+    index.add(hashlib.sha256(data).hexdigest(), filename, options.cache_options(), found_dates)
+
+async def _parse_in_executor(
+    executor: Executor, data: bytes, backend: str, options: ScanOptions, incremental: bool, previous: Optional[dict]
+):
+    """Parse a file's contents in the given worker pool, returning the found dates, the worker's
+    stats and, when parsing `incremental`ly from the `previous` revision, what the next one can reuse."""
+    loop = asyncio.get_running_loop()
+    if incremental:
+        return await loop.run_in_executor(executor, parse_docx_bytes_incremental, data, options, previous)
+    if (
+        parallel_scan_min_bytes and len(data) >= parallel_scan_min_bytes and options.limit is None
+        and isinstance(executor, ProcessPoolExecutor)
+    ):
+        found_dates, worker_stats = await asyncio.to_thread(
+            parse_docx_bytes_in_chunks, data, executor, options, parallel_scan_chunk_chars, parallel_scan_max_in_flight
+        )
+    else:
+        found_dates, worker_stats = await loop.run_in_executor(executor, parse_docx_bytes_with_stats, data, backend, options)
+    return found_dates, worker_stats, None
+
+async def _parse_data(
+    data: bytes, backend: str, stats: ParseStats, options: ScanOptions = ScanOptions(),
+    lineage: Optional[str] = None, filename: Optional[str] = None
+):
+    """Parse a file's contents in the worker pool, leaving the event loop free for other requests.
+
+    Returns the found dates and whether they came from the result cache ("hit") or not ("miss"),
+    and adds the time spent on each stage to `stats`. Callers hold a parsing slot of
+    `parse_admission` for the duration, taken before the file is read into memory.
+
+    With a `lineage` ID, a file is taken to be a revision of the file uploaded with the same ID and
+    filename before, and only the parts that changed since are scanned; its status is then
+    "incremental" if anything could be reused. Files with a filename have all of their dates added
+    to the date index, unless the options only look for some of them.
+
+    Files of at least `parallel_scan_min_bytes` are split into chunks in a worker process and the
+    chunks are scanned across the pool, as many at a time as there are workers, unless
+    they're scanned incrementally or for a limited number of dates; the results are the same
+    either way.
+
+    A worker process dying, killed for running out of memory for instance, breaks the whole pool,
+    and the parses running in it: the pool is then replaced, and the file parsed once more.
+    """
+    metrics.bytes_in.inc(len(data))
+    metrics.upload_bytes.observe(len(data))
+    check_archive(data, max_uncompressed_bytes, max_compression_ratio)
+    try:
+        # both backends give the same results, so they share cache entries
+        with stats.stage('cache_lookup'):
+            key, found_dates = await asyncio.to_thread(_cached_result, data, options)
+        if found_dates is not None:
+            status = 'hit'
+        else:
+            status = 'miss'
+            lineage_key = previous = None
+            if lineage is not None and lineage_store is not None:
+                lineage_key = cache_key(lineage.encode(), filename or '', *options.cache_options())
+                with stats.stage('lineage_lookup'):
+                    previous = await asyncio.to_thread(lineage_store.get, lineage_key)
+            with stats.stage('parse'):
+                for attempt in range(2):
+                    executor = get_executor()
+                    try:
+                        found_dates, worker_stats, state = await _parse_in_executor(
+                            executor, data, backend, options, lineage_key is not None, previous
+                        )
+                        break
+                    except BrokenProcessPool:
+                        discard_executor(executor)
+                        if attempt: raise
+            stats.merge(worker_stats)
+            if lineage_key is not None:
+                await asyncio.to_thread(lineage_store.set, lineage_key, state)
+                if worker_stats.parts_reused or worker_stats.paragraphs_reused: status = 'incremental'
+            if result_cache is not None: await asyncio.to_thread(result_cache.set, key, found_dates)
+    except Exception:
+        metrics.parse_errors.inc()
+        raise
+    if date_index is not None and filename is not None and options.is_complete():
+        with stats.stage('index'):
+            await asyncio.to_thread(_index_dates, date_index, data, filename, options, found_dates)
+    metrics.files_parsed.inc(backend=backend, cache=status)
+    metrics.record_parse(stats)
+    return found_dates, status
+
+async def _read_and_parse_file(
+    file: UploadFile, backend: str, stats: ParseStats, options: ScanOptions = ScanOptions(), lineage: Optional[str] = None
+):
+    """Wait for a parsing slot, then read and parse an uploaded file, returning its found dates and
+    cache status.
+
+    Files waiting for a slot aren't read yet, so large uploads stay spooled to disk until their turn
+    instead of all being held in memory while they wait.
+    """
+    try:
+        async with AsyncExitStack() as stack:
+            with stats.stage('wait_for_slot'):
+                await stack.enter_async_context(parse_admission.slot())
+            with stats.stage('read_upload'):
+                data = await file.read()
+            print(f"Received file: {file.filename}, size: {len(data)} bytes")
+            return await _parse_data(data, backend, stats, options, lineage=lineage, filename=file.filename)
+    finally:
+        await file.close()
+
+async def _parse_file(
+    file: UploadFile, backend: str, stats: ParseStats, options: ScanOptions = ScanOptions(), lineage: Optional[str] = None
+):
+    """Parse an uploaded file, returning its found dates and cache status."""
+    try:
+        return await _read_and_parse_file(file, backend, stats, options, lineage)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading file: {str(e)}")
+
+def _scan_options(
+    list_sections: bool = False,
+    parts: Annotated[Optional[list[Literal['header', 'footer', 'runs', 'tables']]], Query()] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Annotated[Optional[int], Query(ge=1)] = None,
+    join_runs: bool = False,
+    anchors: bool = False
+) -> ScanOptions:
+    """The query parameters choosing what to scan a file for: the parts of the document to scan
+    (any of "header", "footer", "runs" and "tables", defaulting to all of them), the range of dates
+    to return, and the most dates to return per file. With `join_runs`, the runs of each paragraph
+    are scanned together, finding dates split across runs. With `anchors`, each date has the anchor
+    of where it is in the document, for highlighting it without searching the document's text."""
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    return ScanOptions(
+        list_sections=list_sections,
+        parts=frozenset(parts or PARTS),
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+        join_runs=join_runs,
+        anchors=anchors
+    )
+
 @app.post("/api/v1/docx")
-async def parse_docx_files(files: list[UploadFile]):
-    output_data = {}
+async def parse_docx_files(
+    request: Request,
+    files: list[UploadFile],
+    backend: Optional[Literal['python-docx', 'ooxml']] = None,
+    timings: bool = False,
+    compact: bool = False,
+    lineage: Annotated[Optional[str], Query(min_length=1, max_length=256)] = None,
+    options: ScanOptions = Depends(_scan_options)
+):
+    """Return the dates found in each file. With `timings`, the response also has the time spent on
+    each stage of parsing each file, and a Server-Timing header with the totals for the request.
+    With `list_sections`, dates in a header or footer shared by several sections are returned once
+    with a list of those sections, instead of once for every section. With `compact`, each file's
+    dates are returned in the compact format of `encoding.compact_found_dates`. See `_scan_options`
+    for limiting what is scanned. With a `lineage` ID, files are taken to be revisions of the files
+    uploaded with the same ID and filenames before, and only their changed parts are scanned.
+
+    The response is sent as JSON, or as MessagePack when the client accepts `application/msgpack`.
+    """
+    started = time.perf_counter()
+    backend = backend or parser_backend
+    media_type = encoding.negotiate_media_type(request.headers.get('accept'))
+    if media_type is None:
+        raise HTTPException(status_code=406, detail="Responses can only be sent as JSON or MessagePack")
 
     for file in files:
-        if not file.filename or not file.filename.endswith('.docx'):
-            raise HTTPException(status_code=400, detail="Only .docx files are allowed")
-        
-        if file.content_type != 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-            raise HTTPException(status_code=400, detail="Invalid file type. Only .docx files are allowed")
+        _validate_file(file)
+
+    # Parse the files concurrently, the results keep the order of the uploaded files
+    file_stats = [ ParseStats() for _file in files ]
+    results = await asyncio.gather(*[ _parse_file(file, backend, stats, options, lineage) for file, stats in zip(files, file_stats) ])
+    output_data = {}
+    cache_status = {}
+    for file, (found_dates, status) in zip(files, results):
+        output_data[file.filename] = encoding.compact_found_dates(found_dates) if compact else found_dates
+        cache_status[file.filename] = status
+
+    output = {
+        'message': "File uploaded successfully",
+        'data': output_data,
+        'cache': cache_status
+    }
+    if timings:
+        output['timings'] = { file.filename: stats.as_dict() for file, stats in zip(files, file_stats) }
+
+    serialize_started = time.perf_counter()
+    response = Response(encoding.encode(output, media_type), media_type=media_type)
+    serialize_seconds = time.perf_counter() - serialize_started
+    metrics.stage_seconds.observe(serialize_seconds, stage='serialize')
+    metrics.request_seconds.observe(time.perf_counter() - started)
+
+    if timings:
+        request_stats = ParseStats()
+        for stats in file_stats: request_stats.merge(stats)
+        request_stats.timings['serialize'] = serialize_seconds
+        response.headers['Server-Timing'] = ', '.join(
+            f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in request_stats.timings.items()
+        )
+    return response
 
-        print(f"Received file: {file.filename}, size: {file.file.seek(0, 2)} bytes")
+async def _parse_file_result(
+    file: UploadFile, backend: str, stats: ParseStats, options: ScanOptions = ScanOptions(),
+    compact: bool = False, lineage: Optional[str] = None
+) -> dict:
+    """Return a file's found dates, or its error, as one record of a streamed response."""
+    try:
+        found_dates, status = await _read_and_parse_file(file, backend, stats, options, lineage)
+        if compact: found_dates = encoding.compact_found_dates(found_dates)
+        return { 'filename': file.filename, 'data': found_dates, 'cache': status }
+    except HTTPException as e:
+        return { 'filename': file.filename, 'error': e.detail, 'status_code': e.status_code }
+    except Exception as e:
+        return { 'filename': file.filename, 'error': f"Error loading file: {str(e)}", 'status_code': 500 }
+
+def _take_upload(file: UploadFile) -> UploadFile:
+    """Return a file with the same contents as an uploaded file, that stays open once the request's
+    handler has returned.
+
+    Depending on the version, FastAPI closes the request's files as soon as the handler returns,
+    before a streamed response is sent, so the handler takes each file's spooled contents over and
+    leaves an empty file behind to be closed in their place.
+    """
+    owned = UploadFile(file.file, size=file.size, filename=file.filename, headers=file.headers)
+    file.file = io.BytesIO()
+    return owned
+
+async def _error_result(filename: Optional[str], error: HTTPException) -> dict:
+    return { 'filename': filename, 'error': error.detail, 'status_code': error.status_code }
+
+@app.post("/api/v1/docx/stream")
+async def stream_docx_files(
+    request: Request,
+    files: list[UploadFile],
+    backend: Optional[Literal['python-docx', 'ooxml']] = None,
+    compact: bool = False,
+    lineage: Annotated[Optional[str], Query(min_length=1, max_length=256)] = None,
+    options: ScanOptions = Depends(_scan_options)
+):
+    """Send each file's dates, or its error, as soon as that file is parsed.
+
+    Results are sent as newline-delimited JSON, or as Server-Sent Events when the client accepts
+    `text/event-stream`. They arrive in the order the files finish, not the order they were uploaded.
+    `compact`, `lineage` and the scan options work the same as for `/api/v1/docx`.
+    """
+    backend = backend or parser_backend
+    use_events = 'text/event-stream' in request.headers.get('accept', '')
+
+    # Each file is only read once it has a parsing slot, after the handler has returned, and closed
+    # once it has been parsed
+    pending_results = []
+    for file in files:
         try:
-            document = Document(file.file)
+            _validate_file(file)
+            parse_admission.check()
+            pending_results.append(_parse_file_result(_take_upload(file), backend, ParseStats(), options, compact, lineage))
+        except HTTPException as e:
+            await file.close()
+            pending_results.append(_error_result(file.filename, e))
+
+    async def stream_results():
+        for next_result in asyncio.as_completed(pending_results):
+            result = encoding.encode(await next_result).decode()
+            yield f'event: file\ndata: {result}\n\n' if use_events else f'{result}\n'
+
+    return StreamingResponse(
+        stream_results(),
+        media_type='text/event-stream' if use_events else 'application/x-ndjson',
+        headers={ 'Cache-Control': 'no-cache' }
+    )
+
+async def _run_job(data: bytes, filename: Optional[str], options: dict) -> list:
+    """Parse the upload of a queued job, the same way as a synchronous upload.
+
+    If the worker pool breaks twice, the job is retried later, with a new pool.
+    """
+    # jobs are already limited by the job concurrency, so they wait for a slot however many are waiting
+    async with parse_admission.slot(reject_when_full=False):
+        found_dates, _status = await _parse_data(
+            data, options['backend'], ParseStats(), ScanOptions.from_dict(options), filename=filename
+        )
+    return found_dates
+
+def _get_job_queue() -> JobQueue:
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="The job queue is disabled")
+    return job_queue
+
+@app.post("/api/v1/jobs", status_code=202)
+async def submit_jobs(
+    files: list[UploadFile],
+    backend: Optional[Literal['python-docx', 'ooxml']] = None,
+    options: ScanOptions = Depends(_scan_options)
+):
+    """Queue each file to be parsed in the background, returning a job for each.
+
+    The job's status is at `/api/v1/jobs/{id}`, and its dates at `/api/v1/jobs/{id}/result` once
+    it's done. For uploads that take longer to parse than a request is allowed to take.
+    """
+    queue = _get_job_queue()
+    backend = backend or parser_backend
+
+    for file in files:
+        _validate_file(file)
+    # the request is turned away as a whole or not at all, so no file is queued without the client
+    # getting its job's ID
+    parse_admission.check()
 
-            found_dates = find_dates_in_docx(document)
-            output_data[file.filename] = found_dates
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error loading file: {str(e)}")
+    submitted = []
+    for file in files:
+        # queued uploads are read into memory to be stored, so they take their turn like parses do,
+        # one file of the request at a time
+        try:
+            async with parse_admission.slot(reject_when_full=False):
+                data = await file.read()
+                print(f"Received file: {file.filename}, size: {len(data)} bytes")
+                job_id = await asyncio.to_thread(
+                    queue.submit, data, file.filename, { 'backend': backend, **options.to_dict() }
+                )
         finally:
-            file.file.close()
-    
+            await file.close()
+        submitted.append({ 'id': job_id, 'filename': file.filename, 'status': 'queued' })
+    if job_runner is not None: job_runner.notify()
+
     return {
-        'message': "File uploaded successfully",
-        'data': output_data
+        'message': "Files queued successfully",
+        'jobs': submitted
+    }
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return a job's status: "queued", "running", "done" or "failed"."""
+    job = await asyncio.to_thread(_get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No such job, or its result has expired")
+    return job
+
+@app.get("/api/v1/jobs/{job_id}/result")
+async def get_job_result(request: Request, job_id: str, compact: bool = False):
+    """Return the dates found by a finished job, in the same format as `/api/v1/docx` returns a file's."""
+    queue = _get_job_queue()
+    media_type = encoding.negotiate_media_type(request.headers.get('accept'))
+    if media_type is None:
+        raise HTTPException(status_code=406, detail="Responses can only be sent as JSON or MessagePack")
+
+    job = await asyncio.to_thread(queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No such job, or its result has expired")
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=500, detail=f"Error loading file: {job['error']}")
+    found_dates = await asyncio.to_thread(queue.result, job_id) if job['status'] == 'done' else None
+    if found_dates is None:
+        raise HTTPException(status_code=409, detail=f"The job is {job['status']}")
+
+    output = {
+        'filename': job['filename'],
+        'data': encoding.compact_found_dates(found_dates) if compact else found_dates
     }
+    return Response(encoding.encode(output, media_type), media_type=media_type)
+
+@app.delete("/api/v1/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str):
+    """Remove a job and its result, or cancel it if it hasn't started."""
+    queue = _get_job_queue()
+    if not await asyncio.to_thread(queue.delete, job_id):
+        job = await asyncio.to_thread(queue.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="No such job, or its result has expired")
+        raise HTTPException(status_code=409, detail="The job is running")
+
+def _get_date_index() -> DateIndex:
+    if date_index is None:
+        raise HTTPException(status_code=503, detail="The date index is disabled")
+    return date_index
+
+@app.get("/api/v1/index/documents")
+async def find_indexed_documents(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    offset: Annotated[int, Query(ge=0)] = 0
+):
+    """Return the indexed documents mentioning dates between `date_from` and `date_to`, with how
+    many of their dates are in that range and the first and last of them, ordered by the first."""
+    index = _get_date_index()
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    return { 'documents': await asyncio.to_thread(index.find_documents, date_from, date_to, limit, offset) }
+
+@app.get("/api/v1/index/documents/{document_hash}")
+async def get_indexed_document(document_hash: str, filename: Optional[str] = None):
+    """Return the day and location of all the dates of an indexed document, by the SHA-256 hash of
+    its contents, for every filename it was uploaded with or only for `filename`."""
+    documents = await asyncio.to_thread(_get_date_index().get_document, document_hash.lower(), filename)
+    if not documents:
+        raise HTTPException(status_code=404, detail="No such document in the index")
+    return Response(encoding.encode({ 'documents': documents }), media_type=encoding.JSON_MEDIA_TYPE)
+
+@app.delete("/api/v1/index/documents/{document_hash}", status_code=204)
+async def delete_indexed_document(document_hash: str, filename: Optional[str] = None):
+    """Remove a document from the index, for every filename it was uploaded with or only for `filename`."""
+    if not await asyncio.to_thread(_get_date_index().delete, document_hash.lower(), filename):
+        raise HTTPException(status_code=404, detail="No such document in the index")
+
+@app.get("/metrics")
+async def get_metrics():
+    """Return the server's metrics in the Prometheus text format."""
+    cache_metrics = []
+    if result_cache is not None:
+        cache_stats = result_cache.stats()
+        cache_metrics = [
+            ('docx_cache_hits_total', 'counter', "Result cache hits", cache_stats['memory_hits'] + cache_stats['disk_hits']),
+            ('docx_cache_misses_total', 'counter', "Result cache misses", cache_stats['misses']),
+            ('docx_cache_evictions_total', 'counter', "Entries evicted from the in-memory result cache", cache_stats['evictions']),
+            ('docx_cache_entries', 'gauge', "Entries in the in-memory result cache", cache_stats['entries']),
+            ('docx_cache_bytes', 'gauge', "Size of the in-memory result cache", cache_stats['bytes']),
+        ]
+    job_metrics = []
+    if job_queue is not None:
+        job_metrics = [
+            (f'docx_jobs_{status}', 'gauge', f"Jobs in the job queue that are {status}", count)
+            for status, count in (await asyncio.to_thread(job_queue.counts)).items()
+        ]
+    index_metrics = []
+    if date_index is not None:
+        index_metrics = [
+            (f'docx_index_{name}', 'gauge', f"{name.capitalize()} in the date index", count)
+            for name, count in (await asyncio.to_thread(date_index.counts)).items()
+        ]
+    return PlainTextResponse(metrics.render(cache_metrics + job_metrics + index_metrics), media_type='text/plain; version=0.0.4')
+
+@app.get("/api/v1/cache")
+async def get_cache_stats():
+    if result_cache is None:
+        return { 'enabled': False }
+    return { 'enabled': True, **result_cache.stats() }
 
 parent_dir = os.path.dirname(os.path.realpath(__file__))
+# The client only needs to be built when serving it, not to import the server package (for example
+# from the command-line tool)
 app.mount("/", StaticFiles(
-    directory=os.path.join(parent_dir, os.pardir, "client/dist"), html = True
+    directory=os.path.join(parent_dir, os.pardir, "client/dist"), html = True, check_dir = False
 ), name="static",
 )
 
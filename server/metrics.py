@@ -0,0 +1,162 @@
+import time, bisect, threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+
+class ParseStats:
+    """Timings and counts collected while parsing one document.
+
+    Parsing can run in another process, so this only holds plain values that can be pickled and
+    sent back, where they're added to the server's metrics.
+    """
+    def __init__(self):
+        # seconds spent in each stage of parsing
+        self.timings: dict[str, float] = defaultdict(float)
+        self.runs_scanned = 0
+        self.matches_found = 0
+        self.invalid_dates = 0
+        # header and footer parts, document bodies and body paragraphs reused from a previous scan
+        self.parts_reused = 0
+        self.paragraphs_reused = 0
+        # chunks of a document scanned across the worker pool
+        self.chunks_scanned = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent inside the block to the given stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - started
+
+    def merge(self, other: 'ParseStats'):
+        """Add the timings and counts of another set of stats to these."""
+        for stage, seconds in other.timings.items():
+            self.timings[stage] += seconds
+        self.runs_scanned += other.runs_scanned
+        self.matches_found += other.matches_found
+        self.invalid_dates += other.invalid_dates
+        self.parts_reused += other.parts_reused
+        self.paragraphs_reused += other.paragraphs_reused
+        self.chunks_scanned += other.chunks_scanned
+
+    def as_dict(self) -> dict:
+        return {
+            'timings': dict(self.timings),
+            'runs_scanned': self.runs_scanned,
+            'matches_found': self.matches_found,
+            'invalid_dates': self.invalid_dates,
+            'parts_reused': self.parts_reused,
+            'paragraphs_reused': self.paragraphs_reused,
+            'chunks_scanned': self.chunks_scanned,
+        }
+
+def _format_labels(labels: tuple[tuple[str, str], ...], extra: str = '') -> str:
+    pairs = [ f'{name}="{value}"' for name, value in labels ]
+    if extra: pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """A Prometheus-style counter, optionally split by labels."""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[tuple[tuple[str, str], ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [ f'{self.name}{_format_labels(labels)} {value}' for labels, value in self._values.items() ]
+
+class Histogram:
+    """A Prometheus-style histogram with cumulative buckets, optionally split by labels."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: list[float]):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self._values: dict[tuple[tuple[str, str], ...], tuple[list[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            bucket_counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            # only the first bucket the value fits in is counted here, they're summed up when rendered
+            bucket_index = bisect.bisect_left(self.buckets, value)
+            if bucket_index < len(self.buckets): bucket_counts[bucket_index] += 1
+            self._values[key] = (bucket_counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        return self._values.get(tuple(sorted(labels.items())), ([], 0.0, 0))[2]
+
+    def samples(self) -> list[str]:
+        samples = []
+        with self._lock:
+            for labels, (bucket_counts, total, count) in self._values.items():
+                cumulative = 0
+                for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    samples.append(f'{self.name}_bucket{_format_labels(labels, f'le="{bucket}"')} {cumulative}')
+                samples.append(f'{self.name}_bucket{_format_labels(labels, 'le="+Inf"')} {count}')
+                samples.append(f'{self.name}_sum{_format_labels(labels)} {total}')
+                samples.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return samples
+
+SECONDS_BUCKETS = [ 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30 ]
+BYTES_BUCKETS = [ 1024 * 2 ** power for power in range(0, 16, 2) ]  # 1KB to 16MB
+
+stage_seconds = Histogram('docx_stage_seconds', "Time spent in each stage of handling an upload", SECONDS_BUCKETS)
+request_seconds = Histogram('docx_request_seconds', "Time spent handling each upload request", SECONDS_BUCKETS)
+upload_bytes = Histogram('docx_upload_bytes', "Size of each uploaded file", BYTES_BUCKETS)
+bytes_in = Counter('docx_bytes_in_total', "Bytes of uploaded files received")
+files_parsed = Counter('docx_files_parsed_total', "Files parsed, by backend and cache status")
+parse_errors = Counter('docx_parse_errors_total', "Files that couldn't be parsed")
+runs_scanned = Counter('docx_runs_scanned_total', "Runs, paragraphs and cells scanned for dates")
+matches_found = Counter('docx_matches_found_total', "Dates found")
+invalid_dates = Counter('docx_invalid_dates_total', "Matches rejected as invalid dates")
+parts_reused = Counter('docx_parts_reused_total', "Document bodies and header and footer parts reused from the previous revision of a document")
+paragraphs_reused = Counter('docx_paragraphs_reused_total', "Body paragraphs reused from the previous revision of a document")
+chunks_scanned = Counter('docx_chunks_scanned_total', "Chunks of large documents scanned across the worker pool")
+admission_rejections = Counter('docx_admission_rejections_total', "Requests and files turned away by the upload limits, by reason")
+
+METRICS: list[Counter | Histogram] = [
+    stage_seconds, request_seconds, upload_bytes, bytes_in, files_parsed, parse_errors,
+    runs_scanned, matches_found, invalid_dates, parts_reused, paragraphs_reused, chunks_scanned, admission_rejections,
+]
+
+def record_parse(stats: ParseStats):
+    """Add the timings and counts of one parsed document to the metrics."""
+    for stage, seconds in stats.timings.items():
+        stage_seconds.observe(seconds, stage=stage)
+    runs_scanned.inc(stats.runs_scanned)
+    matches_found.inc(stats.matches_found)
+    invalid_dates.inc(stats.invalid_dates)
+    parts_reused.inc(stats.parts_reused)
+    paragraphs_reused.inc(stats.paragraphs_reused)
+    chunks_scanned.inc(stats.chunks_scanned)
+
+def render(extra_metrics: list[tuple[str, str, str, float]] = []) -> str:
+    """Return every metric in the Prometheus text format, along with any extra (name, type, help,
+    value) metrics."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    for name, kind, help, value in extra_metrics:
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
@@ -1,7 +1,14 @@
-import os, re, math
-from typing import cast, Optional, TypedDict, Union
+import os, re, time, bisect, hashlib, itertools
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from typing import cast, Any, Callable, Iterable, NotRequired, Optional, TypedDict, Union
 from docx.document import Document
-from datetime import datetime
+from docx.section import _BaseHeaderFooter
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from datetime import date
+
+from .metrics import ParseStats
 
 DEBUG = os.environ.get('DEBUG', 'false').lower() in ['true', '1']
 
@@ -23,7 +30,7 @@ month_names = {
 re_dd = fr'(?P<day>{ '|'.join([ f'0?{i}' for i in range(1, 10) ]) }|{ '|'.join([ str(i) for i in range(10, 32) ]) })'  # day
 re_mm = fr'(?P<month>{ '|'.join([ f'0?{i}' for i in range(1, 13) ]) })'  # month
 re_yy = r'(?P<year>\d{2,4})'  # year
-re_months = r'(?P<month_name>Jan(uary)?|Feb(ruary)?|Mar(rch)?|Apr(il)?|May|June?|July?|Aug(ust)?|Sep(tember)?|Oct(ober)?|Nov(ember)?|Dec(ember)?)' # months
+re_months = r'(?P<month_name>Jan(uary)?|Feb(ruary)?|Mar(ch)?|Apr(il)?|May|June?|July?|Aug(ust)?|Sep(tember)?|Oct(ober)?|Nov(ember)?|Dec(ember)?)' # months
 re_ordinal = r'(?:st|nd|rd|th)'  # ordinal suffixes
 re_of = r'(?:,|\s+of\s+)'  # optional "of" word
 # Possible patterns in order of "correctness"
@@ -36,141 +43,442 @@ date_patterns = [
     fr'\b{re_months}(?:\sthe)?\s+{re_dd}{re_of}?\s*{re_yy}\b',                  # Month [the] DD, YYYY
 ]
 
+# Changes whenever found dates gain or lose fields
+result_format = 3
+# Identifies the pattern set and the result format, so results cached by an older set of patterns,
+# or in an older format, aren't reused
+pattern_set_version = hashlib.sha256(
+    '\n'.join(date_patterns + [ f'{name}={month}' for name, month in month_names.items() ] + [ f'format={result_format}' ]).encode()
+).hexdigest()[:16]
+
 # Compile patterns for efficiency
 compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in date_patterns]
+# The numbers of the day, month, month name and year groups of each pattern, 0 for those it doesn't have
+date_groups = {
+    pattern: tuple(pattern.groupindex.get(name, 0) for name in ['day', 'month', 'month_name', 'year'])
+    for pattern in compiled_patterns
+}
+# Every pattern starts at a word boundary followed by either a digit or the start of a month name,
+# so a single scan for those positions finds every place any of the patterns could match
+re_candidate = r'\b(?=\d|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)'
+compiled_candidate = re.compile(re_candidate, re.IGNORECASE)
+# Every pattern needs a numeric day and year, so text without digits can't contain a date
+compiled_digit = re.compile(r'\d')
+
+# Lookup tables for turning the parts of a matched date into an ISO date, the patterns being case
+# insensitive: month names in lower case, numbers with and without leading zeros, and the rest of
+# the ISO date for each month and day
+month_numbers = { name.lower(): month for name, month in month_names.items() }
+number_values = { f'{number:0{width}}': number for number in range(0, 100) for width in [1, 2] }
+days_in_month = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+iso_month_days = [ [ f'-{month:02}-{day:02}T00:00:00Z' for day in range(32) ] for month in range(13) ]
+# Two-digit years are in the current century, which is taken once when the server starts
+century = date.today().year // 100 * 100
+
+def normalize_date(match: re.Match, century: int = century) -> Optional[str]:
+    """Return the date matched by one of the date patterns as an ISO date and time, or None if it
+    isn't a valid date, like the 31st of April."""
+    day_group, month_group, month_name_group, year_group = date_groups[match.re]
+    year_text = match.group(year_group)
+    year = int(year_text) if len(year_text) == 4 else int(year_text) + century
+    month_text = match.group(month_group) if month_group else None
+    month = number_values[month_text] if month_text is not None else month_numbers[match.group(month_name_group).lower()]
+    day = number_values[match.group(day_group)]
+    if year == 0: return None
+    if day > days_in_month[month] and not (month == 2 and day == 29 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)):
+        return None
+    return f'{year:04}{iso_month_days[month][day]}'
 
 # Types
+class Anchor(TypedDict):
+    """Where a found date is, as 0-based indexes, for finding it again without searching its text.
+
+    `block` is the index of the body paragraph or table among the body's paragraphs and tables, and
+    `paragraph` that of the paragraph in the body, table cell, header or footer part. Table dates
+    also have the `table`, `row` and `cell` they're in, counting cells the same way as locations.
+    `start` and `end` are character offsets in the paragraph's text; body and table dates also have
+    the `run` and `run_end` they start and end in, and the offsets in those runs.
+    """
+    block: NotRequired[int]
+    table: NotRequired[int]
+    row: NotRequired[int]
+    cell: NotRequired[int]
+    paragraph: int
+    run: NotRequired[int]
+    run_offset: NotRequired[int]
+    run_end: NotRequired[int]
+    run_end_offset: NotRequired[int]
+    start: int
+    end: int
+
 class FoundDateMatch(TypedDict):
     found_date: str
     context: str
+    anchor: NotRequired[Anchor]
 
 class FoundDateContext(TypedDict):
     type: str
     location: str
     text: str
+    # the sections sharing a header or footer, when listed instead of repeating its dates
+    sections: NotRequired[list[int]]
 
 FoundDate = Union[FoundDateMatch, FoundDateContext]
 
-def _search_date_patterns(text: str):
+# The parts of a document that can be scanned: headers, footers, the runs of body paragraphs, and
+# the runs in tables
+PARTS = ('header', 'footer', 'runs', 'tables')
+
+@dataclass(frozen=True)
+class ScanOptions:
+    """What to look for in a document, and how to return it."""
+    # list the sections sharing a header or footer instead of repeating its dates for each
+    list_sections: bool = False
+    parts: frozenset[str] = field(default_factory=lambda: frozenset(PARTS))
+    # only return dates on or after `date_from`, and on or before `date_to`
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    # stop scanning once this many dates are found
+    limit: Optional[int] = None
+    # scan the text of each body and table paragraph at once instead of run by run, finding dates
+    # split across runs by formatting
+    join_runs: bool = False
+    # give each date the `Anchor` of where it is in the document
+    anchors: bool = False
+
+    def is_full(self, found_count: int) -> bool:
+        return self.limit is not None and found_count >= self.limit
+
+    def after(self, found_count: int) -> 'ScanOptions':
+        """Return these options with the limit lowered by the dates already found."""
+        return self if self.limit is None else replace(self, limit=max(0, self.limit - found_count))
+
+    def is_complete(self) -> bool:
+        """Return whether these options find every date in a document, not just some of them."""
+        return self.parts == frozenset(PARTS) and self.date_from is None and self.date_to is None and self.limit is None
+
+    @cached_property
+    def _iso_range(self) -> tuple[Optional[str], Optional[str]]:
+        return (
+            self.date_from.isoformat() if self.date_from is not None else None,
+            self.date_to.isoformat() if self.date_to is not None else None,
+        )
+
+    def in_range(self, found_date: str) -> bool:
+        """Return whether an ISO date, or date and time, is in the date range."""
+        date_from, date_to = self._iso_range
+        if date_from is not None and found_date[:10] < date_from: return False
+        if date_to is not None and found_date[:10] > date_to: return False
+        return True
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the options as JSON-compatible values, leaving out those that aren't set."""
+        options: dict[str, Any] = {}
+        if self.list_sections: options['list_sections'] = True
+        if self.parts != frozenset(PARTS): options['parts'] = [ part for part in PARTS if part in self.parts ]
+        if self.date_from is not None: options['date_from'] = self.date_from.isoformat()
+        if self.date_to is not None: options['date_to'] = self.date_to.isoformat()
+        if self.limit is not None: options['limit'] = self.limit
+        if self.join_runs: options['join_runs'] = True
+        if self.anchors: options['anchors'] = True
+        return options
+
+    @classmethod
+    def from_dict(cls, options: dict[str, Any]) -> 'ScanOptions':
+        return cls(
+            list_sections=options.get('list_sections', False),
+            parts=frozenset(options.get('parts', PARTS)),
+            date_from=date.fromisoformat(options['date_from']) if options.get('date_from') else None,
+            date_to=date.fromisoformat(options['date_to']) if options.get('date_to') else None,
+            limit=options.get('limit'),
+            join_runs=options.get('join_runs', False),
+            anchors=options.get('anchors', False),
+        )
+
+    def cache_options(self) -> list[str]:
+        """Return the options that change the results, for the result cache key."""
+        return [ f'{name}={value}' if value is not True else name for name, value in self.to_dict().items() ]
+
+DEFAULT_OPTIONS = ScanOptions()
+
+def _search_date_patterns(text: str) -> list[re.Match]:
+    """Return the date matches in the given text, in the order they appear.
+
+    The text is scanned once for positions where a date could start, and the patterns are only
+    tried, in order of "correctness", at those positions. The result is the same as running
+    `finditer` for every pattern and keeping the most correct match at each start position.
+    """
     found_dates = []
-    if not text.strip(): return found_dates
+    if not text.strip() or not compiled_digit.search(text): return found_dates
 
-    found_positions = set()  # To avoid duplicate matches
-    for pattern in compiled_patterns:
-        # don't match parts of the text that were already matched by previous patterns
-        matches = pattern.finditer(text)
-        for match in matches:
-            match_start = match.start()
-            if match_start not in found_positions:
-                found_dates.append((match_start, match))
-                found_positions.add(match_start)
-
-    # Return the matches in the order they appear in the text
-    sorted_dates = [
-        date for _start, date in sorted(found_dates, key=lambda x: x[0])
-    ]
-    return sorted_dates
+    # where each pattern's own `finditer` would resume, so a pattern never matches inside
+    # its own previous match
+    pattern_ends = [0] * len(compiled_patterns)
+    for candidate in compiled_candidate.finditer(text):
+        position = candidate.start()
+        found_match = None
+        for pattern_index, pattern in enumerate(compiled_patterns):
+            if position < pattern_ends[pattern_index]: continue
+            match = pattern.match(text, position)
+            if match:
+                pattern_ends[pattern_index] = match.end()
+                # don't match parts of the text that were already matched by previous patterns
+                if found_match is None: found_match = match
+        if found_match is not None:
+            found_dates.append(found_match)
+
+    return found_dates
 
 
 # Date parsing logic
-def _find_dates_in_text(text, data: FoundDateContext, context_limit = 20):
-    """Return a list of found dates in the given text with context and additional data."""
+def _run_indexes(run_starts: list[int], start: int, end: int) -> tuple[int, int]:
+    """Return the indexes of the first and last runs that the text from `start` to `end` of a
+    paragraph is in, given where each run starts in the paragraph's text."""
+    # empty runs start where the next one does, and bisecting to the right skips them
+    first = bisect.bisect_right(run_starts, start) - 1
+    last = bisect.bisect_right(run_starts, max(start, end - 1)) - 1
+    return first, last
+
+def _run_span(run_starts: list[int], start: int, end: int) -> str:
+    """Return the run, or runs, that the text from `start` to `end` of a paragraph is in, given where
+    each run starts in the paragraph's text."""
+    first, last = _run_indexes(run_starts, start, end)
+    return f'run {first + 1}' if first == last else f'runs {first + 1}-{last + 1}'
+
+def _anchor(anchor: dict[str, int], start: int, end: int, run_starts: Optional[list[int]] = None) -> Anchor:
+    """Return the anchor of the text from `start` to `end` of the paragraph at `anchor`, with the
+    runs it's in when given where each run starts in the paragraph's text."""
+    if run_starts is None: return cast(Anchor, { **anchor, 'start': start, 'end': end })
+    first, last = _run_indexes(run_starts, start, end)
+    return cast(Anchor, {
+        **anchor,
+        'run': first, 'run_offset': start - run_starts[first],
+        'run_end': last, 'run_end_offset': end - run_starts[last],
+        'start': start, 'end': end,
+    })
+
+def _find_dates_in_text(
+    text, data: FoundDateContext, context_limit = 20, stats: Optional[ParseStats] = None,
+    options: ScanOptions = DEFAULT_OPTIONS, anchor: Optional[dict[str, int]] = None,
+    run_starts: Optional[list[int]] = None, text_start: int = 0
+):
+    """Return a list of found dates in the given text with context and additional data, leaving out
+    those outside the date range of the options.
+
+    With `anchor`, the indexes of the paragraph the text is in, each date gets its `Anchor`. The
+    text starts at `text_start` in the paragraph's text, and `run_starts` are where each of the
+    paragraph's runs start in it.
+    """
     found_dates: list[FoundDate] = []
+    if stats is not None: stats.runs_scanned += 1
     if not text.strip(): return found_dates
 
     if DEBUG: print(f"Searching for dates in text ({data['type']}): {text[:context_limit]}...")
-    century = math.floor(datetime.now().year / 100) * 100
+    started = time.perf_counter()
     matches = _search_date_patterns(text)
+    if stats is not None: stats.timings['match_dates'] += time.perf_counter() - started
     for match in matches:
         if DEBUG: print(f"Found date: {match.group(0)} in text: {data['text']}")
-        try:
-            match_groups = match.groupdict()
-            found_date = datetime(
-                year = int(match_groups['year']) if len(match_groups['year']) == 4 else int(match_groups['year']) + century,
-                month = int(match_groups['month']) if 'month' in match_groups and match_groups['month'] is not None else month_names[match_groups['month_name']],
-                day=int(match_groups['day']),
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            if DEBUG: print(f"Parsed date: {found_date}", match_groups)
-        except ValueError as e:
-            print(f"Invalid date found: {match.group(0)} - {e}")
+        found_date = normalize_date(match)
+        if found_date is None:
+            print(f"Invalid date found: {match.group(0)}")
+            if stats is not None: stats.invalid_dates += 1
             continue  # Skip invalid dates
+        if DEBUG: print(f"Parsed date: {found_date}")
+        if not options.in_range(found_date): continue
+        if stats is not None: stats.matches_found += 1
         found_dates.append(cast(FoundDate, {
-            'found_date': found_date.isoformat()+"Z",
+            'found_date': found_date,
             'found_text': match.group(0),
             'context': text[max(0, match.start() - context_limit // 2): min(len(text), match.end() + context_limit // 2)],
             **data
         }))
+        if anchor is not None:
+            found_dates[-1]['anchor'] = _anchor(anchor, text_start + match.start(), text_start + match.end(), run_starts)
+    return found_dates
+
+def _run_starts(run_texts: list[str]) -> list[int]:
+    """Return where each run starts in its paragraph's text."""
+    return list(itertools.accumulate([ len(run_text) for run_text in run_texts[:-1] ], initial=0))
+
+def _find_dates_in_runs(
+    run_texts: list[str], location: str, anchor: dict[str, int], stats: Optional[ParseStats] = None,
+    options: ScanOptions = DEFAULT_OPTIONS
+) -> list[FoundDate]:
+    """Return a list of found dates in the runs of a paragraph at the given location and anchor,
+    scanning them one by one, or all at once with `join_runs`. Either way, each date's location ends
+    with the run it's in, like "run 2", or "runs 2-3" for a date split across runs."""
+    if not run_texts: return []
+    if not options.join_runs:
+        # only anchors need to know where the runs start
+        run_starts = _run_starts(run_texts) if options.anchors else None
+        found_dates = []
+        for run_index, run_text in enumerate(run_texts):
+            found_dates.extend(
+                _find_dates_in_text(run_text, data={
+                    'type': 'run',
+                    'location': f'{location}, run {run_index + 1}',
+                    'text': run_text
+                }, stats=stats, options=options, anchor=anchor if run_starts is not None else None,
+                run_starts=run_starts, text_start=run_starts[run_index] if run_starts is not None else 0)
+            )
+        return found_dates
+
+    text = ''.join(run_texts)
+    run_starts = _run_starts(run_texts) if options.anchors else None
+    # without anchors, an empty one still gives the offsets of each date, to find the runs it's in
+    found_dates = _find_dates_in_text(text, data={
+        'type': 'run',
+        'location': location,
+        'text': text
+    }, stats=stats, options=options, anchor=anchor if options.anchors else {}, run_starts=run_starts)
+    if found_dates and run_starts is None: run_starts = _run_starts(run_texts)
+    for found_date in found_dates:
+        found_anchor = found_date['anchor'] if options.anchors else found_date.pop('anchor')
+        found_date['location'] = f"{location}, {_run_span(run_starts, found_anchor['start'], found_anchor['end'])}"
     return found_dates
 
 # Document parsing logic
-def find_dates_in_docx(doc: Document) -> list[FoundDate]:
-    """Return a list of found dates in the given docx document."""
+def _find_dates_in_header_footer(
+    scanned_parts: dict[tuple[str, str], list[tuple[int, FoundDate]]], part_name: str,
+    paragraph_texts: Callable[[], Iterable[str]], kind: str, label: str, section_index: int,
+    stats: ParseStats, options: ScanOptions = DEFAULT_OPTIONS,
+    known_dates: Optional[Iterable[tuple[int, FoundDate]]] = None
+) -> list[FoundDate]:
+    """Return a list of found dates in a section's header or footer, scanning each part only once.
+
+    Headers and footers linked to the previous section share its part. By default every section
+    gets its own copy of the part's dates; with `list_sections` they're only returned for the first
+    section using the part, and later sections are added to their `sections` list instead.
+    `known_dates` are the dates of an unchanged copy of the part, used instead of scanning it.
+    """
+    list_sections = options.list_sections
+    key = (part_name, label)
+    if key not in scanned_parts and known_dates is not None:
+        part_dates = []
+        for paragraph_index, found_date in known_dates:
+            found_date = cast(FoundDate, { **found_date, 'location': f'section {section_index + 1}, {label} {paragraph_index + 1}' })
+            if list_sections: found_date['sections'] = [section_index + 1]
+            part_dates.append((paragraph_index, found_date))
+        scanned_parts[key] = part_dates
+        return [ found_date for _paragraph_index, found_date in part_dates ]
+
+    if key not in scanned_parts:
+        part_dates = []
+        for paragraph_index, text in enumerate(paragraph_texts()):
+            for found_date in _find_dates_in_text(text, data={
+                'type': kind,
+                'location': f'section {section_index + 1}, {label} {paragraph_index + 1}',
+                'text': text
+            }, stats=stats, options=options, anchor={ 'paragraph': paragraph_index } if options.anchors else None):
+                if list_sections: found_date['sections'] = [section_index + 1]
+                part_dates.append((paragraph_index, found_date))
+        scanned_parts[key] = part_dates
+        return [ found_date for _paragraph_index, found_date in part_dates ]
+
+    if list_sections:
+        for _paragraph_index, found_date in scanned_parts[key]:
+            found_date['sections'].append(section_index + 1)
+        return []
+    return [
+        cast(FoundDate, { **found_date, 'location': f'section {section_index + 1}, {label} {paragraph_index + 1}' })
+        for paragraph_index, found_date in scanned_parts[key]
+    ]
+
+def _find_dates_in_headers_footers(doc: Document, stats: ParseStats, options: ScanOptions = DEFAULT_OPTIONS) -> list[FoundDate]:
+    """Return a list of found dates in the headers and footers of the given docx document."""
     found_dates = []
+    scanned_parts: dict[tuple[str, str], list[tuple[int, FoundDate]]] = {}
+    # the last header or footer of each type with a part of its own, which linked ones resolve to;
+    # python-docx would look back through every previous section for each linked one instead
+    defined: dict[str, _BaseHeaderFooter] = {}
 
     # Look through section objects and their headers and footers 
     # https://python-docx.readthedocs.io/en/latest/api/section.html
     for section_index, section in enumerate(doc.sections):
-        if section.different_first_page_header_footer:
-            for header_index, header in enumerate(section.first_page_header.paragraphs):
-                found_dates.extend(
-                    _find_dates_in_text(header.text, data={
-                        'type': 'header',
-                        'location': f'section {section_index + 1}, first page header {header_index + 1}',
-                        'text': header.text
-                    })
-                )
-            for footer_index, footer in enumerate(section.first_page_footer.paragraphs):
-                found_dates.extend(
-                    _find_dates_in_text(footer.text, data={
-                        'type': 'footer',
-                        'location': f'section {section_index + 1}, first page footer {footer_index + 1}',
-                        'text': footer.text
-                    })
-                )
-        for header_index, header in enumerate(section.header.paragraphs):
-            found_dates.extend(
-                _find_dates_in_text(header.text, data={
-                    'type': 'header',
-                    'location': f'section {section_index + 1}, header {header_index + 1}',
-                    'text': header.text
-                })
-            )
-        for footer_index, footer in enumerate(section.footer.paragraphs):
-            found_dates.extend(
-                    _find_dates_in_text(footer.text, data={
-                        'type': 'footer',
-                        'location': f'section {section_index + 1}, footer {footer_index + 1}',
-                        'text': footer.text
-                    })
-            )
+        all_header_footers = [
+            ('header', 'first page header', section.first_page_header), ('footer', 'first page footer', section.first_page_footer),
+            ('header', 'header', section.header), ('footer', 'footer', section.footer),
+        ]
+        for _kind, label, header_footer in all_header_footers:
+            if header_footer._has_definition: defined[label] = header_footer
+
+        header_footers = all_header_footers if section.different_first_page_header_footer else all_header_footers[2:]
+        for kind, label, header_footer in header_footers:
+            if kind not in options.parts: continue
+            # with no previous part to link to, python-docx adds an empty one
+            if label not in defined: defined[label] = header_footer
+            part_header_footer = defined[label]
+            found_dates.extend(_find_dates_in_header_footer(
+                scanned_parts, str(part_header_footer.part.partname),
+                lambda part_header_footer=part_header_footer: [ paragraph.text for paragraph in part_header_footer.paragraphs ],
+                kind, label, section_index, stats, options
+            ))
+        # listed sections are only complete once every section has been looked at
+        if options.is_full(len(found_dates)) and not options.list_sections: break
+
+    return found_dates
+
+def _find_dates_in_paragraphs(doc: Document, stats: ParseStats, options: ScanOptions = DEFAULT_OPTIONS) -> list[FoundDate]:
+    """Return a list of found dates in the runs of the body paragraphs of the given docx document."""
+    found_dates = []
 
-    # Look through paragraphs and their text runs
+    # Look through paragraphs and their text runs, counting the tables between them as blocks
     # https://python-docx.readthedocs.io/en/latest/api/text.html#paragraph-objects
     # https://python-docx.readthedocs.io/en/latest/api/text.html#docx.text.run.Run
-    for paragraph_index, paragraph in enumerate(doc.paragraphs):
-        for run_index, run in enumerate(paragraph.runs):
-            found_dates.extend(
-                _find_dates_in_text(run.text, data={
-                    'type': 'run',
-                    'location': f'paragraph {paragraph_index + 1}, run {run_index + 1}',
-                    'text': run.text
-                })
-            )
+    paragraphs = ( (block_index, block) for block_index, block in enumerate(doc.iter_inner_content()) if isinstance(block, Paragraph) )
+    for paragraph_index, (block_index, paragraph) in enumerate(paragraphs):
+        found_dates.extend(_find_dates_in_runs(
+            [ run.text for run in paragraph.runs ], f'paragraph {paragraph_index + 1}',
+            { 'block': block_index, 'paragraph': paragraph_index }, stats, options
+        ))
+        if options.is_full(len(found_dates)): break
+
+    return found_dates
 
-    # Look through tables, their cells and their paragraphs
+def _find_dates_in_tables(doc: Document, stats: ParseStats, options: ScanOptions = DEFAULT_OPTIONS) -> list[FoundDate]:
+    """Return a list of found dates in the runs of the table cells of the given docx document."""
+    found_dates = []
+
+    # Look through tables, their cells and their paragraphs, counting the paragraphs between them as blocks
     # https://python-docx.readthedocs.io/en/latest/api/table.html#docx.table._Cell.paragraphs
-    for table_index, table in enumerate(doc.tables):
+    tables = ( (block_index, block) for block_index, block in enumerate(doc.iter_inner_content()) if isinstance(block, Table) )
+    for table_index, (block_index, table) in enumerate(tables):
         for row_index, row in enumerate(table.rows):
             for cell_index, cell in enumerate(row.cells):
                 for paragraph_index, paragraph in enumerate(cell.paragraphs):
-                    for run_index, run in enumerate(paragraph.runs):
-                        found_dates.extend(
-                            _find_dates_in_text(run.text, data={
-                                'type': 'run',
-                                'location': f'table {table_index + 1}, row {row_index + 1}, cell {cell_index + 1}, paragraph {paragraph_index + 1}, run {run_index + 1}',
-                                'text': run.text
-                            })
-                        )
+                    found_dates.extend(_find_dates_in_runs(
+                        [ run.text for run in paragraph.runs ],
+                        f'table {table_index + 1}, row {row_index + 1}, cell {cell_index + 1}, paragraph {paragraph_index + 1}',
+                        { 'block': block_index, 'table': table_index, 'row': row_index, 'cell': cell_index, 'paragraph': paragraph_index },
+                        stats, options
+                    ))
+            if options.is_full(len(found_dates)): return found_dates
 
     return found_dates
+
+def find_dates_in_docx(
+    doc: Document, stats: Optional[ParseStats] = None, options: ScanOptions = DEFAULT_OPTIONS
+) -> list[FoundDate]:
+    """Return a list of found dates in the given docx document.
+
+    If given, `stats` collects the time spent on each part of the document and what was found.
+    `options` choose the parts to scan, the dates to return and how many; scanning stops once the
+    limit is reached. With `list_sections`, dates in a header or footer shared by several sections
+    are returned once, listing those sections, instead of once per section. With `join_runs`, the
+    runs of each paragraph are scanned together, so dates split across runs are found too.
+    """
+    stats = stats if stats is not None else ParseStats()
+    found_dates = []
+
+    if 'header' in options.parts or 'footer' in options.parts:
+        with stats.stage('scan_headers_footers'):
+            found_dates.extend(_find_dates_in_headers_footers(doc, stats, options))
+    if 'runs' in options.parts and not options.is_full(len(found_dates)):
+        with stats.stage('scan_paragraphs'):
+            found_dates.extend(_find_dates_in_paragraphs(doc, stats, options.after(len(found_dates))))
+    if 'tables' in options.parts and not options.is_full(len(found_dates)):
+        with stats.stage('scan_tables'):
+            found_dates.extend(_find_dates_in_tables(doc, stats, options.after(len(found_dates))))
+
+    return found_dates[:options.limit]
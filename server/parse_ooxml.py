@@ -0,0 +1,564 @@
+import time, posixpath, threading, zipfile
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import cast, IO, Any, Callable, Iterator, Optional, Union
+from lxml import etree
+
+from .parse_docx import (
+    DEFAULT_OPTIONS, FoundDate, ScanOptions, _find_dates_in_header_footer, _find_dates_in_runs, _find_dates_in_text
+)
+from .metrics import ParseStats
+from .incremental import IncrementalScan
+
+# Namespaces used by the WordprocessingML parts
+# https://learn.microsoft.com/en-us/dotnet/api/documentformat.openxml.wordprocessing
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PR = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+RT_OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+# A table cell as a list of paragraphs, each a list of run texts
+CellText = list[list[str]]
+# A body or table paragraph to scan: its run texts, location and anchor
+ChunkParagraph = tuple[list[str], str, dict[str, int]]
+
+# How many characters of text a chunk scanned in the worker pool holds, by default
+CHUNK_CHARS = 256 * 1024
+
+def _is_on(element: Optional[etree._Element]) -> bool:
+    """Return whether an on/off element (like `w:titlePg`) is present and switched on."""
+    if element is None: return False
+    return element.get(f'{W}val', 'true').lower() not in ['false', '0', 'off']
+
+def _run_text(run: etree._Element) -> str:
+    """Return the text of a `w:r` element, the same way python-docx's `Run.text` does."""
+    text = []
+    for child in run:
+        tag = child.tag
+        if tag == f'{W}t':
+            text.append(child.text or '')
+        elif tag in [f'{W}tab', f'{W}ptab']:
+            text.append('\t')
+        elif tag == f'{W}br':
+            text.append('\n' if child.get(f'{W}type', 'textWrapping') == 'textWrapping' else '')
+        elif tag == f'{W}cr':
+            text.append('\n')
+        elif tag == f'{W}noBreakHyphen':
+            text.append('-')
+    return ''.join(text)
+
+def _paragraph_runs(paragraph: etree._Element) -> list[str]:
+    """Return the texts of the runs directly in a `w:p` element, like python-docx's `Paragraph.runs`."""
+    return [ _run_text(run) for run in paragraph.iterchildren(f'{W}r') ]
+
+def _paragraph_text(paragraph: etree._Element) -> str:
+    """Return the text of a `w:p` element including hyperlinks, like python-docx's `Paragraph.text`."""
+    text = []
+    for child in paragraph.iterchildren(f'{W}r', f'{W}hyperlink'):
+        if child.tag == f'{W}r':
+            text.append(_run_text(child))
+        else:
+            text.extend(_run_text(run) for run in child.iterchildren(f'{W}r'))
+    return ''.join(text)
+
+def _clear(element: etree._Element):
+    """Free an element that has been processed, along with the siblings processed before it."""
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is None: return
+    while element.getprevious() is not None:
+        del parent[0]
+
+def _iterparse(source: IO[bytes]) -> Iterator[tuple[str, etree._Element]]:
+    return etree.iterparse(source, events=('start', 'end'), resolve_entities=False, huge_tree=True)
+
+def _read_relationships(package: zipfile.ZipFile, part_name: str) -> dict[str, str]:
+    """Return a map of relationship ID to the part name it targets, for the given part."""
+    directory, filename = posixpath.split(part_name)
+    rels_name = posixpath.join(directory, '_rels', f'{filename}.rels')
+    if rels_name not in package.namelist(): return {}
+
+    relationships = {}
+    with package.open(rels_name) as rels_file:
+        for relationship in etree.parse(rels_file).getroot().iterchildren(f'{PR}Relationship'):
+            if relationship.get('TargetMode') == 'External': continue
+            target = relationship.get('Target', '')
+            if target.startswith('/'):
+                target = target.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join(directory, target))
+            relationships[relationship.get('Id', '')] = target
+    return relationships
+
+def _find_main_document(package: zipfile.ZipFile) -> str:
+    """Return the part name of the main document, usually `word/document.xml`."""
+    with package.open('_rels/.rels') as rels_file:
+        for relationship in etree.parse(rels_file).getroot().iterchildren(f'{PR}Relationship'):
+            if relationship.get('Type') == RT_OFFICE_DOCUMENT:
+                return relationship.get('Target', '').lstrip('/')
+    raise ValueError("The file has no main document part")
+
+def _header_footer_paragraphs(package: zipfile.ZipFile, part_name: str) -> Iterator[str]:
+    """Generate the text of each top-level paragraph in a header or footer part."""
+    with package.open(part_name) as part_file:
+        depth = 0
+        for event, element in _iterparse(part_file):
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            # the paragraphs of the `w:hdr` or `w:ftr` root element
+            if depth == 1 and element.tag == f'{W}p':
+                yield _paragraph_text(element)
+                _clear(element)
+
+class _Section:
+    """The header and footer references of a `w:sectPr` element."""
+    def __init__(self, different_first_page: bool, references: dict[tuple[str, str], str]):
+        self.different_first_page = different_first_page
+        self.references = references
+
+    @classmethod
+    def from_element(cls, sectPr: etree._Element) -> '_Section':
+        references = {}
+        for kind in ['header', 'footer']:
+            for reference in sectPr.iterchildren(f'{W}{kind}Reference'):
+                references[(kind, reference.get(f'{W}type', 'default'))] = reference.get(f'{R}id', '')
+        return cls(_is_on(sectPr.find(f'{W}titlePg')), references)
+
+    @classmethod
+    def from_dict(cls, section: dict[str, Any]) -> '_Section':
+        return cls(section['different_first_page'], { (kind, header_type): relationship_id for kind, header_type, relationship_id in section['references'] })
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'different_first_page': self.different_first_page,
+            'references': [ [kind, header_type, relationship_id] for (kind, header_type), relationship_id in self.references.items() ],
+        }
+
+def _resolve_reference(sections: list[_Section], section_index: int, kind: str, header_type: str) -> Optional[str]:
+    """Return the relationship ID of a section's header or footer, following links to previous sections."""
+    for section in reversed(sections[:section_index + 1]):
+        if (kind, header_type) in section.references:
+            return section.references[(kind, header_type)]
+    return None
+
+def _row_cells(row: etree._Element, cells_above: dict[int, list[CellText]]) -> tuple[list[CellText], dict[int, list[CellText]]]:
+    """Return the cells of a `w:tr` element the same way python-docx's `_Row.cells` does.
+
+    A cell spanning several grid columns is repeated once per column, and a vertically merged cell
+    repeats the content of the cell it continues. Also returns the cells by grid offset, for
+    resolving vertical merges in the next row.
+    """
+    cells: list[CellText] = []
+    cells_by_offset: dict[int, list[CellText]] = {}
+    grid_before = row.find(f'{W}trPr/{W}gridBefore')
+    grid_offset = int(grid_before.get(f'{W}val', 0)) if grid_before is not None else 0
+
+    for cell in row.iterchildren(f'{W}tc'):
+        grid_span_element = cell.find(f'{W}tcPr/{W}gridSpan')
+        grid_span = int(grid_span_element.get(f'{W}val', 1)) if grid_span_element is not None else 1
+        v_merge = cell.find(f'{W}tcPr/{W}vMerge')
+
+        if v_merge is not None and v_merge.get(f'{W}val', 'continue') == 'continue' and grid_offset in cells_above:
+            tc_cells = cells_above[grid_offset]
+        else:
+            content = [ _paragraph_runs(paragraph) for paragraph in cell.iterchildren(f'{W}p') ]
+            tc_cells = [content] * grid_span
+
+        cells.extend(tc_cells)
+        cells_by_offset[grid_offset] = tc_cells
+        grid_offset += grid_span
+    return cells, cells_by_offset
+
+def _section_header_footers(
+    sections: list[_Section], section_index: int, relationships: dict[str, str], options: ScanOptions
+) -> Iterator[tuple[str, str, str]]:
+    """Generate the kind, label and part name of each header and footer of a section to scan."""
+    header_footers = [('header', 'first'), ('footer', 'first')] if sections[section_index].different_first_page else []
+    header_footers += [('header', 'default'), ('footer', 'default')]
+    for kind, header_type in header_footers:
+        if kind not in options.parts: continue
+        relationship_id = _resolve_reference(sections, section_index, kind, header_type)
+        if relationship_id is None or relationship_id not in relationships: continue
+        yield kind, f'first page {kind}' if header_type == 'first' else kind, relationships[relationship_id]
+
+def scan_header_footer_part(
+    paragraph_texts: list[str], kind: str, options: ScanOptions = DEFAULT_OPTIONS
+) -> tuple[list[tuple[int, FoundDate]], ParseStats]:
+    """Return the found dates in the paragraphs of a header or footer part, by paragraph index,
+    along with the time spent scanning them.
+
+    This runs inside the worker pool, so it only takes and returns picklable values. The dates'
+    locations are set for each section using the part once they're back.
+    """
+    stats = ParseStats()
+    part_dates = []
+    with stats.stage('scan_headers_footers'):
+        for paragraph_index, text in enumerate(paragraph_texts):
+            for found_date in _find_dates_in_text(
+                text, data={ 'type': kind, 'location': '', 'text': text }, stats=stats, options=options,
+                anchor={ 'paragraph': paragraph_index } if options.anchors else None
+            ):
+                part_dates.append((paragraph_index, found_date))
+    return part_dates, stats
+
+def _find_dates_in_sections(
+    package: Optional[zipfile.ZipFile], sections: list[_Section], relationships: dict[str, str], stats: ParseStats,
+    options: ScanOptions = DEFAULT_OPTIONS, incremental: Optional[IncrementalScan] = None,
+    known_parts: Optional[dict[tuple[str, str], list[tuple[int, FoundDate]]]] = None
+) -> list[FoundDate]:
+    """Return a list of found dates in the headers and footers of the given sections, reusing the
+    dates of parts that haven't changed since the previous scan, if given, or the dates of
+    `known_parts` already scanned in the worker pool. The `package` is only read for parts that
+    aren't known, and isn't needed when every part the sections use is."""
+    found_dates = []
+    scanned_parts: dict[tuple[str, str], list[tuple[int, FoundDate]]] = {}
+    for section_index in range(len(sections)):
+        for kind, label, part_name in _section_header_footers(sections, section_index, relationships, options):
+            known_dates = None
+            if known_parts is not None:
+                known_dates = known_parts.get((part_name, label))
+            elif incremental is not None and (part_name, label) not in scanned_parts:
+                known_dates = incremental.known_header_footer(part_name, package.getinfo(part_name).CRC, label)
+                if known_dates is not None: stats.parts_reused += 1
+            found_dates.extend(_find_dates_in_header_footer(
+                scanned_parts, part_name, lambda part_name=part_name: _header_footer_paragraphs(package, part_name),
+                kind, label, section_index, stats, options, known_dates
+            ))
+        # listed sections are only complete once every section has been looked at
+        if options.is_full(len(found_dates)) and not options.list_sections: break
+
+    if incremental is not None:
+        for (part_name, label), part_dates in scanned_parts.items():
+            incremental.set_header_footer(part_name, package.getinfo(part_name).CRC, label, part_dates)
+    return found_dates
+
+def _find_dates_in_paragraph(
+    paragraph: etree._Element, paragraph_index: int, block_index: int, stats: ParseStats, options: ScanOptions,
+    incremental: Optional[IncrementalScan] = None
+) -> list[FoundDate]:
+    """Return a list of found dates in the runs of a body paragraph, the `block_index`th of the
+    body's paragraphs and tables, reusing the dates of a paragraph with the same runs in the
+    previous scan, if given."""
+    run_texts = _paragraph_runs(paragraph)
+    if incremental is not None:
+        key = incremental.paragraph_key(run_texts)
+        known_dates = incremental.known_paragraph(key)
+        if known_dates is not None:
+            stats.paragraphs_reused += 1
+            incremental.set_paragraph(key, known_dates)
+            # keep the runs at the end of the location and the offsets of the anchor, the paragraph
+            # may have moved
+            return [
+                cast(FoundDate, {
+                    **found_date,
+                    'location': f"paragraph {paragraph_index}, {found_date['location'].rsplit(', ', 1)[1]}",
+                    **({ 'anchor': { **found_date['anchor'], 'block': block_index, 'paragraph': paragraph_index - 1 } }
+                       if 'anchor' in found_date else {}),
+                })
+                for found_date in known_dates
+            ]
+
+    found_dates = _find_dates_in_runs(
+        run_texts, f'paragraph {paragraph_index}', { 'block': block_index, 'paragraph': paragraph_index - 1 }, stats, options
+    )
+    if incremental is not None: incremental.set_paragraph(key, found_dates)
+    return found_dates
+
+def _row_paragraphs(cells: list[CellText], table_index: int, row_index: int, block_index: int) -> Iterator[ChunkParagraph]:
+    """Generate the run texts, location and anchor of each paragraph in a table row's cells, the
+    table being the `block_index`th of the body's paragraphs and tables."""
+    for cell_index, cell in enumerate(cells):
+        for cell_paragraph_index, run_texts in enumerate(cell):
+            yield (
+                run_texts,
+                f'table {table_index}, row {row_index}, cell {cell_index + 1}, paragraph {cell_paragraph_index + 1}',
+                {
+                    'block': block_index, 'table': table_index - 1, 'row': row_index - 1,
+                    'cell': cell_index, 'paragraph': cell_paragraph_index
+                },
+            )
+
+def _find_dates_in_row(
+    cells: list[CellText], table_index: int, row_index: int, block_index: int, stats: ParseStats, options: ScanOptions
+) -> list[FoundDate]:
+    """Return a list of found dates in the runs of a table row's cells."""
+    found_dates = []
+    for run_texts, location, anchor in _row_paragraphs(cells, table_index, row_index, block_index):
+        found_dates.extend(_find_dates_in_runs(run_texts, location, anchor, stats, options))
+    return found_dates
+
+def scan_paragraph_chunk(
+    paragraphs: list[ChunkParagraph], stage: str, options: ScanOptions = DEFAULT_OPTIONS
+) -> tuple[list[FoundDate], ParseStats]:
+    """Return the found dates in a chunk of body or table paragraphs, along with the time spent
+    scanning them as the given stage.
+
+    This runs inside the worker pool, so it only takes and returns picklable values.
+    """
+    stats = ParseStats()
+    found_dates = []
+    with stats.stage(stage):
+        for run_texts, location, anchor in paragraphs:
+            found_dates.extend(_find_dates_in_runs(run_texts, location, anchor, stats, options))
+    return found_dates, stats
+
+class _Chunker:
+    """Collects paragraphs into chunks of about `chunk_chars` characters each, in document order."""
+    def __init__(self, chunk_chars: int):
+        self.chunk_chars = chunk_chars
+        self.chunks: list[list[ChunkParagraph]] = []
+        self.paragraphs: list[ChunkParagraph] = []
+        self.chars = 0
+
+    def add(self, run_texts: list[str], location: str, anchor: dict[str, int]):
+        self.paragraphs.append((run_texts, location, anchor))
+        self.chars += sum(len(run_text) for run_text in run_texts)
+        if self.chars >= self.chunk_chars: self.flush()
+
+    def flush(self):
+        if not self.paragraphs: return
+        self.chunks.append(self.paragraphs)
+        self.paragraphs = []
+        self.chars = 0
+
+def _find_dates_in_body(
+    package: zipfile.ZipFile, document_part: str, stats: ParseStats, options: ScanOptions,
+    incremental: Optional[IncrementalScan] = None,
+    paragraph_chunks: Optional[_Chunker] = None, table_chunks: Optional[_Chunker] = None
+) -> tuple[list[_Section], list[FoundDate], list[FoundDate]]:
+    """Return the sections of the document part, and the found dates in its paragraphs and tables.
+
+    Given `paragraph_chunks` and `table_chunks`, the paragraphs and table rows are split into
+    chunks to scan later instead of being scanned as they're read, and no dates are returned.
+    """
+    scan_headers_footers = 'header' in options.parts or 'footer' in options.parts
+    scan_runs = 'runs' in options.parts
+    scan_tables = 'tables' in options.parts
+    found_dates_in_paragraphs = []
+    found_dates_in_tables = []
+    sections: list[_Section] = []
+
+    with package.open(document_part) as document_file:
+        started = time.perf_counter()
+        scanned_before = stats.timings['scan_paragraphs'] + stats.timings['scan_tables']
+        path: list[str] = []
+        paragraph_index = table_index = row_index = 0
+        # the paragraphs and tables directly in the body, counted together
+        block_index = table_block_index = 0
+        cells_above: dict[int, list[CellText]] = {}
+
+        for event, element in _iterparse(document_file):
+            if event == 'start':
+                path.append(element.tag)
+                # a table directly in the body
+                if element.tag == f'{W}tbl' and len(path) == 3 and path[1] == f'{W}body':
+                    table_index += 1
+                    table_block_index = block_index
+                    block_index += 1
+                    row_index = 0
+                    cells_above = {}
+                continue
+            path.pop()
+            in_body = len(path) == 2 and path[1] == f'{W}body'
+
+            # Look through paragraphs and their text runs
+            if in_body and element.tag == f'{W}p':
+                paragraph_index += 1
+                if scan_runs and paragraph_chunks is not None:
+                    paragraph_chunks.add(
+                        _paragraph_runs(element), f'paragraph {paragraph_index}', { 'block': block_index, 'paragraph': paragraph_index - 1 }
+                    )
+                elif scan_runs and not options.is_full(len(found_dates_in_paragraphs)):
+                    with stats.stage('scan_paragraphs'):
+                        found_dates_in_paragraphs.extend(
+                            _find_dates_in_paragraph(element, paragraph_index, block_index, stats, options, incremental)
+                        )
+                block_index += 1
+                sectPr = element.find(f'{W}pPr/{W}sectPr')
+                if sectPr is not None: sections.append(_Section.from_element(sectPr))
+                _clear(element)
+
+            # Look through the rows of tables, their cells and their paragraphs
+            elif element.tag == f'{W}tr' and len(path) == 3 and path[1] == f'{W}body' and path[2] == f'{W}tbl':
+                row_index += 1
+                # the tables' dates come after all of the paragraphs' in the results
+                if scan_tables and table_chunks is not None:
+                    cells, cells_above = _row_cells(element, cells_above)
+                    for run_texts, location, anchor in _row_paragraphs(cells, table_index, row_index, table_block_index):
+                        table_chunks.add(run_texts, location, anchor)
+                elif scan_tables and not options.is_full(len(found_dates_in_paragraphs) + len(found_dates_in_tables)):
+                    with stats.stage('scan_tables'):
+                        cells, cells_above = _row_cells(element, cells_above)
+                        found_dates_in_tables.extend(
+                            _find_dates_in_row(cells, table_index, row_index, table_block_index, stats, options)
+                        )
+                _clear(element)
+
+            elif in_body and element.tag == f'{W}tbl':
+                _clear(element)
+
+            # The last section's properties are the last element in the body
+            elif in_body and element.tag == f'{W}sectPr':
+                sections.append(_Section.from_element(element))
+                _clear(element)
+
+            # Without headers and footers, which need every section's properties, the rest of
+            # the document can only add dates past the limit
+            if not scan_headers_footers and (
+                options.is_full(len(found_dates_in_paragraphs))
+                or (not scan_runs and options.is_full(len(found_dates_in_tables)))
+            ):
+                break
+
+        scanned = stats.timings['scan_paragraphs'] + stats.timings['scan_tables'] - scanned_before
+        stats.timings['parse_xml'] += time.perf_counter() - started - scanned
+
+    if paragraph_chunks is not None: paragraph_chunks.flush()
+    if table_chunks is not None: table_chunks.flush()
+    return sections, found_dates_in_paragraphs, found_dates_in_tables
+
+@dataclass
+class DocumentChunks:
+    """A document read and split into chunks, to scan across the worker pool with `scan_chunks`."""
+    sections: list[_Section]
+    relationships: dict[str, str]
+    paragraph_chunks: list[list[ChunkParagraph]]
+    table_chunks: list[list[ChunkParagraph]]
+    # the kind and paragraph texts of each header and footer part the sections use, by part name
+    # and label
+    header_footer_parts: dict[tuple[str, str], tuple[str, list[str]]]
+    # the time spent reading the document
+    stats: ParseStats
+
+def split_ooxml(file: Union[str, IO[bytes]], options: ScanOptions = DEFAULT_OPTIONS, chunk_chars: int = CHUNK_CHARS) -> DocumentChunks:
+    """Read a .docx file and split what `options` asks to scan into chunks: the body paragraphs and
+    table rows into chunks of about `chunk_chars` characters, and each header and footer part into
+    a chunk of its own. Options with a limit don't apply, as they depend on what was found before."""
+    stats = ParseStats()
+    with zipfile.ZipFile(file) as package:
+        with stats.stage('load_document'):
+            document_part = _find_main_document(package)
+            relationships = _read_relationships(package, document_part)
+        paragraph_chunks, table_chunks = _Chunker(chunk_chars), _Chunker(chunk_chars)
+        sections, _paragraph_dates, _table_dates = _find_dates_in_body(
+            package, document_part, stats, options, paragraph_chunks=paragraph_chunks, table_chunks=table_chunks
+        )
+        header_footer_parts = {}
+        if 'header' in options.parts or 'footer' in options.parts:
+            with stats.stage('parse_xml'):
+                for section_index in range(len(sections)):
+                    for kind, label, part_name in _section_header_footers(sections, section_index, relationships, options):
+                        if (part_name, label) not in header_footer_parts:
+                            header_footer_parts[(part_name, label)] = (kind, list(_header_footer_paragraphs(package, part_name)))
+    return DocumentChunks(sections, relationships, paragraph_chunks.chunks, table_chunks.chunks, header_footer_parts, stats)
+
+def _run_bounded(executor: Executor, calls: list[tuple[Callable, tuple]], max_in_flight: int) -> list[Any]:
+    """Run each function with its arguments in the executor, returning their results in order.
+
+    Only `max_in_flight` calls are sent to the executor at a time, so a document split into many
+    chunks doesn't queue all of them ahead of the work other uploads send to the pool.
+    """
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    futures = []
+    for function, args in calls:
+        in_flight.acquire()
+        future = executor.submit(function, *args)
+        future.add_done_callback(lambda _future: in_flight.release())
+        futures.append(future)
+    return [ future.result() for future in futures ]
+
+def scan_chunks(
+    chunks: DocumentChunks, executor: Executor, stats: Optional[ParseStats] = None, options: ScanOptions = DEFAULT_OPTIONS,
+    max_in_flight: int = 1
+) -> list[FoundDate]:
+    """Return a list of found dates in a document split by `split_ooxml`, scanning its chunks across
+    the `executor`'s workers, with at most `max_in_flight` of them sent to the pool at a time.
+
+    The results are put back together in the same order, with the same locations, as scanning the
+    document in one go. If given, `stats` collects the time spent reading and scanning the document.
+    """
+    stats = stats if stats is not None else ParseStats()
+    stats.merge(chunks.stats)
+    part_keys = list(chunks.header_footer_parts)
+    calls = [ (scan_paragraph_chunk, (chunk, 'scan_paragraphs', options)) for chunk in chunks.paragraph_chunks ]
+    calls += [ (scan_paragraph_chunk, (chunk, 'scan_tables', options)) for chunk in chunks.table_chunks ]
+    calls += [ (scan_header_footer_part, (paragraph_texts, kind, options)) for kind, paragraph_texts in chunks.header_footer_parts.values() ]
+    with stats.stage('wait_chunks'):
+        results = _run_bounded(executor, calls, max_in_flight)
+    for _found_dates, chunk_stats in results:
+        stats.merge(chunk_stats)
+        stats.chunks_scanned += 1
+
+    paragraph_count, table_count = len(chunks.paragraph_chunks), len(chunks.table_chunks)
+    found_dates_in_paragraphs = [ found_date for chunk_dates, _stats in results[:paragraph_count] for found_date in chunk_dates ]
+    found_dates_in_tables = [
+        found_date for chunk_dates, _stats in results[paragraph_count:paragraph_count + table_count] for found_date in chunk_dates
+    ]
+    found_dates = []
+    if 'header' in options.parts or 'footer' in options.parts:
+        known_parts = { key: part_dates for key, (part_dates, _stats) in zip(part_keys, results[paragraph_count + table_count:]) }
+        with stats.stage('scan_headers_footers'):
+            found_dates = _find_dates_in_sections(None, chunks.sections, chunks.relationships, stats, options, known_parts=known_parts)
+    return found_dates + found_dates_in_paragraphs + found_dates_in_tables
+
+# Document parsing logic
+def find_dates_in_ooxml(
+    file: Union[str, IO[bytes]], stats: Optional[ParseStats] = None, options: ScanOptions = DEFAULT_OPTIONS,
+    incremental: Optional[IncrementalScan] = None, executor: Optional[Executor] = None, chunk_chars: int = CHUNK_CHARS,
+    max_in_flight: int = 1
+) -> list[FoundDate]:
+    """Return a list of found dates in the given .docx file, read straight from its XML parts.
+
+    Gives the same results as `find_dates_in_docx`, but streams the document part instead of
+    building the python-docx object model, so memory use doesn't grow with the document size.
+    If given, `stats` collects the time spent on each part of the document and what was found;
+    the time spent parsing the streamed XML is counted separately as "parse_xml".
+    `options` work the same as for `find_dates_in_docx`. Header and footer parts that weren't asked
+    for aren't read at all, and without them the document part is only read as far as needed to
+    reach the limit.
+
+    Given an `incremental` scan holding the results of the document's previous revision, only the
+    parts and body paragraphs that changed since then are scanned again, and the results of this
+    revision are added to it for the next one.
+
+    Given an `executor`, a pool of worker processes, the document is read here and split with
+    `split_ooxml`, and its chunks are scanned across the pool by `scan_chunks`, `max_in_flight` at a
+    time. Scans with a limit or an incremental scan don't use the executor, as they depend on what
+    was found before.
+    """
+    stats = stats if stats is not None else ParseStats()
+    if executor is not None and options.limit is None and incremental is None:
+        return scan_chunks(split_ooxml(file, options, chunk_chars), executor, stats, options, max_in_flight)
+
+    with zipfile.ZipFile(file) as package:
+        with stats.stage('load_document'):
+            document_part = _find_main_document(package)
+            relationships = _read_relationships(package, document_part)
+
+        document_crc = package.getinfo(document_part).CRC
+        known_document = incremental.known_document(document_part, document_crc) if incremental is not None else None
+        if known_document is not None:
+            stats.parts_reused += 1
+            incremental.keep_document(known_document)
+            sections = [ _Section.from_dict(section) for section in known_document['sections'] ]
+            found_dates_in_paragraphs = known_document['paragraph_dates']
+            found_dates_in_tables = known_document['table_dates']
+        else:
+            sections, found_dates_in_paragraphs, found_dates_in_tables = _find_dates_in_body(
+                package, document_part, stats, options, incremental
+            )
+            if incremental is not None:
+                incremental.set_document(
+                    document_part, document_crc, [ section.to_dict() for section in sections ],
+                    found_dates_in_paragraphs, found_dates_in_tables
+                )
+
+        # Look through section headers and footers, which come first in the results
+        found_dates = []
+        if 'header' in options.parts or 'footer' in options.parts:
+            with stats.stage('scan_headers_footers'):
+                found_dates = _find_dates_in_sections(package, sections, relationships, stats, options, incremental)
+
+    return (found_dates + found_dates_in_paragraphs + found_dates_in_tables)[:options.limit]
@@ -0,0 +1,112 @@
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Optional
+from docx import Document
+
+from .parse_docx import DEFAULT_OPTIONS, FoundDate, ScanOptions, find_dates_in_docx
+from .parse_ooxml import CHUNK_CHARS, DocumentChunks, find_dates_in_ooxml, scan_chunks, split_ooxml
+from .metrics import ParseStats
+from .incremental import IncrementalScan
+
+_executor: Optional[Executor] = None
+
+def parse_docx_bytes(
+    data: bytes, backend: str, stats: Optional[ParseStats] = None, options: ScanOptions = DEFAULT_OPTIONS
+) -> list[FoundDate]:
+    """Return a list of found dates in the given .docx file contents.
+
+    This runs inside the worker pool, so it only takes and returns picklable values.
+    """
+    stats = stats if stats is not None else ParseStats()
+    if backend == 'ooxml':
+        return find_dates_in_ooxml(BytesIO(data), stats, options)
+    with stats.stage('load_document'):
+        document = Document(BytesIO(data))
+    return find_dates_in_docx(document, stats, options)
+
+def parse_docx_bytes_with_stats(
+    data: bytes, backend: str, options: ScanOptions = DEFAULT_OPTIONS
+) -> tuple[list[FoundDate], ParseStats]:
+    """Return a list of found dates in the given .docx file contents, along with the time spent
+    on each stage of parsing it."""
+    stats = ParseStats()
+    return parse_docx_bytes(data, backend, stats, options), stats
+
+def parse_docx_bytes_incremental(
+    data: bytes, options: ScanOptions = DEFAULT_OPTIONS, previous: Optional[dict[str, Any]] = None
+) -> tuple[list[FoundDate], ParseStats, dict[str, Any]]:
+    """Return a list of found dates in the given .docx file contents, only scanning the parts that
+    changed since the `previous` revision of the document, along with the time spent on each stage
+    of parsing it and what the next revision can reuse.
+
+    Always uses the ooxml backend, which can tell which parts of the file changed.
+    """
+    stats = ParseStats()
+    incremental = IncrementalScan(options, previous)
+    found_dates = find_dates_in_ooxml(BytesIO(data), stats, options, incremental)
+    return found_dates, stats, incremental.to_dict()
+
+def split_docx_bytes(data: bytes, options: ScanOptions = DEFAULT_OPTIONS, chunk_chars: int = CHUNK_CHARS) -> DocumentChunks:
+    """Read the given .docx file contents and split them into chunks to scan across the worker pool.
+
+    This runs inside the worker pool, so it only takes and returns picklable values.
+    """
+    return split_ooxml(BytesIO(data), options, chunk_chars)
+
+def parse_docx_bytes_in_chunks(
+    data: bytes, executor: Executor, options: ScanOptions = DEFAULT_OPTIONS, chunk_chars: int = CHUNK_CHARS,
+    max_in_flight: int = 1
+) -> tuple[list[FoundDate], ParseStats]:
+    """Return a list of found dates in the given .docx file contents, along with the time spent
+    on each stage of parsing it, scanning chunks of the document across the `executor`'s workers.
+
+    This runs outside the worker pool and only hands out the work: one worker reads the document
+    and splits it into chunks, and the chunks are then sent to the pool `max_in_flight` at a time.
+    Always uses the ooxml backend, which reads the document as a stream the chunks are cut from.
+    """
+    stats = ParseStats()
+    chunks = executor.submit(split_docx_bytes, data, options, chunk_chars).result()
+    found_dates = scan_chunks(chunks, executor, stats, options, max_in_flight)
+    return found_dates, stats
+
+def create_executor(pool_type: str, pool_size: Optional[int] = None) -> Executor:
+    """Return a new process or thread pool with the given number of workers."""
+    if pool_type == 'thread':
+        return ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='docx-parser')
+    # Forking a process that runs an event loop and threads isn't safe, so start clean workers
+    return ProcessPoolExecutor(max_workers=pool_size, mp_context=multiprocessing.get_context('spawn'))
+
+def configure_executor(pool_type: str, pool_size: Optional[int] = None) -> Executor:
+    """Replace the shared worker pool with a new one of the given type and size."""
+    global _executor
+    shutdown_executor()
+    _executor = create_executor(pool_type, pool_size)
+    return _executor
+
+def get_executor() -> Executor:
+    """Return the shared worker pool, creating it from the server settings on first use."""
+    if _executor is None:
+        # The workers import this module too, and don't need the server settings
+        from .env import worker_pool_type, worker_pool_size
+        return configure_executor(worker_pool_type, worker_pool_size)
+    return _executor
+
+def shutdown_executor():
+    """Shut down the shared worker pool, waiting for running parses to finish."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+def discard_executor(executor: Executor):
+    """Shut down the given worker pool and stop sharing it, if it's still the shared one, so the
+    next parse starts a new pool.
+
+    For a pool one of whose workers died, which breaks the whole pool: requests that saw it break
+    at the same time don't also shut down the pool that replaced it.
+    """
+    global _executor
+    if _executor is executor:
+        _executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
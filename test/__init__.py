@@ -0,0 +1,6 @@
+import os
+
+# The tests start the app without the job queue or the date index, whatever the environment says;
+# the tests of those patch in databases of their own
+os.environ['SERVER_JOBS_DB_PATH'] = ''
+os.environ['SERVER_INDEX_DB_PATH'] = ''
@@ -0,0 +1,14 @@
+from io import BytesIO
+from docx import Document
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+def make_docx(paragraph_count: int) -> bytes:
+    document = Document()
+    for paragraph_index in range(paragraph_count):
+        paragraph = document.add_paragraph(f"Clause {paragraph_index} was agreed on ")
+        paragraph.add_run("5th of October, 2024").bold = True
+        paragraph.add_run(" by both parties.")
+    file = BytesIO()
+    document.save(file)
+    return file.getvalue()
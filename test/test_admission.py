@@ -0,0 +1,140 @@
+import unittest
+import asyncio
+import zipfile
+from io import BytesIO
+from unittest import mock
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from starlette.datastructures import UploadFile
+from fastapi.testclient import TestClient
+
+from server import main
+from server.admission import ParseAdmission, RequestSizeLimit, check_archive
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+def make_zip_bomb(uncompressed_bytes: int) -> bytes:
+    file = BytesIO()
+    with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('word/document.xml', b'\0' * uncompressed_bytes)
+    return file.getvalue()
+
+class TestArchiveCheck(unittest.TestCase):
+    def test_documents_pass(self):
+        check_archive(make_docx(20), max_uncompressed_bytes=10 * 1024 * 1024, max_compression_ratio=100)
+        check_archive(b'not a zip file', max_uncompressed_bytes=1, max_compression_ratio=1)
+
+    def test_declared_sizes_are_limited(self):
+        bomb = make_zip_bomb(10 * 1024 * 1024)
+        with self.assertRaises(HTTPException) as context:
+            check_archive(bomb, max_uncompressed_bytes=0, max_compression_ratio=100)
+        self.assertEqual(context.exception.status_code, 413)
+        with self.assertRaises(HTTPException):
+            check_archive(bomb, max_uncompressed_bytes=1024 * 1024, max_compression_ratio=0)
+        check_archive(bomb, max_uncompressed_bytes=0, max_compression_ratio=0)
+
+class TestParseAdmission(unittest.IsolatedAsyncioTestCase):
+    async def test_files_queue_until_the_queue_is_full(self):
+        admission = ParseAdmission(max_concurrent=1, max_queued=1)
+        release = asyncio.Event()
+
+        async def parse(reject_when_full: bool = True):
+            async with admission.slot(reject_when_full):
+                await release.wait()
+
+        running = asyncio.create_task(parse())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(parse())
+        await asyncio.sleep(0)
+        self.assertEqual(admission.waiting, 1)
+        with self.assertRaises(HTTPException) as context:
+            admission.check()
+        self.assertEqual(context.exception.status_code, 429)
+
+        # work that is bounded elsewhere waits instead
+        bounded = asyncio.create_task(parse(reject_when_full=False))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(running, waiting, bounded)
+        self.assertEqual(admission.waiting, 0)
+
+class TestUploadLimits(unittest.IsolatedAsyncioTestCase):
+    async def test_uploads_are_turned_away_when_the_queue_is_full(self):
+        admission = ParseAdmission(max_concurrent=1, max_queued=0)
+        transport = httpx.ASGITransport(app=main.app)
+        with mock.patch.object(main, 'parse_admission', admission), mock.patch.object(main, 'result_cache', None):
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                async with admission.slot():
+                    response = await client.post('/api/v1/docx', files=[('files', ('first.docx', make_docx(1), DOCX_CONTENT_TYPE))])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['retry-after'], '1')
+
+    async def test_queued_uploads_are_not_read_until_their_turn(self):
+        admission = ParseAdmission(max_concurrent=1, max_queued=10)
+        transport = httpx.ASGITransport(app=main.app)
+        reads = []
+        original_read = UploadFile.read
+
+        async def read(file: UploadFile, *args):
+            reads.append(file.filename)
+            return await original_read(file, *args)
+
+        with mock.patch.object(main, 'parse_admission', admission), mock.patch.object(main, 'result_cache', None), \
+                mock.patch.object(UploadFile, 'read', read):
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                def upload(path: str, filename: str):
+                    return client.post(path, files=[('files', (filename, make_docx(1), DOCX_CONTENT_TYPE))])
+
+                async with admission.slot():
+                    uploads = asyncio.gather(
+                        upload('/api/v1/docx', 'first.docx'), upload('/api/v1/docx/stream', 'second.docx')
+                    )
+                    while admission.waiting < 2:
+                        await asyncio.sleep(0.01)
+                    self.assertEqual(reads, [])
+                responses = await uploads
+        self.assertEqual([ response.status_code for response in responses ], [200, 200])
+        self.assertIn('data', responses[1].json())
+        self.assertEqual(sorted(reads), ['first.docx', 'second.docx'])
+
+    def test_large_files_and_zip_bombs_are_rejected(self):
+        with mock.patch.object(main, 'max_file_bytes', 1024), TestClient(main.app) as client:
+            response = client.post('/api/v1/docx', files=[('files', ('first.docx', make_docx(20), DOCX_CONTENT_TYPE))])
+            self.assertEqual(response.status_code, 413)
+        with TestClient(main.app) as client:
+            response = client.post('/api/v1/docx', files=[('files', ('bomb.docx', make_zip_bomb(20 * 1024 * 1024), DOCX_CONTENT_TYPE))])
+            self.assertEqual(response.status_code, 413)
+            self.assertIn("compressed more than", response.json()['detail'])
+
+class TestRequestSizeLimit(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+
+        @app.post('/echo')
+        async def echo(request: Request):
+            return { 'size': len(await request.body()) }
+
+        app.add_middleware(RequestSizeLimit, max_bytes=100)
+        self.client = TestClient(app)
+
+    def test_requests_within_the_limit_pass(self):
+        self.assertEqual(self.client.post('/echo', content=b'x' * 100).json(), { 'size': 100 })
+
+    def test_content_length_over_the_limit(self):
+        self.assertEqual(self.client.post('/echo', content=b'x' * 101).status_code, 413)
+
+    def test_streamed_body_over_the_limit(self):
+        chunks = iter([b'x' * 60, b'x' * 60])
+        self.assertEqual(self.client.post('/echo', content=chunks).status_code, 413)
+
+    def test_rejections_have_cors_headers(self):
+        # so a browser on another origin sees the 413, not a CORS error
+        origin = main.allowed_origins[0]
+        with TestClient(main.app) as client:
+            response = client.post(
+                '/api/v1/docx', content=b'x', headers={ 'Content-Length': str(main.max_request_bytes + 1), 'Origin': origin }
+            )
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.headers['access-control-allow-origin'], origin)
+
+if __name__ == '__main__':
+    unittest.main()
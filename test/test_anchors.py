@@ -0,0 +1,102 @@
+import unittest
+from io import BytesIO
+from docx import Document
+from docx.table import Table
+
+from server.parse_docx import ScanOptions, find_dates_in_docx
+from server.parse_ooxml import find_dates_in_ooxml
+
+def make_anchored_docx() -> bytes:
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Draft"
+    document.sections[0].header.add_paragraph("Revised 2021-01-01 and 2021-02-02")
+    document.sections[0].footer.paragraphs[0].text = "Printed 2022-02-02"
+    document.add_paragraph("Signed on 2023-10-01,").add_run(" and again on 5th of October, 2024.")
+    table = document.add_table(rows=2, cols=2)
+    table.rows[0].cells[1].paragraphs[0].text = "Nothing"
+    table.rows[0].cells[1].add_paragraph("Due ").add_run("2015-01-10")
+    # spans both columns, so python-docx repeats it as cells 1 and 2
+    merged = table.rows[1].cells[0].merge(table.rows[1].cells[1])
+    merged.paragraphs[0].text = "Paid 2016-02-11"
+    document.add_paragraph("Split over the 5th").add_run(" of May, 2024")
+    document.add_paragraph("Amended 2025-03-03\tand 2025-04-04")
+    file = BytesIO()
+    document.save(file)
+    return file.getvalue()
+
+class TestAnchors(unittest.TestCase):
+    maxDiff = None
+
+    def find_dates(self, data: bytes, backend: str, options: ScanOptions = ScanOptions(anchors=True)):
+        if backend == 'ooxml':
+            return find_dates_in_ooxml(BytesIO(data), options=options)
+        return find_dates_in_docx(Document(BytesIO(data)), options=options)
+
+    def assert_anchors_find_dates(self, data: bytes, found_dates: list[dict]):
+        """Check that every anchor leads back to the date's text in the document."""
+        document = Document(BytesIO(data))
+        blocks = list(document.iter_inner_content())
+        for found_date in found_dates:
+            anchor = found_date['anchor']
+            with self.subTest(location=found_date['location']):
+                if found_date['type'] in ['header', 'footer']:
+                    paragraph = getattr(document.sections[0], found_date['type']).paragraphs[anchor['paragraph']]
+                    self.assertEqual(paragraph.text[anchor['start']:anchor['end']], found_date['found_text'])
+                    continue
+                block = blocks[anchor['block']]
+                if 'table' in anchor:
+                    self.assertIsInstance(block, Table)
+                    self.assertIs(block._tbl, document.tables[anchor['table']]._tbl)
+                    paragraph = block.rows[anchor['row']].cells[anchor['cell']].paragraphs[anchor['paragraph']]
+                else:
+                    self.assertIs(block._p, document.paragraphs[anchor['paragraph']]._p)
+                    paragraph = block
+                runs = [ run.text for run in paragraph.runs ]
+                self.assertEqual(''.join(runs)[anchor['start']:anchor['end']], found_date['found_text'])
+                if anchor['run'] == anchor['run_end']:
+                    self.assertEqual(runs[anchor['run']][anchor['run_offset']:anchor['run_end_offset']], found_date['found_text'])
+                else:
+                    self.assertTrue(found_date['found_text'].startswith(runs[anchor['run']][anchor['run_offset']:]))
+                    self.assertTrue(found_date['found_text'].endswith(runs[anchor['run_end']][:anchor['run_end_offset']]))
+
+    def test_anchors(self):
+        data = make_anchored_docx()
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                found_dates = self.find_dates(data, backend)
+                self.assertEqual([ found_date['anchor'] for found_date in found_dates ], [
+                    { 'paragraph': 1, 'start': 8, 'end': 18 },
+                    { 'paragraph': 1, 'start': 23, 'end': 33 },
+                    { 'paragraph': 0, 'start': 8, 'end': 18 },
+                    { 'block': 0, 'paragraph': 0, 'run': 0, 'run_offset': 10, 'run_end': 0, 'run_end_offset': 20, 'start': 10, 'end': 20 },
+                    { 'block': 0, 'paragraph': 0, 'run': 1, 'run_offset': 14, 'run_end': 1, 'run_end_offset': 34, 'start': 35, 'end': 55 },
+                    { 'block': 3, 'paragraph': 2, 'run': 0, 'run_offset': 8, 'run_end': 0, 'run_end_offset': 18, 'start': 8, 'end': 18 },
+                    { 'block': 3, 'paragraph': 2, 'run': 0, 'run_offset': 23, 'run_end': 0, 'run_end_offset': 33, 'start': 23, 'end': 33 },
+                    { 'block': 1, 'table': 0, 'row': 0, 'cell': 1, 'paragraph': 1, 'run': 1, 'run_offset': 0, 'run_end': 1, 'run_end_offset': 10, 'start': 4, 'end': 14 },
+                    { 'block': 1, 'table': 0, 'row': 1, 'cell': 0, 'paragraph': 0, 'run': 0, 'run_offset': 5, 'run_end': 0, 'run_end_offset': 15, 'start': 5, 'end': 15 },
+                    { 'block': 1, 'table': 0, 'row': 1, 'cell': 1, 'paragraph': 0, 'run': 0, 'run_offset': 5, 'run_end': 0, 'run_end_offset': 15, 'start': 5, 'end': 15 },
+                ])
+                self.assert_anchors_find_dates(data, found_dates)
+
+    def test_anchors_of_dates_split_across_runs(self):
+        data = make_anchored_docx()
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                found_dates = self.find_dates(data, backend, ScanOptions(join_runs=True, anchors=True))
+                split = [ found_date for found_date in found_dates if found_date['location'] == 'paragraph 2, runs 1-2' ]
+                self.assertEqual([ found_date['anchor'] for found_date in split ], [
+                    { 'block': 2, 'paragraph': 1, 'run': 0, 'run_offset': 15, 'run_end': 1, 'run_end_offset': 13, 'start': 15, 'end': 31 },
+                ])
+                self.assert_anchors_find_dates(data, found_dates)
+
+    def test_anchors_are_opt_in(self):
+        data = make_anchored_docx()
+        for backend in ['python-docx', 'ooxml']:
+            for options in [ScanOptions(), ScanOptions(join_runs=True)]:
+                with self.subTest(backend=backend, options=options):
+                    found_dates = self.find_dates(data, backend, options)
+                    self.assertTrue(found_dates)
+                    self.assertFalse(any('anchor' in found_date for found_date in found_dates))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from bench.corpus import CorpusProfile, generate_document, generate_texts
+from bench.run import find_regressions
+from server.parse_docx import find_dates_in_docx
+
+class TestBenchmarkCorpus(unittest.TestCase):
+    def test_documents_are_reproducible(self):
+        profile = CorpusProfile('test', paragraphs=20, tables=1, table_rows=2, table_cols=2, sections=2, header_footer_lines=1)
+        first, second = generate_document(profile), generate_document(profile)
+        self.assertEqual(
+            [ paragraph.text for paragraph in first.paragraphs ],
+            [ paragraph.text for paragraph in second.paragraphs ]
+        )
+        self.assertEqual(find_dates_in_docx(first), find_dates_in_docx(second))
+        self.assertEqual(generate_texts(profile), generate_texts(profile))
+
+    def test_documents_have_the_profile_shape(self):
+        profile = CorpusProfile(
+            'test', paragraphs=30, runs_per_paragraph=4, tables=2, table_rows=3, table_cols=5,
+            sections=3, header_footer_lines=2, date_density=1.0
+        )
+        document = generate_document(profile)
+        # python-docx adds an empty paragraph for each section break
+        paragraphs = [ paragraph for paragraph in document.paragraphs if paragraph.runs ]
+        self.assertEqual(len(paragraphs), 30)
+        self.assertEqual({ len(paragraph.runs) for paragraph in paragraphs }, {4})
+        self.assertEqual([ (len(table.rows), len(table.columns)) for table in document.tables ], [(3, 5), (3, 5)])
+        self.assertEqual(len(document.sections), 3)
+        self.assertEqual(len(document.sections[0].header.paragraphs), 2)
+        self.assertTrue(document.sections[1].header.is_linked_to_previous)
+        # every run, cell and header line has a date
+        texts = [ run.text for paragraph in paragraphs for run in paragraph.runs ]
+        texts += [ cell.text for table in document.tables for row in table.rows for cell in row.cells ]
+        texts += [ paragraph.text for paragraph in document.sections[0].header.paragraphs ]
+        self.assertTrue(all(' on ' in text for text in texts))
+        self.assertEqual(len(generate_texts(profile)), 30 * 4 + 2 * 3 * 5 + 2 * 2 * 2)
+
+    def test_documents_without_dates(self):
+        profile = CorpusProfile('test', paragraphs=50, tables=1, table_rows=2, table_cols=2, date_density=0.0)
+        self.assertEqual(find_dates_in_docx(generate_document(profile)), [])
+
+    def test_regressions_past_the_threshold_are_found(self):
+        baseline = {
+            'fast': { 'throughput': 1000, 'peak_bytes': 1000 },
+            'lean': { 'throughput': 1000, 'peak_bytes': 1000 },
+        }
+        results = {
+            'fast': { 'throughput': 700, 'peak_bytes': 1100 },
+            'lean': { 'throughput': 900, 'peak_bytes': 1300 },
+            'new': { 'throughput': 1, 'peak_bytes': 1 },
+        }
+        self.assertEqual(len(find_regressions(results, baseline, 0.25)), 2)
+        self.assertEqual(find_regressions(results, baseline, 0.5), [])
+
+    def test_throughput_is_compared_relative_to_the_machine_speed(self):
+        baseline = {
+            'calibration': { 'throughput': 100, 'peak_bytes': 1 },
+            'fast': { 'throughput': 1000, 'peak_bytes': 1000 },
+        }
+        # the whole machine is half as fast, but the code isn't any slower
+        slower_machine = {
+            'calibration': { 'throughput': 50, 'peak_bytes': 1 },
+            'fast': { 'throughput': 500, 'peak_bytes': 1000 },
+        }
+        self.assertEqual(find_regressions(slower_machine, baseline, 0.25), [])
+        # the code got slower on the same machine
+        slower_code = { **slower_machine, 'calibration': { 'throughput': 100, 'peak_bytes': 1 } }
+        self.assertEqual(len(find_regressions(slower_code, baseline, 0.25)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
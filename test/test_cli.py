@@ -0,0 +1,82 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+import zipfile
+from contextlib import redirect_stderr
+
+from server import cli
+from test.helpers import make_docx
+
+class TestBulkCommandLine(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        root = self.directory.name
+        os.makedirs(os.path.join(root, 'corpus', 'nested'))
+        for path, paragraph_count in [('corpus/a.docx', 1), ('corpus/nested/b.docx', 2), ('loose.docx', 3)]:
+            with open(os.path.join(root, path), 'wb') as file:
+                file.write(make_docx(paragraph_count))
+        with open(os.path.join(root, 'corpus', 'notes.txt'), 'w') as file:
+            file.write("2024-01-01")
+        with open(os.path.join(root, 'corpus', 'broken.docx'), 'wb') as file:
+            file.write(b'not a zip file')
+        with zipfile.ZipFile(os.path.join(root, 'archive.zip'), 'w') as archive:
+            archive.writestr('inside.docx', make_docx(4))
+            archive.writestr('readme.txt', "not a document")
+        self.output = os.path.join(root, 'dates.jsonl')
+
+    def run_cli(self, *args: str):
+        root = self.directory.name
+        with redirect_stderr(io.StringIO()) as stderr:
+            cli.main([
+                os.path.join(root, 'corpus'), os.path.join(root, 'archive.zip'), os.path.join(root, '*.docx'),
+                '--output', self.output, '--workers', '2', *args
+            ])
+        with open(self.output) as output:
+            records = { record['path']: record for record in map(json.loads, output) }
+        return records, stderr.getvalue()
+
+    def test_scans_directories_archives_and_globs(self):
+        records, stderr = self.run_cli()
+        root = self.directory.name
+
+        self.assertEqual(sorted(records), sorted([
+            os.path.join(root, 'corpus', 'a.docx'),
+            os.path.join(root, 'corpus', 'broken.docx'),
+            os.path.join(root, 'corpus', 'nested', 'b.docx'),
+            os.path.join(root, 'archive.zip') + '!inside.docx',
+            os.path.join(root, 'loose.docx'),
+        ]))
+        self.assertEqual(len(records[os.path.join(root, 'corpus', 'nested', 'b.docx')]['dates']), 2)
+        self.assertEqual(len(records[os.path.join(root, 'archive.zip') + '!inside.docx']['dates']), 4)
+        self.assertIn('error', records[os.path.join(root, 'corpus', 'broken.docx')])
+        self.assertIn("Done: 5 documents (1 errors, 0 already done), 10 dates", stderr)
+
+    def test_resumes_after_an_interruption(self):
+        records, _stderr = self.run_cli()
+        # keep the first two results and half of the third, as if the run was killed while writing
+        with open(self.output) as output:
+            lines = output.readlines()
+        with open(self.output, 'w') as output:
+            output.writelines(lines[:2])
+            output.write(lines[2][:10])
+
+        resumed_records, stderr = self.run_cli('--resume')
+        with open(self.output) as output:
+            self.assertEqual(len(output.readlines()), 5)
+        self.assertEqual(resumed_records, records)
+        self.assertIn("Done: 3 documents", stderr)
+        self.assertIn("2 already done", stderr)
+
+    def test_limits_must_be_positive(self):
+        for args in [['--limit', '0'], ['--limit', '-1'], ['--workers', '0']]:
+            with self.subTest(args=args), redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+                cli.main([self.directory.name, *args])
+            self.assertIn("must be at least 1", stderr.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import json
+from unittest import mock
+import msgpack
+from fastapi.testclient import TestClient
+
+from server import main, encoding
+from server.encoding import compact_found_dates, negotiate_media_type
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+def expand_found_dates(compact: dict) -> list[dict]:
+    """Turn compact found dates back into the default format."""
+    texts, columns = compact['texts'], compact['dates']
+    found_dates = []
+    for index in range(len(columns['found_date'])):
+        text = texts[columns['text'][index]]
+        found_date = {
+            'found_date': columns['found_date'][index],
+            'found_text': columns['found_text'][index],
+            'context': text[columns['context_start'][index]:columns['context_end'][index]],
+            'type': columns['type'][index],
+            'location': columns['location'][index],
+            'text': text,
+        }
+        if 'sections' in columns: found_date['sections'] = columns['sections'][index]
+        if 'anchor' in columns: found_date['anchor'] = columns['anchor'][index]
+        found_dates.append(found_date)
+    return found_dates
+
+class TestCompactFormat(unittest.TestCase):
+    def test_texts_are_stored_once(self):
+        text = "Signed 2023-10-01 and countersigned 2023-10-02 and sealed"
+        found_dates = [
+            { 'found_date': f'2023-10-0{day}T00:00:00Z', 'found_text': f'2023-10-0{day}', 'context': f'ned 2023-10-0{day} and',
+              'type': 'run', 'location': 'paragraph 1, run 1', 'text': text }
+            for day in [1, 2]
+        ]
+        compact = compact_found_dates(found_dates)
+        self.assertEqual(compact['texts'], [text])
+        self.assertEqual(compact['dates']['text'], [0, 0])
+        self.assertNotIn('sections', compact['dates'])
+        self.assertNotIn('anchor', compact['dates'])
+        self.assertEqual(expand_found_dates(compact), found_dates)
+
+    def test_media_type_negotiation(self):
+        self.assertEqual(negotiate_media_type(None), 'application/json')
+        self.assertEqual(negotiate_media_type('*/*'), 'application/json')
+        self.assertEqual(negotiate_media_type('application/msgpack'), 'application/msgpack')
+        self.assertEqual(negotiate_media_type('application/json;q=0.5, application/x-msgpack'), 'application/msgpack')
+        self.assertEqual(negotiate_media_type('application/msgpack;q=0.1, application/json'), 'application/json')
+        self.assertIsNone(negotiate_media_type('text/html'))
+        with mock.patch.object(encoding, 'msgpack', None):
+            self.assertIsNone(negotiate_media_type('application/msgpack'))
+
+    def test_json_is_encoded_without_orjson(self):
+        with mock.patch.object(encoding, 'orjson', None):
+            self.assertEqual(json.loads(encoding.encode({ 'text': "Ångström" })), { 'text': "Ångström" })
+
+class TestCompactResponses(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_docx(20)
+        cls.disabled_cache = mock.patch.object(main, 'result_cache', None)
+        cls.disabled_cache.start()
+        cls.client = TestClient(main.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.disabled_cache.stop()
+
+    def upload(self, url: str, headers: dict = {}):
+        return self.client.post(url, files=[('files', ('first.docx', self.data, DOCX_CONTENT_TYPE))], headers=headers)
+
+    def test_default_shape_is_unchanged(self):
+        response = self.upload('/api/v1/docx')
+        self.assertEqual(response.headers['content-type'], 'application/json')
+        found_dates = response.json()['data']['first.docx']
+        self.assertEqual(len(found_dates), 20)
+        self.assertEqual(set(found_dates[0]), { 'found_date', 'found_text', 'context', 'type', 'location', 'text' })
+
+    def test_compact_response_holds_the_same_dates(self):
+        for query in ['', '&anchors=true']:
+            with self.subTest(query=query):
+                default_response = self.upload(f'/api/v1/docx?compact=false{query}')
+                compact_response = self.upload(f'/api/v1/docx?compact=true{query}')
+                self.assertEqual(
+                    expand_found_dates(compact_response.json()['data']['first.docx']),
+                    default_response.json()['data']['first.docx']
+                )
+                self.assertLess(len(compact_response.content), len(default_response.content))
+
+    def test_msgpack_response(self):
+        response = self.upload('/api/v1/docx?compact=true', headers={ 'Accept': 'application/msgpack' })
+        self.assertEqual(response.headers['content-type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), self.upload('/api/v1/docx?compact=true').json())
+
+    def test_unacceptable_media_type(self):
+        self.assertEqual(self.upload('/api/v1/docx', headers={ 'Accept': 'text/html' }).status_code, 406)
+
+    def test_compact_stream_records(self):
+        response = self.upload('/api/v1/docx/stream?compact=true')
+        record = json.loads(response.text.splitlines()[0])
+        self.assertEqual(len(record['data']['dates']['found_date']), 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import unittest
+import hashlib
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import time
+from datetime import date, timedelta
+from unittest import mock
+from fastapi.testclient import TestClient
+
+from server import main, date_index
+from server.date_index import DateIndex
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+def found_date(day: date, location: str = 'paragraph 1, run 1') -> dict:
+    text = f"Signed on {day.isoformat()}"
+    return {
+        'found_date': f'{day.isoformat()}T00:00:00Z', 'found_text': day.isoformat(),
+        'context': text, 'type': 'run', 'location': location, 'text': text,
+    }
+
+class TestDateIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'index.sqlite3')
+        self.index = DateIndex(self.path)
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def test_documents_mentioning_a_range_of_dates(self):
+        self.index.add('a' * 64, 'first.docx', [], [ found_date(date(2020, 1, 1)), found_date(date(2021, 6, 1)) ])
+        self.index.add('b' * 64, 'second.docx', [], [ found_date(date(2021, 1, 1)), found_date(date(2021, 3, 1)), found_date(date(2030, 1, 1)) ])
+        self.index.add('c' * 64, 'third.docx', [], [])
+
+        self.assertEqual(self.index.find_documents(date(2021, 1, 1), date(2021, 12, 31)), [
+            { 'hash': 'b' * 64, 'filename': 'second.docx', 'dates': 2, 'first_date': '2021-01-01', 'last_date': '2021-03-01' },
+            { 'hash': 'a' * 64, 'filename': 'first.docx', 'dates': 1, 'first_date': '2021-06-01', 'last_date': '2021-06-01' },
+        ])
+        self.assertEqual([ document['filename'] for document in self.index.find_documents(date_from=date(2025, 1, 1)) ], ['second.docx'])
+        self.assertEqual([ document['filename'] for document in self.index.find_documents(date_to=date(2020, 1, 1)) ], ['first.docx'])
+        self.assertEqual(len(self.index.find_documents(limit=1, offset=1)), 1)
+        self.assertEqual(self.index.counts(), { 'documents': 3, 'dates': 5 })
+
+    def test_documents_are_replaced_and_kept_across_restarts(self):
+        dates = [ found_date(date(2020, 1, 1), 'paragraph 2, run 1'), found_date(date(2019, 1, 1), 'paragraph 1, run 1') ]
+        self.assertTrue(self.index.add('a' * 64, 'first.docx', [], dates))
+        # already indexed with the same options
+        self.assertFalse(self.index.add('a' * 64, 'first.docx', [], dates))
+        self.assertTrue(self.index.add('a' * 64, 'first.docx', ['join_runs'], dates[:1]))
+        self.index.add('a' * 64, 'copy.docx', [], dates)
+
+        self.index.close()
+        self.index = DateIndex(self.path)
+        documents = self.index.get_document('a' * 64)
+        self.assertEqual([ (document['filename'], document['options'], len(document['dates'])) for document in documents ], [
+            ('copy.docx', [], 2), ('first.docx', ['join_runs'], 1)
+        ])
+        # in the order they were found, without any of the document's text
+        self.assertEqual(documents[0]['dates'], [
+            { 'day': '2020-01-01', 'location': 'paragraph 2, run 1' }, { 'day': '2019-01-01', 'location': 'paragraph 1, run 1' }
+        ])
+        self.assertEqual(self.index.delete('a' * 64, 'copy.docx'), 1)
+        self.assertEqual(self.index.counts(), { 'documents': 1, 'dates': 1 })
+
+    def test_documents_are_indexed_again_when_the_patterns_change(self):
+        dates = [ found_date(date(2020, 1, 1)) ]
+        self.assertTrue(self.index.add('a' * 64, 'first.docx', [], dates))
+        with mock.patch.object(date_index, 'pattern_set_version', 'changed'):
+            self.assertTrue(self.index.add('a' * 64, 'first.docx', [], dates))
+            self.assertFalse(self.index.add('a' * 64, 'first.docx', [], dates))
+
+    def test_old_and_excess_documents_are_removed(self):
+        self.index.close()
+        self.index = DateIndex(self.path, ttl=60, max_documents=2)
+        for document_index in range(3):
+            self.index.add(f'{document_index:064x}', 'document.docx', [], [ found_date(date(2020, 1, 1)) ])
+        # the oldest document goes first
+        self.assertEqual([ document['hash'][-1] for document in self.index.find_documents() ], ['1', '2'])
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(self.index.find_documents(), [])
+            self.assertEqual(self.index.counts(), { 'documents': 0, 'dates': 0 })
+
+    def test_documents_indexed_again_are_kept_longest(self):
+        self.index.close()
+        self.index = DateIndex(self.path, ttl=60, max_documents=2)
+        started = time.time()
+        for document_index in range(2):
+            self.index.add(f'{document_index:064x}', 'document.docx', [], [ found_date(date(2020, 1, 1)) ])
+        with mock.patch('time.time', return_value=started + 40):
+            self.assertFalse(self.index.add(f'{0:064x}', 'document.docx', [], [ found_date(date(2020, 1, 1)) ]))
+        with mock.patch('time.time', return_value=started + 50):
+            self.index.add(f'{2:064x}', 'document.docx', [], [ found_date(date(2020, 1, 1)) ])
+            self.assertEqual(sorted(document['hash'][-1] for document in self.index.find_documents()), ['0', '2'])
+        with mock.patch('time.time', return_value=started + 80):
+            self.assertEqual(sorted(document['hash'][-1] for document in self.index.find_documents()), ['0', '2'])
+
+    def test_tables_of_older_versions_are_replaced(self):
+        self.index.close()
+        connection = sqlite3.connect(self.path)
+        connection.executescript('''
+            DROP TABLE dates; DROP TABLE documents; PRAGMA user_version = 0;
+            CREATE TABLE documents (id INTEGER PRIMARY KEY, hash TEXT, found_date TEXT);
+        ''')
+        connection.close()
+        self.index = DateIndex(self.path)
+        self.assertTrue(self.index.add('a' * 64, 'first.docx', [], [ found_date(date(2020, 1, 1)) ]))
+        self.assertEqual(self.index.counts(), { 'documents': 1, 'dates': 1 })
+
+    def test_range_queries_on_a_large_index_are_fast(self):
+        generator = random.Random(1)
+        for document_index in range(2000):
+            days = [ date(1990, 1, 1) + timedelta(days=generator.randrange(365 * 40)) for _ in range(50) ]
+            self.index.add(f'{document_index:064x}', 'document.docx', [], [ found_date(day) for day in days ])
+
+        started = time.perf_counter()
+        documents = self.index.find_documents(date(2010, 3, 1), date(2010, 3, 31), limit=1000)
+        elapsed = time.perf_counter() - started
+        print(f"\nfound {len(documents)} of 2000 documents with 100000 dates in {elapsed * 1000:.1f}ms")
+        self.assertGreater(len(documents), 0)
+        self.assertTrue(all('2010-03-01' <= document['first_date'] <= '2010-03-31' for document in documents))
+        # timings are too noisy on shared machines to assert on, but only the dates in the range
+        # should be read, not every document's
+        plan = self.index._connection.execute(
+            'EXPLAIN QUERY PLAN SELECT document_id FROM dates WHERE day >= ? AND day <= ?', ('2010-03-01', '2010-03-31')
+        ).fetchall()
+        self.assertIn('USING COVERING INDEX dates_by_day', ' '.join(row[-1] for row in plan))
+
+class TestDateIndexEndpoints(unittest.TestCase):
+    def test_uploads_are_indexed(self):
+        data = make_docx(3)
+        document_hash = hashlib.sha256(data).hexdigest()
+        with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(main, 'index_db_path', os.path.join(directory, 'index.sqlite3')), \
+            TestClient(main.app) as client:
+            uploaded = client.post('/api/v1/docx', files=[('files', ('first.docx', data, DOCX_CONTENT_TYPE))]).json()
+            # only some of the dates, so not indexed
+            client.post('/api/v1/docx?limit=1', files=[('files', ('limited.docx', data, DOCX_CONTENT_TYPE))])
+
+            response = client.get('/api/v1/index/documents?date_from=2024-10-01&date_to=2024-10-31').json()
+            self.assertEqual(response, { 'documents': [
+                { 'hash': document_hash, 'filename': 'first.docx', 'dates': 3, 'first_date': '2024-10-05', 'last_date': '2024-10-05' }
+            ] })
+            self.assertEqual(client.get('/api/v1/index/documents?date_from=2025-01-01').json(), { 'documents': [] })
+            self.assertEqual(client.get('/api/v1/index/documents?date_from=2025-01-01&date_to=2024-01-01').status_code, 400)
+
+            response = client.get(f'/api/v1/index/documents/{document_hash}').json()
+            self.assertEqual(response['documents'][0]['dates'], [
+                { 'day': found_date['found_date'][:10], 'location': found_date['location'] }
+                for found_date in uploaded['data']['first.docx']
+            ])
+
+            self.assertEqual(client.delete(f'/api/v1/index/documents/{document_hash}').status_code, 204)
+            self.assertEqual(client.get(f'/api/v1/index/documents/{document_hash}').status_code, 404)
+
+    def test_queued_uploads_are_indexed(self):
+        data = make_docx(2)
+        with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(main, 'index_db_path', os.path.join(directory, 'index.sqlite3')), \
+            mock.patch.object(main, 'jobs_db_path', os.path.join(directory, 'jobs.sqlite3')), \
+            TestClient(main.app) as client:
+            job_id = client.post('/api/v1/jobs', files=[('files', ('queued.docx', data, DOCX_CONTENT_TYPE))]).json()['jobs'][0]['id']
+            for _ in range(200):
+                if client.get(f'/api/v1/jobs/{job_id}').json()['status'] in ['done', 'failed']: break
+                time.sleep(0.05)
+            response = client.get(f'/api/v1/index/documents/{hashlib.sha256(data).hexdigest()}').json()
+            self.assertEqual([ document['filename'] for document in response['documents'] ], ['queued.docx'])
+
+    def test_disabled_index(self):
+        with mock.patch.object(main, 'index_db_path', ''), TestClient(main.app) as client:
+            self.assertEqual(client.get('/api/v1/index/documents').status_code, 503)
+
+if __name__ == '__main__':
+    unittest.main()
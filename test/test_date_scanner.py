@@ -0,0 +1,111 @@
+import unittest
+import random
+from datetime import datetime
+
+from server.metrics import ParseStats
+from server.parse_docx import _find_dates_in_text, _search_date_patterns, compiled_patterns, month_names, normalize_date
+
+# The original scanner, running every pattern over the whole text
+def search_date_patterns_per_pattern(text: str):
+    found_dates = []
+    if not text.strip(): return found_dates
+
+    found_positions = set()
+    for pattern in compiled_patterns:
+        for match in pattern.finditer(text):
+            if match.start() not in found_positions:
+                found_dates.append((match.start(), match))
+                found_positions.add(match.start())
+
+    return [ date for _start, date in sorted(found_dates, key=lambda x: x[0]) ]
+
+# The original normalization, building a datetime for every match
+def normalize_date_with_datetime(match, century: int):
+    match_groups = match.groupdict()
+    try:
+        return datetime(
+            year = int(match_groups['year']) if len(match_groups['year']) == 4 else int(match_groups['year']) + century,
+            month = int(match_groups['month']) if match_groups.get('month') is not None else month_names[match_groups['month_name'].capitalize()],
+            day=int(match_groups['day']),
+        ).isoformat() + "Z"
+    except ValueError:
+        return None
+
+def describe_matches(matches):
+    return [ (match.span(), match.re.pattern, match.groupdict()) for match in matches ]
+
+# Pieces that combine into dates, near-dates and overlapping dates
+TOKENS = [
+    '1', '5', '05', '12', '13', '31', '32', '00', '19', '2019', '2024', '99', '123', '2025-08-135',
+    '/', '-', '/', '-', ' ', ' ', ' ', ',', '.', ', ', ' of ', ' the ', 'st', 'th', 'nd', 'rd',
+    'Jan', 'January', 'FEB', 'february', 'Mar', 'Marrch', 'May', 'June', 'Jul', 'Sep', 'Septober',
+    'Oct', 'October', 'nov', 'Dec', 'dated', 'a', 'is', '\n', '\t', 'x', '_',
+]
+
+class TestDateScanner(unittest.TestCase):
+    maxDiff = None
+
+    def test_text_without_dates(self):
+        self.assertEqual(_search_date_patterns(""), [])
+        self.assertEqual(_search_date_patterns("   "), [])
+        self.assertEqual(_search_date_patterns("No digits here, not even in October."), [])
+
+    def test_priority_of_patterns_at_the_same_position(self):
+        # DD/MM/YYYY wins over MM/DD/YYYY when both could match
+        matches = _search_date_patterns("On 05/06/2019 and 2019-06-05.")
+        self.assertEqual(
+            [ (match.group(0), match.re) for match in matches ],
+            [ ('05/06/2019', compiled_patterns[0]), ('2019-06-05', compiled_patterns[1]) ]
+        )
+
+    def test_equivalence_with_per_pattern_search(self):
+        samples = [
+            "This document has multiple dates: 2023-10-01, 2024-01-15, and 01-12-2025.",
+            "5th of October, 2024 and October 5 of 2024 and 31/12/2025.",
+            "Just some non-dates: 2025-08-135, 30/13/1996, Septober 6, 2000.",
+            "Some more dates with bad numbers: 32-11-2022 / 04 / 00-04-00.",
+            "05/02/2019 00:00:00, February 5, 2019, 5-Feb-2019, 05-06-19 0:00",
+            "12/12/12/12/12/12 1-1-1-1-1 Jan-1-2020-Feb-2-2021 2020/13/Dec/01",
+        ]
+        generator = random.Random(20240917)
+        for _ in range(3000):
+            samples.append(''.join(
+                generator.choice(TOKENS) for _ in range(generator.randint(1, 30))
+            ))
+
+        for text in samples:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    describe_matches(_search_date_patterns(text)),
+                    describe_matches(search_date_patterns_per_pattern(text))
+                )
+
+class TestDateNormalizer(unittest.TestCase):
+    def normalize(self, text: str, century: int = 2000):
+        return [ normalize_date(match, century) for match in _search_date_patterns(text) ]
+
+    def test_month_names_in_any_case(self):
+        self.assertEqual(
+            [ self.normalize(text)[0] for text in ["5 JANUARY 2024", "6 january 2024", "7 jAn 2024", "March 8, 2024", "9-mar-2024"] ],
+            [ '2024-01-05T00:00:00Z', '2024-01-06T00:00:00Z', '2024-01-07T00:00:00Z', '2024-03-08T00:00:00Z', '2024-03-09T00:00:00Z' ]
+        )
+        stats = ParseStats()
+        found_dates = _find_dates_in_text("Signed on 5 FEBRUARY 2024", data={ 'type': 'run', 'location': 'paragraph 1, run 1', 'text': '' }, stats=stats)
+        self.assertEqual(found_dates[0]['found_date'], '2024-02-05T00:00:00Z')
+
+    def test_invalid_dates(self):
+        self.assertEqual(
+            self.normalize("31/04/2024 29/02/2023 29/02/2024 29/02/1900 29/02/2000 01-01-0000 31-12-99"),
+            [ None, None, '2024-02-29T00:00:00Z', None, '2000-02-29T00:00:00Z', None, '2099-12-31T00:00:00Z' ]
+        )
+
+    def test_equivalence_with_datetime(self):
+        generator = random.Random(20250101)
+        for _ in range(3000):
+            text = ''.join(generator.choice(TOKENS) for _ in range(generator.randint(1, 30)))
+            for match in _search_date_patterns(text):
+                with self.subTest(text=text, match=match.group(0)):
+                    self.assertEqual(normalize_date(match, 2000), normalize_date_with_datetime(match, 2000))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import unittest
+from io import BytesIO
+from unittest import mock
+from docx import Document
+from docx.enum.section import WD_SECTION
+from fastapi.testclient import TestClient
+
+from server import main
+from server.cache import ResultCache
+from server.incremental import IncrementalScan
+from server.metrics import ParseStats
+from server.parse_docx import ScanOptions
+from server.parse_ooxml import find_dates_in_ooxml
+from test.helpers import DOCX_CONTENT_TYPE
+
+def make_revision(clauses: list[str], header_text: str = "Header revised 2021-01-01") -> bytes:
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = header_text
+    document.sections[0].footer.paragraphs[0].text = "Footer printed 2022-02-02"
+    for clause in clauses:
+        document.add_paragraph(clause)
+    # a second section sharing the first one's header and footer
+    document.add_section(WD_SECTION.NEW_PAGE)
+    document.add_paragraph("Annex signed on 2023-03-03")
+    table = document.add_table(rows=2, cols=2)
+    for row_index, row in enumerate(table.rows):
+        for cell_index, cell in enumerate(row.cells):
+            cell.text = f"Due 2015-0{row_index + 1}-1{cell_index}"
+    file = BytesIO()
+    document.save(file)
+    return file.getvalue()
+
+CLAUSES = [ f"Clause {index} was signed on {2000 + index}-06-15 by both parties" for index in range(20) ]
+
+class TestIncrementalScan(unittest.TestCase):
+    def rescan(self, data: bytes, options: ScanOptions, previous: dict = None):
+        stats = ParseStats()
+        incremental = IncrementalScan(options, previous)
+        found_dates = find_dates_in_ooxml(BytesIO(data), stats, options, incremental)
+        # the state is stored as JSON between revisions
+        return found_dates, stats, json.loads(json.dumps(incremental.to_dict()))
+
+    def assert_same_as_full_scan(self, revisions: list[bytes], options: ScanOptions = ScanOptions()) -> list[ParseStats]:
+        all_stats = []
+        state = None
+        for revision_index, data in enumerate(revisions):
+            found_dates, stats, state = self.rescan(data, options, state)
+            with self.subTest(revision=revision_index):
+                self.assertEqual(found_dates, find_dates_in_ooxml(BytesIO(data), options=options))
+            all_stats.append(stats)
+        return all_stats
+
+    def test_changed_body_reuses_headers_and_unchanged_paragraphs(self):
+        revised_clauses = CLAUSES.copy()
+        revised_clauses[5] = "Clause 5 was amended on 2024-12-24"
+        revised_clauses.insert(0, "Preamble dated 1999-09-09")
+        _first, revised = self.assert_same_as_full_scan([ make_revision(CLAUSES), make_revision(revised_clauses) ])
+        # the header and footer parts
+        self.assertEqual(revised.parts_reused, 2)
+        # every unchanged paragraph, even though they all moved down by one, along with the section
+        # break and the annex
+        self.assertEqual(revised.paragraphs_reused, len(CLAUSES) - 1 + 2)
+
+    def test_changed_header_reuses_the_body(self):
+        _first, revised = self.assert_same_as_full_scan([
+            make_revision(CLAUSES), make_revision(CLAUSES, header_text="Header revised 2025-05-05")
+        ])
+        # the document part and the footer part
+        self.assertEqual(revised.parts_reused, 2)
+        # only the header was scanned
+        self.assertEqual(revised.runs_scanned, 1)
+
+    def test_unchanged_document_is_not_scanned(self):
+        for options in [ScanOptions(), ScanOptions(list_sections=True), ScanOptions(limit=5)]:
+            with self.subTest(options=options):
+                _first, unchanged = self.assert_same_as_full_scan([ make_revision(CLAUSES) ] * 2, options)
+                self.assertEqual(unchanged.runs_scanned, 0)
+
+    def test_several_revisions(self):
+        revisions = [ make_revision(CLAUSES[:count], header_text=f"Header revised 20{count}-01-01") for count in [5, 10, 10, 3] ]
+        for options in [ScanOptions(), ScanOptions(list_sections=True), ScanOptions(parts=frozenset({'header', 'runs'}))]:
+            with self.subTest(options=options):
+                self.assert_same_as_full_scan(revisions, options)
+
+    def test_results_of_other_options_are_not_reused(self):
+        _found_dates, _stats, state = self.rescan(make_revision(CLAUSES), ScanOptions())
+        self.assertTrue(IncrementalScan(ScanOptions(), state).has_previous)
+        self.assertFalse(IncrementalScan(ScanOptions(limit=3), state).has_previous)
+        self.assertFalse(IncrementalScan(ScanOptions(), { **state, 'version': 'older patterns' }).has_previous)
+
+class TestIncrementalEndpoint(unittest.TestCase):
+    def test_lineage(self):
+        first, revised = make_revision(CLAUSES), make_revision(CLAUSES[:-1])
+        lineage_store = ResultCache(max_entries=10, max_bytes=1024 * 1024)
+        with mock.patch.object(main, 'result_cache', None), mock.patch.object(main, 'lineage_store', lineage_store), \
+                TestClient(main.app) as client:
+            def upload(data: bytes, query: str = ''):
+                response = client.post(f'/api/v1/docx?{query}', files=[('files', ('contract.docx', data, DOCX_CONTENT_TYPE))])
+                self.assertEqual(response.status_code, 200)
+                return response.json()
+
+            self.assertEqual(upload(first, 'lineage=contract-7')['cache'], { 'contract.docx': 'miss' })
+            response = upload(revised, 'lineage=contract-7&timings=true')
+            self.assertEqual(response['cache'], { 'contract.docx': 'incremental' })
+            self.assertEqual(response['timings']['contract.docx']['paragraphs_reused'], len(CLAUSES) - 1 + 2)
+            self.assertEqual(response['data'], upload(revised)['data'])
+            # another lineage doesn't share the first one's revisions
+            self.assertEqual(upload(revised, 'lineage=contract-8')['cache'], { 'contract.docx': 'miss' })
+
+if __name__ == '__main__':
+    unittest.main()
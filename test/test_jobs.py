@@ -0,0 +1,162 @@
+import unittest
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from server import main
+from server.admission import ParseAdmission
+from server.jobs import JobQueue, JobRunner
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+OPTIONS = { 'backend': 'ooxml', 'list_sections': False }
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'jobs.sqlite3')
+        self.queue = JobQueue(self.path, max_attempts=2, retry_delay=60, result_ttl=60)
+
+    def tearDown(self):
+        self.queue.close()
+        self.directory.cleanup()
+
+    def test_jobs_are_claimed_in_order_and_once(self):
+        first_id = self.queue.submit(b'first', 'first.docx', OPTIONS)
+        second_id = self.queue.submit(b'second', 'second.docx', OPTIONS)
+        self.assertEqual(self.queue.claim()['id'], first_id)
+        self.assertEqual(self.queue.claim()['id'], second_id)
+        self.assertIsNone(self.queue.claim())
+        self.assertEqual(self.queue.counts()['running'], 2)
+
+    def test_transient_failures_are_retried_later(self):
+        job_id = self.queue.submit(b'data', 'first.docx', OPTIONS)
+        self.queue.claim()
+        self.assertEqual(self.queue.fail(job_id, "worker died", transient=True), 'queued')
+        # not before the retry delay has passed
+        self.assertIsNone(self.queue.claim())
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(self.queue.claim()['attempts'], 2)
+        self.assertEqual(self.queue.fail(job_id, "worker died", transient=True), 'failed')
+        self.assertEqual(self.queue.get(job_id)['error'], "worker died")
+
+    def test_other_failures_are_not_retried(self):
+        job_id = self.queue.submit(b'data', 'first.docx', OPTIONS)
+        self.queue.claim()
+        self.assertEqual(self.queue.fail(job_id, "File is not a zip file"), 'failed')
+
+    def test_results_expire(self):
+        job_id = self.queue.submit(b'data', 'first.docx', OPTIONS)
+        self.queue.claim()
+        self.queue.complete(job_id, [{ 'found_date': '2024-10-05T00:00:00Z' }])
+        self.assertEqual(self.queue.result(job_id), [{ 'found_date': '2024-10-05T00:00:00Z' }])
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(self.queue.get(job_id))
+            self.assertEqual(self.queue.expire(), 1)
+
+    def test_running_jobs_are_queued_again_after_a_restart(self):
+        job_id = self.queue.submit(b'data', 'first.docx', OPTIONS)
+        self.queue.claim()
+        self.queue.close()
+        self.queue = JobQueue(self.path)
+        self.assertEqual(self.queue.recover(), 1)
+        self.assertEqual(self.queue.claim()['id'], job_id)
+
+class TestJobRunner(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_is_bounded_and_transient_failures_retried(self):
+        with tempfile.TemporaryDirectory() as directory:
+            queue = JobQueue(os.path.join(directory, 'jobs.sqlite3'), retry_delay=0)
+            running = 0
+            most_running = 0
+            attempts: dict[bytes, int] = {}
+
+            async def process(data: bytes, filename: str, options: dict):
+                nonlocal running, most_running
+                running += 1
+                most_running = max(most_running, running)
+                await asyncio.sleep(0.05)
+                running -= 1
+                attempts[data] = attempts.get(data, 0) + 1
+                if data == b'flaky' and attempts[data] == 1: raise BrokenProcessPool("worker died")
+                return [{ 'found_text': data.decode() }]
+
+            runner = JobRunner(queue, process, concurrency=2, poll_interval=0.05)
+            runner.start()
+            job_ids = [ queue.submit(data, None, OPTIONS) for data in [b'flaky', b'a', b'b', b'c'] ]
+            runner.notify()
+            for _ in range(100):
+                if queue.counts()['done'] == len(job_ids): break
+                await asyncio.sleep(0.05)
+            await runner.stop()
+
+            self.assertEqual(most_running, 2)
+            self.assertEqual(queue.result(job_ids[0]), [{ 'found_text': 'flaky' }])
+            self.assertEqual(queue.get(job_ids[0])['attempts'], 2)
+            queue.close()
+
+class TestJobEndpoints(unittest.TestCase):
+    def test_submitted_job_gives_the_synchronous_result(self):
+        data = make_docx(5)
+        with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(main, 'jobs_db_path', os.path.join(directory, 'jobs.sqlite3')), \
+            mock.patch.object(main, 'result_cache', None), \
+            TestClient(main.app) as client:
+            response = client.post('/api/v1/jobs?backend=ooxml', files=[('files', ('first.docx', data, DOCX_CONTENT_TYPE))])
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()['jobs'][0]['id']
+
+            for _ in range(200):
+                job = client.get(f'/api/v1/jobs/{job_id}').json()
+                if job['status'] in ['done', 'failed']: break
+                time.sleep(0.05)
+            self.assertEqual(job['status'], 'done')
+
+            result = client.get(f'/api/v1/jobs/{job_id}/result').json()
+            expected = client.post('/api/v1/docx?backend=ooxml', files=[('files', ('first.docx', data, DOCX_CONTENT_TYPE))]).json()
+            self.assertEqual(result, { 'filename': 'first.docx', 'data': expected['data']['first.docx'] })
+
+            self.assertEqual(client.delete(f'/api/v1/jobs/{job_id}').status_code, 204)
+            self.assertEqual(client.get(f'/api/v1/jobs/{job_id}').status_code, 404)
+
+    def test_failed_job(self):
+        with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(main, 'jobs_db_path', os.path.join(directory, 'jobs.sqlite3')), \
+            TestClient(main.app) as client:
+            job_id = client.post('/api/v1/jobs', files=[('files', ('broken.docx', b'not a zip file', DOCX_CONTENT_TYPE))]).json()['jobs'][0]['id']
+            for _ in range(200):
+                job = client.get(f'/api/v1/jobs/{job_id}').json()
+                if job['status'] in ['done', 'failed']: break
+                time.sleep(0.05)
+            self.assertEqual((job['status'], job['attempts']), ('failed', 1))
+            self.assertEqual(client.get(f'/api/v1/jobs/{job_id}/result').status_code, 500)
+
+    def test_requests_are_turned_away_as_a_whole(self):
+        files = [ ('files', (f'{name}.docx', make_docx(1), DOCX_CONTENT_TYPE)) for name in ['first', 'second', 'third'] ]
+        admission = ParseAdmission(max_concurrent=1, max_queued=0)
+        full = HTTPException(status_code=429, detail="Too many files are being parsed, try again later")
+        with tempfile.TemporaryDirectory() as directory, \
+            mock.patch.object(main, 'jobs_db_path', os.path.join(directory, 'jobs.sqlite3')), \
+            mock.patch.object(main, 'parse_admission', admission), \
+            TestClient(main.app) as client:
+            # the queue fills up once the first file has been stored, which doesn't turn away the rest
+            with mock.patch.object(admission, 'check', side_effect=[None, full, full]):
+                response = client.post('/api/v1/jobs', files=files)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual([ job['filename'] for job in response.json()['jobs'] ], ['first.docx', 'second.docx', 'third.docx'])
+
+            with mock.patch.object(admission, 'check', side_effect=full):
+                response = client.post('/api/v1/jobs', files=files)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(sum(main.job_queue.counts().values()), 3)
+
+    def test_disabled_job_queue(self):
+        with mock.patch.object(main, 'jobs_db_path', ''), TestClient(main.app) as client:
+            response = client.post('/api/v1/jobs', files=[('files', ('first.docx', make_docx(1), DOCX_CONTENT_TYPE))])
+            self.assertEqual(response.status_code, 503)
+
+if __name__ == '__main__':
+    unittest.main()
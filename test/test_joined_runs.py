@@ -0,0 +1,88 @@
+import unittest
+from io import BytesIO
+from docx import Document
+from fastapi.testclient import TestClient
+
+from server import main
+from server.metrics import ParseStats
+from server.parse_docx import ScanOptions, _run_span, find_dates_in_docx
+from server.parse_ooxml import find_dates_in_ooxml
+from bench.corpus import CorpusProfile, generate_docx
+from test.helpers import DOCX_CONTENT_TYPE
+
+def make_split_dates_docx() -> bytes:
+    document = Document()
+    paragraph = document.add_paragraph("Signed on the ")
+    paragraph.add_run("5th").bold = True
+    paragraph.add_run("")
+    paragraph.add_run(" of October, 2024")
+    paragraph.add_run(" and filed 2020-01-01.")
+    document.add_paragraph("Nothing to see here")
+    cell_paragraph = document.add_table(rows=1, cols=1).rows[0].cells[0].paragraphs[0]
+    cell_paragraph.add_run("Due 3")
+    cell_paragraph.add_run("/4/2021")
+    file = BytesIO()
+    document.save(file)
+    return file.getvalue()
+
+JOIN_RUNS = ScanOptions(join_runs=True)
+
+class TestJoinedRuns(unittest.TestCase):
+    def find_dates(self, data: bytes, backend: str, options: ScanOptions, stats: ParseStats = None):
+        if backend == 'ooxml':
+            return find_dates_in_ooxml(BytesIO(data), stats, options)
+        return find_dates_in_docx(Document(BytesIO(data)), stats, options)
+
+    def test_run_span(self):
+        # runs "ab", "", "cd" and "e"
+        run_starts = [0, 2, 2, 4]
+        self.assertEqual(_run_span(run_starts, 0, 2), 'run 1')
+        self.assertEqual(_run_span(run_starts, 1, 3), 'runs 1-3')
+        self.assertEqual(_run_span(run_starts, 2, 4), 'run 3')
+        self.assertEqual(_run_span(run_starts, 3, 5), 'runs 3-4')
+
+    def test_dates_split_across_runs(self):
+        data = make_split_dates_docx()
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                self.assertEqual(
+                    [ found_date['found_text'] for found_date in self.find_dates(data, backend, ScanOptions()) ],
+                    ['2020-01-01']
+                )
+                found_dates = self.find_dates(data, backend, JOIN_RUNS)
+                self.assertEqual(
+                    [ (found_date['location'], found_date['found_text']) for found_date in found_dates ],
+                    [
+                        ('paragraph 1, runs 2-4', '5th of October, 2024'),
+                        ('paragraph 1, run 5', '2020-01-01'),
+                        ('table 1, row 1, cell 1, paragraph 1, runs 1-2', '3/4/2021'),
+                    ]
+                )
+                self.assertEqual(found_dates[0]['text'], "Signed on the 5th of October, 2024 and filed 2020-01-01.")
+                self.assertEqual(found_dates[0]['context'], "ed on the 5th of October, 2024 and filed")
+
+                # once per paragraph instead of once per run
+                stats = ParseStats()
+                self.find_dates(data, backend, ScanOptions(parts=frozenset({'runs', 'tables'}), join_runs=True), stats)
+                self.assertEqual(stats.runs_scanned, 3)
+
+    def test_same_dates_as_runs_when_none_are_split(self):
+        profile = CorpusProfile('test', paragraphs=60, runs_per_paragraph=6, words_per_run=3, tables=1, table_rows=3, table_cols=3, date_density=0.5)
+        data = generate_docx(profile)
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                by_run = self.find_dates(data, backend, ScanOptions())
+                joined = self.find_dates(data, backend, JOIN_RUNS)
+                self.assertEqual(
+                    [ (found_date['found_date'], found_date['location']) for found_date in joined ],
+                    [ (found_date['found_date'], found_date['location']) for found_date in by_run ]
+                )
+
+    def test_query_parameter(self):
+        data = make_split_dates_docx()
+        with TestClient(main.app) as client:
+            response = client.post('/api/v1/docx?join_runs=true', files=[('files', ('split.docx', data, DOCX_CONTENT_TYPE))])
+        self.assertEqual(len(response.json()['data']['split.docx']), 3)
+
+if __name__ == '__main__':
+    unittest.main()
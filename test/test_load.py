@@ -0,0 +1,125 @@
+import unittest
+import asyncio
+import importlib.util
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from unittest import mock
+import httpx
+from fastapi.testclient import TestClient
+
+from server import main
+from server.main import app
+from server import workers
+from server.admission import ParseAdmission
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+def p99(latencies: list[float]) -> float:
+    return statistics.quantiles(latencies, n=100)[98]
+
+class TestParsingUnderLoad(unittest.IsolatedAsyncioTestCase):
+    """Small uploads should stay fast while large documents are being parsed."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.small_docx = make_docx(3)
+        cls.large_docx = make_docx(8000)
+        workers.configure_executor('process', 4)
+        # every upload has to be parsed, not served from the cache
+        cls.disabled_cache = mock.patch.object(main, 'result_cache', None)
+        cls.disabled_cache.start()
+        # as many files are parsed at once as there are workers
+        cls.admission = mock.patch.object(main, 'parse_admission', ParseAdmission(4, 64))
+        cls.admission.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.disabled_cache.stop()
+        cls.admission.stop()
+        workers.shutdown_executor()
+
+    async def upload(self, client: httpx.AsyncClient, data: bytes, name: str, finished: list[str]) -> float:
+        started = time.perf_counter()
+        response = await client.post('/api/v1/docx', files=[
+            ('files', ('document.docx', data, DOCX_CONTENT_TYPE))
+        ])
+        self.assertEqual(response.status_code, 200)
+        finished.append(name)
+        return time.perf_counter() - started
+
+    async def measure_small_uploads(self, client: httpx.AsyncClient, finished: list[str], count: int = 40) -> list[float]:
+        return [ await self.upload(client, self.small_docx, 'small', finished) for _ in range(count) ]
+
+    async def test_small_uploads_stay_responsive_during_large_uploads(self):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            # warm up the worker processes
+            await asyncio.gather(*[ self.upload(client, self.small_docx, 'small', []) for _ in range(8) ])
+            idle_latencies = await self.measure_small_uploads(client, [])
+
+            finished = []
+            large_uploads = asyncio.gather(*[ self.upload(client, self.large_docx, 'large', finished) for _ in range(2) ])
+            # give the large uploads a head start, so they're being parsed when the small ones arrive
+            await asyncio.sleep(0.05)
+            loaded_latencies = await self.measure_small_uploads(client, finished)
+            large_latencies = await large_uploads
+
+        print(
+            f"\nsmall upload p99: {p99(idle_latencies) * 1000:.1f}ms idle, "
+            f"{p99(loaded_latencies) * 1000:.1f}ms while large uploads take "
+            f"{max(large_latencies) * 1000:.0f}ms"
+        )
+        # Timings are too noisy on shared machines to assert on, but blocking the event loop would
+        # make the small uploads wait for the large ones to finish
+        self.assertEqual(finished, ['small'] * 40 + ['large'] * 2)
+
+class TestBrokenWorkerPool(unittest.TestCase):
+    def setUp(self):
+        workers.configure_executor('process', 2)
+        self.addCleanup(workers.shutdown_executor)
+        patcher = mock.patch.object(main, 'result_cache', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pool_is_replaced_when_a_worker_dies(self):
+        with TestClient(app) as client:
+            def upload():
+                return client.post('/api/v1/docx', files=[('files', ('document.docx', make_docx(3), DOCX_CONTENT_TYPE))])
+
+            self.assertEqual(upload().status_code, 200)
+            # a worker killed for running out of memory, say, breaks the whole pool
+            broken = workers.get_executor()
+            for process in list(broken._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+                process.join()
+
+            for _ in range(3):
+                response = upload()
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['data']['document.docx']), 3)
+            self.assertIsNot(workers.get_executor(), broken)
+
+class TestWorkerImports(unittest.TestCase):
+    def test_workers_do_not_import_the_app(self):
+        # the spawned workers import `server.workers` from scratch for every process
+        script = "import sys, server.workers; print(sorted(name for name in ['server.main', 'server.env', 'fastapi'] if name in sys.modules))"
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_app_is_listed(self):
+        script = "import server; print('app' in dir(server))"
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'True')
+
+    @unittest.skipUnless(importlib.util.find_spec('fastapi_cli'), "fastapi-cli isn't installed")
+    def test_cli_finds_the_app(self):
+        # what `fastapi run server` does to find the app
+        script = "from pathlib import Path; from fastapi_cli.discover import get_import_data; print(get_import_data(path=Path('server')).import_string)"
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip().splitlines()[-1], 'server:app')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from io import BytesIO
+from unittest import mock
+from docx import Document
+from fastapi.testclient import TestClient
+
+from server import main, metrics, workers
+from server.metrics import Counter, Histogram, ParseStats
+from server.parse_docx import find_dates_in_docx
+from server.parse_ooxml import find_dates_in_ooxml
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+class TestParseStats(unittest.TestCase):
+    def test_backends_count_the_same_work(self):
+        data = make_docx(3)
+        docx_stats, ooxml_stats = ParseStats(), ParseStats()
+        find_dates_in_docx(Document(BytesIO(data)), stats=docx_stats)
+        find_dates_in_ooxml(BytesIO(data), stats=ooxml_stats)
+
+        # three runs in each of three paragraphs, and python-docx adds an empty default header and
+        # footer when asked for a section's header that the document doesn't have
+        self.assertEqual((docx_stats.runs_scanned, docx_stats.matches_found, docx_stats.invalid_dates), (11, 3, 0))
+        self.assertEqual((ooxml_stats.runs_scanned, ooxml_stats.matches_found, ooxml_stats.invalid_dates), (9, 3, 0))
+        for stats in [docx_stats, ooxml_stats]:
+            for stage in ['scan_headers_footers', 'scan_paragraphs', 'scan_tables', 'match_dates']:
+                self.assertIn(stage, stats.timings)
+        self.assertIn('parse_xml', ooxml_stats.timings)
+
+    def test_stats_are_merged(self):
+        stats, other = ParseStats(), ParseStats()
+        stats.timings['parse'] = 1.0
+        other.timings['parse'] = 0.5
+        other.runs_scanned = 4
+        stats.merge(other)
+        self.assertEqual(stats.timings['parse'], 1.5)
+        self.assertEqual(stats.runs_scanned, 4)
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('test_seconds', "Test", [0.1, 1])
+        for value in [0.05, 0.5, 5]:
+            histogram.observe(value, stage='scan')
+        self.assertEqual(histogram.samples(), [
+            'test_seconds_bucket{stage="scan",le="0.1"} 1',
+            'test_seconds_bucket{stage="scan",le="1"} 2',
+            'test_seconds_bucket{stage="scan",le="+Inf"} 3',
+            'test_seconds_sum{stage="scan"} 5.55',
+            'test_seconds_count{stage="scan"} 3',
+        ])
+
+    def test_counter_is_split_by_labels(self):
+        counter = Counter('test_total', "Test")
+        counter.inc(backend='ooxml')
+        counter.inc(2, backend='ooxml')
+        counter.inc()
+        self.assertEqual(counter.value(backend='ooxml'), 3)
+        self.assertEqual(sorted(counter.samples()), ['test_total 1.0', 'test_total{backend="ooxml"} 3.0'])
+
+    def test_endpoint_exposes_stage_timings_and_counts(self):
+        workers.configure_executor('thread', 1)
+        data = make_docx(3)
+        try:
+            with mock.patch.object(main, 'result_cache', None), TestClient(main.app) as client:
+                parsed_before = metrics.files_parsed.value(backend='ooxml', cache='miss')
+                runs_before = metrics.runs_scanned.value()
+                response = client.post('/api/v1/docx?backend=ooxml&timings=true', files=[
+                    ('files', ('first.docx', data, DOCX_CONTENT_TYPE))
+                ])
+                exposition = client.get('/metrics')
+        finally:
+            workers.shutdown_executor()
+
+        timings = response.json()['timings']['first.docx']
+        self.assertEqual(timings['runs_scanned'], 9)
+        for stage in ['read_upload', 'parse', 'load_document', 'parse_xml', 'scan_paragraphs']:
+            self.assertIn(stage, timings['timings'])
+        self.assertIn('serialize;dur=', response.headers['Server-Timing'])
+
+        self.assertEqual(metrics.files_parsed.value(backend='ooxml', cache='miss'), parsed_before + 1)
+        self.assertEqual(metrics.runs_scanned.value(), runs_before + 9)
+        self.assertTrue(exposition.headers['content-type'].startswith('text/plain; version=0.0.4'))
+        for sample in [
+            'docx_stage_seconds_bucket{stage="scan_paragraphs",le="+Inf"}',
+            'docx_request_seconds_count',
+            'docx_upload_bytes_sum',
+            'docx_runs_scanned_total',
+            'docx_matches_found_total',
+        ]:
+            self.assertIn(sample, exposition.text)
+
+    def test_timings_are_only_returned_when_asked_for(self):
+        with mock.patch.object(main, 'result_cache', None), TestClient(main.app) as client:
+            response = client.post('/api/v1/docx', files=[('files', ('first.docx', make_docx(1), DOCX_CONTENT_TYPE))])
+        self.assertNotIn('timings', response.json())
+        self.assertNotIn('Server-Timing', response.headers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+from io import BytesIO
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.oxml import parse_xml
+
+from server.parse_docx import find_dates_in_docx
+from server.parse_ooxml import find_dates_in_ooxml
+
+# Save a document and return the results of both backends for it
+def find_dates_with_both_backends(document):
+    file = BytesIO()
+    document.save(file)
+    file.seek(0)
+    expected = find_dates_in_docx(Document(file))
+    file.seek(0)
+    return find_dates_in_ooxml(file), expected
+
+class TestOOXMLDateExtraction(unittest.TestCase):
+    maxDiff = None
+
+    def test_document_with_no_dates(self):
+        document = Document()
+        document.add_paragraph("A plain document containing no dates.")
+        found_dates, expected = find_dates_with_both_backends(document)
+        self.assertEqual(found_dates, [])
+        self.assertEqual(found_dates, expected)
+
+    def test_document_with_paragraphs_and_runs(self):
+        document = Document()
+        document.add_paragraph("Here are some dates in various formats:")
+        paragraph = document.add_paragraph("Signed on 2023-10-01,")
+        paragraph.add_run(" and again on 5th of October, 2024.")
+        paragraph = document.add_paragraph("Tabs\tand")
+        paragraph.add_run().add_break()
+        paragraph.add_run("breaks on 31/12/2025")
+        paragraph.add_run().add_break(WD_BREAK.PAGE)
+        paragraph.add_run("October 5 of 2024")
+
+        found_dates, expected = find_dates_with_both_backends(document)
+        self.assertEqual(len(found_dates), 4)
+        self.assertEqual(found_dates, expected)
+
+    def test_document_with_tables(self):
+        document = Document()
+        document.add_paragraph("A paragraph before the table dated 2023-10-01.")
+        table = document.add_table(rows=3, cols=3)
+        table.cell(0, 0).text = "First cell with a date: 5th of October, 2024."
+        table.cell(0, 1).text = "Second cell with no date."
+        table.cell(1, 1).text = "Merged cell with a date: 31/12/2025."
+        table.cell(1, 1).merge(table.cell(2, 2))
+        paragraph = table.cell(2, 0).add_paragraph("A date inside a table: 2024-01-15.")
+        paragraph.add_run(" And this is another date: 2024-01-16.")
+        document.add_paragraph("A paragraph after the table dated 2023-10-02.")
+        second_table = document.add_table(rows=1, cols=2)
+        second_table.cell(0, 0).merge(second_table.cell(0, 1))
+        second_table.cell(0, 0).text = "Horizontally merged cell dated October 5 of 2024."
+
+        found_dates, expected = find_dates_with_both_backends(document)
+        self.assertEqual(found_dates, expected)
+        self.assertIn(
+            'table 1, row 3, cell 3, paragraph 1, run 1',
+            [ found_date['location'] for found_date in found_dates ]
+        )
+
+    def test_document_with_linked_headers_and_footers(self):
+        document = Document()
+        section = document.sections[0]
+        section.header.paragraphs[0].text = "The original date is 2023-10-01 in the morning."
+        section.footer.paragraphs[0].text = "Last updated: 2024-01-15."
+        document.add_paragraph("The first section.")
+
+        # inherits the headers and footers of the first section
+        document.add_section()
+        document.add_paragraph("The second section.")
+
+        section = document.add_section()
+        section.header.is_linked_to_previous = False
+        section.header.paragraphs[0].text = "A header of its own from 31/12/2025."
+        section.different_first_page_header_footer = True
+        section.first_page_header.paragraphs[0].text = "First page header date: 2024-02-01."
+        section.first_page_footer.paragraphs[0].text = "First page footer date: 2024-02-02."
+
+        found_dates, expected = find_dates_with_both_backends(document)
+        self.assertEqual(found_dates, expected)
+        self.assertEqual(
+            [ found_date['location'] for found_date in found_dates ],
+            [
+                'section 1, header 1', 'section 1, footer 1',
+                'section 2, header 1', 'section 2, footer 1',
+                'section 3, first page header 1', 'section 3, first page footer 1',
+                'section 3, header 1', 'section 3, footer 1',
+            ]
+        )
+
+    def test_hyperlinks_are_part_of_header_text_but_not_of_runs(self):
+        document = Document()
+        document.sections[0].header.paragraphs[0].text = "Header updated "
+        hyperlink = parse_xml(
+            '<w:hyperlink xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            '<w:r><w:t>2023-10-01</w:t></w:r></w:hyperlink>'
+        )
+        document.sections[0].header.paragraphs[0]._p.append(hyperlink)
+        paragraph = document.add_paragraph("Before the link ")
+        paragraph._p.append(parse_xml(hyperlink.xml))
+
+        found_dates, expected = find_dates_with_both_backends(document)
+        self.assertEqual(found_dates, expected)
+        self.assertEqual(len(found_dates), 1)
+
+if __name__ == '__main__':
+    unittest.main()
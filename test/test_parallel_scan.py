@@ -0,0 +1,111 @@
+import unittest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from io import BytesIO
+from unittest import mock
+from fastapi.testclient import TestClient
+
+from server import main, workers
+from server.incremental import IncrementalScan
+from server.metrics import ParseStats
+from server.parse_docx import ScanOptions
+from server.parse_ooxml import find_dates_in_ooxml
+from bench.corpus import CorpusProfile, generate_docx
+from test.helpers import DOCX_CONTENT_TYPE
+
+PROFILE = CorpusProfile(
+    'test', paragraphs=300, runs_per_paragraph=4, tables=3, table_rows=10, table_cols=4,
+    sections=3, header_footer_lines=2, date_density=0.3
+)
+
+class TestParallelScan(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = generate_docx(PROFILE)
+
+    def scan(self, executor, options: ScanOptions = ScanOptions(), **kwargs):
+        stats = ParseStats()
+        return find_dates_in_ooxml(BytesIO(self.data), stats, options, executor=executor, **kwargs), stats
+
+    def test_same_results_as_scanning_in_one_go(self):
+        # scanning in threads splits the document the same way, without starting processes
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            for options in [
+                ScanOptions(), ScanOptions(list_sections=True), ScanOptions(join_runs=True),
+                ScanOptions(parts=frozenset({'footer', 'tables'})), ScanOptions(date_from=date(2010, 1, 1)),
+                ScanOptions(anchors=True), ScanOptions(join_runs=True, anchors=True),
+            ]:
+                with self.subTest(options=options):
+                    found_dates, stats = self.scan(executor, options, chunk_chars=2000)
+                    self.assertEqual(found_dates, find_dates_in_ooxml(BytesIO(self.data), options=options))
+                    self.assertGreater(stats.chunks_scanned, 1)
+
+    def test_chunks_in_worker_processes(self):
+        executor = workers.create_executor('process', 2)
+        try:
+            # the document is read in a worker process too
+            found_dates, stats = workers.parse_docx_bytes_in_chunks(self.data, executor, chunk_chars=5000, max_in_flight=2)
+        finally:
+            executor.shutdown()
+        self.assertEqual(found_dates, find_dates_in_ooxml(BytesIO(self.data)))
+        # the paragraphs, tables and each header and footer part
+        self.assertGreater(stats.chunks_scanned, 4)
+        self.assertGreater(stats.runs_scanned, 0)
+        self.assertGreater(stats.timings['parse_xml'], 0)
+
+    def test_chunks_in_flight_are_limited(self):
+        in_flight = peak = 0
+        lock = threading.Lock()
+
+        def scan_chunk(function, *args):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            # hold on to the worker long enough for other chunks to be sent alongside it
+            time.sleep(0.005)
+            try:
+                return function(*args)
+            finally:
+                with lock: in_flight -= 1
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            executor = mock.Mock(submit=lambda function, *args: pool.submit(scan_chunk, function, *args))
+            found_dates, stats = self.scan(executor, chunk_chars=500, max_in_flight=2)
+        self.assertEqual(found_dates, find_dates_in_ooxml(BytesIO(self.data)))
+        self.assertGreater(stats.chunks_scanned, 8)
+        self.assertEqual(peak, 2)
+
+    def test_scans_depending_on_earlier_results_are_not_split(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            found_dates, stats = self.scan(executor, ScanOptions(limit=5), chunk_chars=2000)
+            self.assertEqual(len(found_dates), 5)
+            self.assertEqual(stats.chunks_scanned, 0)
+
+            stats = ParseStats()
+            find_dates_in_ooxml(BytesIO(self.data), stats, incremental=IncrementalScan(ScanOptions()), executor=executor)
+            self.assertEqual(stats.chunks_scanned, 0)
+
+    def test_large_uploads_are_split(self):
+        workers.configure_executor('process', 2)
+        try:
+            with mock.patch.object(main, 'result_cache', None), mock.patch.object(main, 'parallel_scan_min_bytes', len(self.data)), \
+                    mock.patch.object(main, 'parallel_scan_chunk_chars', 5000), TestClient(main.app) as client:
+                def upload(data: bytes) -> dict:
+                    response = client.post('/api/v1/docx?timings=true', files=[('files', ('large.docx', data, DOCX_CONTENT_TYPE))])
+                    self.assertEqual(response.status_code, 200)
+                    return response.json()
+
+                response = upload(self.data)
+                self.assertGreater(response['timings']['large.docx']['chunks_scanned'], 0)
+                self.assertEqual(response['data']['large.docx'], find_dates_in_ooxml(BytesIO(self.data)))
+                # smaller files are parsed by a single worker
+                small = generate_docx(CorpusProfile('small', paragraphs=5))
+                self.assertEqual(upload(small)['timings']['large.docx']['chunks_scanned'], 0)
+        finally:
+            workers.shutdown_executor()
+
+if __name__ == '__main__':
+    unittest.main()
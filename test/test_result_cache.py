@@ -0,0 +1,116 @@
+import unittest
+import tempfile
+import threading
+import time
+from unittest import mock
+import httpx
+from fastapi.testclient import TestClient
+
+from server import main, cache
+from server.cache import ResultCache, cache_key
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+def found_dates(count: int):
+    return [ { 'found_date': f'2024-01-{day + 1:02}T00:00:00Z', 'type': 'run' } for day in range(count) ]
+
+class TestResultCache(unittest.TestCase):
+    def test_key_depends_on_contents_options_and_patterns(self):
+        self.assertEqual(cache_key(b'document'), cache_key(b'document'))
+        self.assertNotEqual(cache_key(b'document'), cache_key(b'other document'))
+        self.assertNotEqual(cache_key(b'document'), cache_key(b'document', 'option'))
+        key = cache_key(b'document')
+        with mock.patch.object(cache, 'pattern_set_version', 'changed'):
+            self.assertNotEqual(cache_key(b'document'), key)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        result_cache = ResultCache(max_entries=2, max_bytes=1024 * 1024)
+        result_cache.set('a', found_dates(1))
+        result_cache.set('b', found_dates(2))
+        self.assertEqual(result_cache.get('a'), found_dates(1))
+        result_cache.set('c', found_dates(3))
+
+        self.assertIsNone(result_cache.get('b'))
+        self.assertEqual(result_cache.get('a'), found_dates(1))
+        self.assertEqual(result_cache.get('c'), found_dates(3))
+        stats = result_cache.stats()
+        self.assertEqual((stats['entries'], stats['evictions']), (2, 1))
+        self.assertEqual((stats['memory_hits'], stats['misses']), (3, 1))
+        self.assertEqual(stats['hit_rate'], 0.75)
+
+    def test_entries_are_evicted_by_size(self):
+        result_cache = ResultCache(max_entries=100, max_bytes=200)
+        result_cache.set('a', found_dates(2))
+        result_cache.set('b', found_dates(2))
+        self.assertIsNone(result_cache.get('a'))
+        self.assertIsNotNone(result_cache.get('b'))
+        self.assertLessEqual(result_cache.stats()['bytes'], 200)
+
+    def test_entries_expire(self):
+        result_cache = ResultCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        result_cache.set('a', found_dates(1))
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(result_cache.get('a'))
+
+    def test_disk_tier_survives_restarts(self):
+        with tempfile.TemporaryDirectory() as disk_path:
+            ResultCache(max_entries=10, max_bytes=1024 * 1024, disk_path=disk_path).set('a', found_dates(3))
+
+            restarted_cache = ResultCache(max_entries=10, max_bytes=1024 * 1024, disk_path=disk_path)
+            self.assertEqual(restarted_cache.get('a'), found_dates(3))
+            self.assertEqual(restarted_cache.get('a'), found_dates(3))
+            stats = restarted_cache.stats()
+            self.assertEqual((stats['disk_hits'], stats['memory_hits']), (1, 1))
+
+    def test_disk_tier_is_trimmed_to_its_size_limit(self):
+        with tempfile.TemporaryDirectory() as disk_path:
+            result_cache = ResultCache(max_entries=10, max_bytes=1024 * 1024, disk_path=disk_path, disk_max_bytes=200)
+            for key in ['a', 'b', 'c']:
+                result_cache.set(key, found_dates(2))
+                time.sleep(0.01)
+            result_cache.clear()
+            self.assertIsNone(result_cache.get('a'))
+            self.assertIsNotNone(result_cache.get('c'))
+
+    def test_endpoint_reports_hits_and_misses(self):
+        result_cache = ResultCache(max_entries=10, max_bytes=1024 * 1024)
+        data = make_docx(2)
+        with mock.patch.object(main, 'result_cache', result_cache), TestClient(main.app) as client:
+            upload = lambda: client.post('/api/v1/docx', files=[
+                ('files', ('first.docx', data, DOCX_CONTENT_TYPE))
+            ]).json()
+            first_response, second_response = upload(), upload()
+
+            self.assertEqual(first_response['cache'], { 'first.docx': 'miss' })
+            self.assertEqual(second_response['cache'], { 'first.docx': 'hit' })
+            self.assertEqual(first_response['data'], second_response['data'])
+            self.assertEqual(client.get('/api/v1/cache').json()['hit_rate'], 0.5)
+
+class ThreadRecordingCache(ResultCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, found_dates):
+        self.threads.add(threading.get_ident())
+        super().set(key, found_dates)
+
+class TestCacheOffTheEventLoop(unittest.IsolatedAsyncioTestCase):
+    async def test_lookups_and_writes_run_in_threads(self):
+        result_cache = ThreadRecordingCache(max_entries=10, max_bytes=1024 * 1024)
+        data = make_docx(2)
+        with mock.patch.object(main, 'result_cache', result_cache):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                for expected_status in ['miss', 'hit']:
+                    response = await client.post('/api/v1/docx', files=[('files', ('first.docx', data, DOCX_CONTENT_TYPE))])
+                    self.assertEqual(response.json()['cache'], { 'first.docx': expected_status })
+        # the event loop runs in this thread
+        self.assertTrue(result_cache.threads)
+        self.assertNotIn(threading.get_ident(), result_cache.threads)
+
+if __name__ == '__main__':
+    unittest.main()
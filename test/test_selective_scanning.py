@@ -0,0 +1,104 @@
+import unittest
+from datetime import date
+from io import BytesIO
+from unittest import mock
+from docx import Document
+from fastapi.testclient import TestClient
+
+from server import main
+from server.cache import ResultCache
+from server.metrics import ParseStats
+from server.parse_docx import ScanOptions, find_dates_in_docx
+from server.parse_ooxml import find_dates_in_ooxml
+from test.helpers import DOCX_CONTENT_TYPE
+
+def make_mixed_docx() -> bytes:
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Header revised 2021-01-01"
+    document.sections[0].footer.paragraphs[0].text = "Footer printed 2022-02-02"
+    for year in range(2010, 2030):
+        document.add_paragraph(f"Clause signed on {year}-06-15 by both parties")
+    table = document.add_table(rows=3, cols=2)
+    for row_index, row in enumerate(table.rows):
+        for cell_index, cell in enumerate(row.cells):
+            cell.text = f"Due 2015-0{row_index + 1}-1{cell_index}"
+    file = BytesIO()
+    document.save(file)
+    return file.getvalue()
+
+def part_of(found_date: dict) -> str:
+    if found_date['type'] != 'run': return found_date['type']
+    return 'tables' if found_date['location'].startswith('table') else 'runs'
+
+class TestSelectiveScanning(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_mixed_docx()
+
+    def find_dates(self, backend: str, options: ScanOptions, stats: ParseStats = None):
+        if backend == 'ooxml':
+            return find_dates_in_ooxml(BytesIO(self.data), stats, options)
+        return find_dates_in_docx(Document(BytesIO(self.data)), stats, options)
+
+    def test_parts(self):
+        for backend in ['python-docx', 'ooxml']:
+            all_dates = self.find_dates(backend, ScanOptions())
+            self.assertEqual(len(all_dates), 2 + 20 + 6)
+            for parts in [{'header'}, {'footer'}, {'runs'}, {'tables'}, {'header', 'tables'}, set()]:
+                with self.subTest(backend=backend, parts=parts):
+                    self.assertEqual(
+                        self.find_dates(backend, ScanOptions(parts=frozenset(parts))),
+                        [ found_date for found_date in all_dates if part_of(found_date) in parts ]
+                    )
+
+    def test_date_range(self):
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                found_dates = self.find_dates(backend, ScanOptions(date_from=date(2015, 1, 1), date_to=date(2021, 1, 1)))
+                self.assertEqual(
+                    sorted({ found_date['found_date'][:4] for found_date in found_dates }),
+                    [ str(year) for year in range(2015, 2022) ]
+                )
+                self.assertEqual(len(found_dates), 1 + 6 + 6)
+
+    def test_limit_keeps_the_first_dates(self):
+        for backend in ['python-docx', 'ooxml']:
+            all_dates = self.find_dates(backend, ScanOptions())
+            for parts in [None, {'runs', 'tables'}, {'tables'}]:
+                parts = frozenset(parts) if parts else ScanOptions().parts
+                expected = [ found_date for found_date in all_dates if part_of(found_date) in parts ]
+                for limit in [1, 2, 3, 21, 22, 23, 100]:
+                    with self.subTest(backend=backend, parts=parts, limit=limit):
+                        self.assertEqual(self.find_dates(backend, ScanOptions(parts=parts, limit=limit)), expected[:limit])
+
+    def test_scanning_stops_at_the_limit(self):
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                stats = ParseStats()
+                self.find_dates(backend, ScanOptions(parts=frozenset({'runs', 'tables'}), limit=3), stats)
+                self.assertEqual(stats.runs_scanned, 3)
+
+class TestSelectiveScanningEndpoint(unittest.TestCase):
+    def test_query_parameters(self):
+        data = make_mixed_docx()
+        result_cache = ResultCache(max_entries=10, max_bytes=1024 * 1024)
+        with mock.patch.object(main, 'result_cache', result_cache), TestClient(main.app) as client:
+            def upload(query: str):
+                response = client.post(f'/api/v1/docx?backend=ooxml&{query}', files=[('files', ('first.docx', data, DOCX_CONTENT_TYPE))])
+                return response.status_code, response.json()
+
+            _status, response = upload('parts=header&parts=footer')
+            self.assertEqual([ found_date['type'] for found_date in response['data']['first.docx'] ], ['header', 'footer'])
+            # differently scanned results are cached separately
+            _status, response = upload('limit=3')
+            self.assertEqual(len(response['data']['first.docx']), 3)
+            self.assertEqual(response['cache'], { 'first.docx': 'miss' })
+            _status, response = upload('date_from=2029-01-01')
+            self.assertEqual([ found_date['found_text'] for found_date in response['data']['first.docx'] ], ['2029-06-15'])
+
+            self.assertEqual(upload('parts=pages')[0], 422)
+            self.assertEqual(upload('limit=0')[0], 422)
+            self.assertEqual(upload('date_from=2020-01-01&date_to=2019-01-01')[0], 400)
+
+if __name__ == '__main__':
+    unittest.main()
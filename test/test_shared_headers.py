@@ -0,0 +1,59 @@
+import unittest
+from io import BytesIO
+from docx import Document
+
+from server.metrics import ParseStats
+from server.parse_docx import ScanOptions, find_dates_in_docx
+from server.parse_ooxml import find_dates_in_ooxml
+
+SECTION_COUNT = 50
+
+def make_sectioned_docx() -> bytes:
+    """A document whose sections all share the first section's header and footer."""
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Revised on 2023-10-01"
+    document.sections[0].footer.paragraphs[0].text = "Printed 5th of October, 2024"
+    for _ in range(SECTION_COUNT - 1):
+        document.add_section()
+    file = BytesIO()
+    document.save(file)
+    return file.getvalue()
+
+def find_dates(data: bytes, backend: str, options: ScanOptions = ScanOptions()):
+    stats = ParseStats()
+    if backend == 'ooxml':
+        return find_dates_in_ooxml(BytesIO(data), stats, options), stats
+    return find_dates_in_docx(Document(BytesIO(data)), stats, options), stats
+
+class TestSharedHeadersAndFooters(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_sectioned_docx()
+
+    def test_shared_parts_are_scanned_once(self):
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                found_dates, stats = find_dates(self.data, backend)
+                # the shared header and footer paragraphs, the body paragraphs have no runs
+                self.assertEqual(stats.runs_scanned, 2)
+                self.assertEqual(len(found_dates), SECTION_COUNT * 2)
+                self.assertEqual(
+                    [ found_date['location'] for found_date in found_dates[-2:] ],
+                    [f'section {SECTION_COUNT}, header 1', f'section {SECTION_COUNT}, footer 1']
+                )
+                self.assertTrue(all('sections' not in found_date for found_date in found_dates))
+
+    def test_sections_can_be_listed_instead_of_repeated(self):
+        results = []
+        for backend in ['python-docx', 'ooxml']:
+            with self.subTest(backend=backend):
+                found_dates, _stats = find_dates(self.data, backend, ScanOptions(list_sections=True))
+                self.assertEqual([ found_date['type'] for found_date in found_dates ], ['header', 'footer'])
+                self.assertEqual([ found_date['location'] for found_date in found_dates ], ['section 1, header 1', 'section 1, footer 1'])
+                for found_date in found_dates:
+                    self.assertEqual(found_date['sections'], list(range(1, SECTION_COUNT + 1)))
+                results.append(found_dates)
+        self.assertEqual(results[0], results[1])
+
+if __name__ == '__main__':
+    unittest.main()
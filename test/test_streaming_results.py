@@ -0,0 +1,76 @@
+import unittest
+import asyncio
+import json
+from io import BytesIO
+from unittest import mock
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from server import main
+from test.helpers import make_docx, DOCX_CONTENT_TYPE
+
+class TestStreamingResults(unittest.TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        patcher = mock.patch.object(main, 'result_cache', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload_files(self):
+        return [
+            ('files', ('first.docx', make_docx(2), DOCX_CONTENT_TYPE)),
+            ('files', ('broken.docx', b'not a zip file', DOCX_CONTENT_TYPE)),
+            ('files', ('notes.txt', b'2024-01-01', 'text/plain')),
+            ('files', ('second.docx', make_docx(1), DOCX_CONTENT_TYPE)),
+        ]
+
+    def test_results_are_streamed_as_json_lines(self):
+        with TestClient(main.app) as client:
+            response = client.post('/api/v1/docx/stream', files=self.upload_files())
+            expected_dates = client.post('/api/v1/docx', files=[self.upload_files()[0]]).json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-type'], 'application/x-ndjson')
+        results = { result['filename']: result for result in map(json.loads, response.text.splitlines()) }
+
+        self.assertEqual(sorted(results), ['broken.docx', 'first.docx', 'notes.txt', 'second.docx'])
+        self.assertEqual(results['first.docx']['data'], expected_dates['first.docx'])
+        self.assertEqual(len(results['second.docx']['data']), 1)
+        self.assertEqual(results['broken.docx']['status_code'], 500)
+        self.assertIn('Error loading file', results['broken.docx']['error'])
+        self.assertEqual(results['notes.txt'], {
+            'filename': 'notes.txt', 'error': "Only .docx files are allowed", 'status_code': 400
+        })
+
+    def test_results_are_streamed_as_server_sent_events(self):
+        with TestClient(main.app) as client:
+            response = client.post(
+                '/api/v1/docx/stream', files=self.upload_files(),
+                headers={ 'Accept': 'text/event-stream' }
+            )
+
+        self.assertTrue(response.headers['content-type'].startswith('text/event-stream'))
+        events = [ event for event in response.text.split('\n\n') if event ]
+        self.assertEqual(len(events), 4)
+        for event in events:
+            event_type, data = event.split('\n')
+            self.assertEqual(event_type, 'event: file')
+            self.assertIn('filename', json.loads(data.removeprefix('data: ')))
+
+    def test_uploads_outlive_the_request(self):
+        # some FastAPI versions close the request's files when the handler returns, before the
+        # streamed results are sent
+        async def take_and_close():
+            file = UploadFile(BytesIO(b'contents'), filename='first.docx')
+            owned = main._take_upload(file)
+            await file.close()
+            try:
+                return owned.filename, await owned.read()
+            finally:
+                await owned.close()
+
+        self.assertEqual(asyncio.run(take_and_close()), ('first.docx', b'contents'))
+
+if __name__ == '__main__':
+    unittest.main()